@@ -572,6 +572,11 @@ MODULESTORE = {
     }
 }
 
+# The maximum size, in bytes, of the course structures and block definitions
+# from the 'course_structure_cache' that each process also keeps in memory.  0
+# disables the in-process cache.
+COURSE_STRUCTURE_LOCAL_CACHE_SIZE = 0
+
 # Modulestore-level field override providers. These field override providers don't
 # require student context.
 MODULESTORE_FIELD_OVERRIDE_PROVIDERS = ()
@@ -13,6 +13,12 @@ from six import text_type
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
 
+# Compiled url replacement regexes, by prefix.  The url rewrites run on the
+# html of every block, and again on the html of the verticals and sequences
+# that contain them, so compiling the regexes once per process matters; the
+# re module's own cache is small and is cleared whenever it fills up.
+_URL_REPLACE_REGEXES = {}
+
 
 def _url_replace_regex(prefix):
     """
@@ -30,6 +36,16 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+def _compiled_url_replace_regex(prefix):
+    """
+    Returns the compiled _url_replace_regex for `prefix`.
+    """
+    regex = _URL_REPLACE_REGEXES.get(prefix)
+    if regex is None:
+        regex = _URL_REPLACE_REGEXES[prefix] = re.compile(_url_replace_regex(prefix))
+    return regex
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -66,12 +82,15 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
     output: <text> after the link rewriting rules are applied
     """
 
+    if '/jump_to_id/' not in text:
+        return text
+
     def replace_jump_to_id_url(match):
         quote = match.group('quote')
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_replace_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -84,6 +103,9 @@ def replace_course_urls(text, course_key):
     returns: text with the links replaced
     """
 
+    if '/course/' not in text:
+        return text
+
     course_id = text_type(course_key)
 
     def replace_course_url(match):
@@ -91,7 +113,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_replace_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -99,6 +121,14 @@ def process_static_urls(text, replacement_function, data_dir=None):
     Run an arbitrary replacement function on any urls matching the static file
     directory
     """
+    # Look for STATIC_URL as the same type of string as the text, so that
+    # bytestrings with non-ascii characters aren't decoded.
+    static_url = text_type(settings.STATIC_URL)
+    if isinstance(text, bytes):
+        static_url = static_url.encode('utf-8')
+    if '/static/' not in text and static_url not in text:
+        return text
+
     def wrap_part_extraction(match):
         """
         Unwraps a match group for the captures specified in _url_replace_regex
@@ -121,14 +151,10 @@ def process_static_urls(text, replacement_function, data_dir=None):
 
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    return _compiled_url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )).sub(wrap_part_extraction, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -88,6 +88,30 @@ def test_process_url_no_match():
     assert_equals('"test/static/file.png"', process_static_urls(STATIC_SOURCE, processor))
 
 
+@patch.dict('static_replace._URL_REPLACE_REGEXES', clear=True)
+@patch('static_replace.re.compile', wraps=re.compile)
+def test_url_regexes_are_reused(mock_compile):
+    processor = Mock(return_value='"replaced"')
+    text = '<img src="/static/file.png"/><a href="/course/info">Info</a>'
+    for __ in range(2):
+        process_static_urls(text, processor, data_dir=DATA_DIRECTORY)
+        replace_course_urls(text, COURSE_KEY)
+    assert_equals(processor.call_count, 2)
+    assert_equals(mock_compile.call_count, 2)
+
+    # Text without any url to replace isn't searched.
+    assert_equals('<p>No urls</p>', process_static_urls('<p>No urls</p>', processor))
+    assert_equals(processor.call_count, 2)
+
+
+@override_settings(STATIC_URL='https://example.com/static-files/')
+def test_process_url_non_ascii_bytes():
+    processor = Mock(return_value='"replaced"')
+    text = u'<p>Caf\xe9</p>'.encode('utf-8')
+    assert_equals(text, process_static_urls(text, processor))
+    assert_false(processor.called)
+
+
 @patch('django.http.HttpRequest', autospec=True)
 def test_static_urls(mock_request):
     mock_request.build_absolute_uri = lambda url: 'http://' + url
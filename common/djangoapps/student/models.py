@@ -131,6 +131,21 @@ class AnonymousUserId(models.Model):
     course_id = CourseKeyField(db_index=True, max_length=255, blank=True)
 
 
+def anonymous_id_digest(user, course_id):
+    """
+    Return the anonymous id of a (user, course) pair, as
+    `anonymous_id_for_user` does, without caching it on the user or saving
+    it in an AnonymousUserId object.
+    """
+    # include the secret key as a salt, and to make the ids unique across different LMS installs.
+    hasher = hashlib.md5()
+    hasher.update(settings.SECRET_KEY)
+    hasher.update(unicode(user.id))
+    if course_id:
+        hasher.update(unicode(course_id).encode('utf-8'))
+    return hasher.hexdigest()
+
+
 def anonymous_id_for_user(user, course_id, save=True):
     """
     Return a unique id for a (user, course) pair, suitable for inserting
@@ -151,13 +166,7 @@ def anonymous_id_for_user(user, course_id, save=True):
     if cached_id is not None:
         return cached_id
 
-    # include the secret key as a salt, and to make the ids unique across different LMS installs.
-    hasher = hashlib.md5()
-    hasher.update(settings.SECRET_KEY)
-    hasher.update(unicode(user.id))
-    if course_id:
-        hasher.update(unicode(course_id).encode('utf-8'))
-    digest = hasher.hexdigest()
+    digest = anonymous_id_digest(user, course_id)
 
     if not hasattr(user, '_anonymous_id'):
         user._anonymous_id = {}  # pylint: disable=protected-access
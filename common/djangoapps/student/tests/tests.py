@@ -40,6 +40,7 @@ from student.models import (
     CourseEnrollment,
     LinkedInAddToProfileConfiguration,
     UserAttribute,
+    anonymous_id_digest,
     anonymous_id_for_user,
     unique_id_for_user,
     user_by_anonymous_id
@@ -1044,6 +1045,15 @@ class AnonymousLookupTable(ModuleStoreTestCase):
         self.assertEqual(self.user, real_user)
         self.assertEqual(anonymous_id, anonymous_id_for_user(self.user, course2.id, save=False))
 
+    def test_anonymous_id_digest(self):
+        """Test that the digest is the anonymous id, and is neither cached nor saved."""
+        anonymous_id = anonymous_id_digest(self.user, self.course.id)
+        self.assertFalse(hasattr(self.user, '_anonymous_id'))
+        self.assertIsNone(user_by_anonymous_id(anonymous_id))
+
+        self.assertEqual(anonymous_id, anonymous_id_for_user(self.user, self.course.id))
+        self.assertEqual(self.user, user_by_anonymous_id(anonymous_id))
+
     def test_secret_key_changes(self):
         """Test that a new anonymous id is returned when the secret key changes."""
         CourseEnrollment.enroll(self.user, self.course.id)
@@ -248,34 +248,217 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return the `CompiledExpression` for a math expression.
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+    Expressions are only parsed the first time they are seen.  Like the re
+    module's cache of compiled patterns, the cache is emptied when it holds
+    `COMPILED_EXPRESSION_CACHE_SIZE` expressions.  (calc also runs in the
+    sandbox, so it can't use the LRU caches of the platform.)
+    """
+    key = (math_expr, case_sensitive)
+    compiled = _COMPILED_EXPRESSIONS.get(key)
+    if compiled is None:
+        compiled = CompiledExpression(math_expr, case_sensitive)
+        if len(_COMPILED_EXPRESSIONS) >= COMPILED_EXPRESSION_CACHE_SIZE:
+            _COMPILED_EXPRESSIONS.clear()
+        _COMPILED_EXPRESSIONS[key] = compiled
+    return compiled
+
+
+COMPILED_EXPRESSION_CACHE_SIZE = 1000
+_COMPILED_EXPRESSIONS = {}
+
+
+class CompiledExpression(object):
+    """
+    A math expression that is parsed once, and can then be evaluated any
+    number of times, with different variables.
+
+    The parse tree is turned into a tree of closures, each of which evaluates
+    one node from the values of its children, so evaluating doesn't have to
+    walk the parse results or look at the operator tokens again.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        """
+        Parse `math_expr` and compile its tree.
+
+        Raise a `pyparsing.ParseException` if it is not a valid expression.
+        """
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+        if case_sensitive:
+            self._casify = lambda x: x
+        else:
+            self._casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        if math_expr.strip() == "":
+            self._parser = None
+            self._evaluate = lambda variables, functions: float('nan')
+        else:
+            self._parser = ParseAugmenter(math_expr, case_sensitive)
+            self._parser.parse_algebra()
+            self._evaluate = self._compile_node(self._parser.tree)
+
+    @property
+    def variables_used(self):
+        """
+        The set of variable names used in the expression.
+        """
+        return self._parser.variables_used if self._parser else set()
+
+    @property
+    def functions_used(self):
+        """
+        The set of function names used in the expression.
+        """
+        return self._parser.functions_used if self._parser else set()
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression, as `evaluator` does.
+        """
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+        if self._parser:
+            self._parser.check_variables(all_variables, all_functions)
+        return self._evaluate(all_variables, all_functions)
+
+    def evaluate_samples(self, variable_samples, functions):
+        """
+        Evaluate the expression for each of the dicts of variables in
+        `variable_samples`, and return the list of results.
+
+        When all the samples have the same variables, the expression is
+        evaluated once, for numpy arrays holding the values of each variable
+        in all the samples. If that fails, e.g. because of a division by zero,
+        an overflow or a function that only accepts scalars, each sample is
+        evaluated separately, so that the results and errors are those of
+        `evaluate`.
+        """
+        if not variable_samples:
+            return []
+
+        variable_names = set(variable_samples[0])
+        if len(variable_samples) > 1 and all(set(sample) == variable_names for sample in variable_samples):
+            variable_arrays = {}
+            for name in variable_names:
+                values = numpy.array([sample[name] for sample in variable_samples])
+                if values.dtype.kind in 'biu':
+                    # Integer arrays silently wrap around on overflow.
+                    values = values.astype(float)
+                variable_arrays[name] = values
+            if all(values.dtype.kind in 'fc' for values in variable_arrays.itervalues()):
+                results = self._evaluate_arrays(variable_arrays, functions, len(variable_samples))
+                if results is not None:
+                    return results
+
+        return [self.evaluate(sample, functions) for sample in variable_samples]
+
+    def _evaluate_arrays(self, variable_arrays, functions, num_samples):
+        """
+        Evaluate the expression once for arrays of the values of each
+        variable, and return the list of results.
+
+        Return None if that fails, or if any of the operations would have
+        warned about an invalid result or an overflow.
+        """
+        all_variables, all_functions = add_defaults(variable_arrays, functions, self.case_sensitive)
+        if self._parser:
+            self._parser.check_variables(all_variables, all_functions)
+        try:
+            with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+                results = numpy.asarray(self._evaluate(all_variables, all_functions))
+        except (ArithmeticError, LookupError, TypeError, ValueError):
+            # E.g. a division by zero, or a function that only accepts scalars
+            return None
+        if results.shape == ():
+            # The expression doesn't depend on the variables.
+            results = numpy.resize(results, (num_samples,))
+        if results.shape != (num_samples,) or results.dtype.kind not in 'fc':
+            return None
+        return results.tolist()
+
+    def _compile_node(self, node):
+        """
+        Return a function of the variables and functions dicts, which returns
+        the value of the given parse tree node.
+        """
+        node_name = node.getName()
+        children = [
+            self._compile_node(child) if isinstance(child, ParseResults) else child
+            for child in node
+        ]
+
+        if node_name == 'number':
+            value = eval_number(children)
+            return lambda variables, functions: value
+
+        elif node_name == 'variable':
+            name = self._casify(children[0])
+            return lambda variables, functions: variables[name]
+
+        elif node_name == 'function':
+            name = self._casify(children[0])
+            argument = children[1]
+            return lambda variables, functions: functions[name](argument(variables, functions))
+
+        elif node_name == 'atom':
+            # Ignore the parenthesis.
+            return next(child for child in children if callable(child))
+
+        operands = [child for child in children if callable(child)]
+        if len(operands) == 1 and node_name != 'sum':
+            return operands[0]
+
+        if node_name == 'power':
+            def evaluate_power(variables, functions):
+                """
+                Exponentiate the operands, right to left.
+                """
+                values = [operand(variables, functions) for operand in reversed(operands)]
+                return reduce(lambda a, b: b ** a, values)
+            return evaluate_power
+
+        elif node_name == 'parallel':
+            def evaluate_parallel(variables, functions):
+                """
+                Combine the operands as parallel resistors.
+                """
+                values = [operand(variables, functions) for operand in operands]
+                if any(isinstance(value, numpy.ndarray) for value in values):
+                    # A zero among the inputs raises in `evaluate_samples`,
+                    # which then lets `eval_parallel` return NaN for it.
+                    return 1. / sum(1. / value for value in values)
+                return eval_parallel(values)
+            return evaluate_parallel
+
+        elif node_name in ('sum', 'product'):
+            operators = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
+            # Pair each operand with the operator preceding it.
+            current_op = operator.add if node_name == 'sum' else operator.mul
+            terms = []
+            for child in children:
+                if callable(child):
+                    terms.append((current_op, child))
+                else:
+                    current_op = operators[child]
+            initial = 0.0 if node_name == 'sum' else 1.0
+
+            def evaluate_terms(variables, functions):
+                """
+                Fold the operands with their operators.
+                """
+                total = initial
+                for term_op, term in terms:
+                    total = term_op(total, term(variables, functions))
+                return total
+            return evaluate_terms
+
+        raise Exception(u"Unknown branch name '{}'".format(node_name))  # pragma: no cover
 
 
 class ParseAugmenter(object):
@@ -5,6 +5,7 @@ Unit tests for calc.py
 import unittest
 import numpy
 import calc
+from mock import patch
 from pyparsing import ParseException
 
 # numpy's default behavior when it evaluates a function outside its domain
@@ -554,3 +555,84 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Run tests for calc.compile_expression and calc.CompiledExpression
+    """
+
+    def test_cache(self):
+        """
+        Expressions are only parsed once per case sensitivity.
+        """
+        compiled = calc.compile_expression('2*x + y', case_sensitive=True)
+        self.assertIs(compiled, calc.compile_expression('2*x + y', case_sensitive=True))
+        self.assertIsNot(compiled, calc.compile_expression('2*x + y', case_sensitive=False))
+        self.assertEqual(compiled.variables_used, {'x', 'y'})
+        self.assertEqual(compiled.evaluate({'x': 1.5, 'y': 2.0}, {}), 5.0)
+
+    @patch.dict('calc.calc._COMPILED_EXPRESSIONS', clear=True)
+    @patch('calc.calc.COMPILED_EXPRESSION_CACHE_SIZE', 2)
+    def test_cache_size(self):
+        """
+        The cache is emptied when it is full.
+        """
+        compiled = calc.compile_expression('x + 1')
+        calc.compile_expression('x + 2')
+        self.assertIs(compiled, calc.compile_expression('x + 1'))
+        calc.compile_expression('x + 3')
+        self.assertIsNot(compiled, calc.compile_expression('x + 1'))
+
+    def test_evaluate_samples(self):
+        """
+        Evaluating all the samples at once gives the results of evaluating
+        them one by one.
+        """
+        math_expr = "-x^2^0.5 + sin(y)/2 + 2k || x - 5e-3*pi*i"
+        samples = [{'x': float(x), 'y': 0.1 * x} for x in range(1, 20)]
+        compiled = calc.compile_expression(math_expr)
+        results = compiled.evaluate_samples(samples, {})
+        self.assertEqual(len(results), len(samples))
+        for sample, result in zip(samples, results):
+            self.assertAlmostEqual(result, calc.evaluator(sample, {}, math_expr))
+
+    def test_evaluate_samples_at_once(self):
+        """
+        Samples with the same variables are evaluated at once, without
+        evaluating each of them.
+        """
+        samples = [{'x': float(x)} for x in range(1, 5)]
+        compiled = calc.compile_expression('x^2 + 1')
+        with patch.object(calc.CompiledExpression, 'evaluate') as mock_evaluate:
+            self.assertEqual(compiled.evaluate_samples(samples, {}), [2.0, 5.0, 10.0, 17.0])
+            self.assertEqual(calc.compile_expression('1+2').evaluate_samples(samples, {}), [3.0] * 4)
+        self.assertFalse(mock_evaluate.called)
+
+    def test_evaluate_samples_constant(self):
+        """
+        Expressions that don't depend on the samples are repeated for each one.
+        """
+        samples = [{'x': 1.0}, {'x': 2.0}]
+        self.assertEqual(calc.compile_expression('1+2').evaluate_samples(samples, {}), [3.0, 3.0])
+        self.assertEqual(calc.compile_expression('').evaluate_samples([], {}), [])
+
+    def test_evaluate_samples_fallback(self):
+        """
+        Errors are raised as when evaluating the samples one by one.
+        """
+        samples = [{'x': 1.0}, {'x': 0.0}]
+        with self.assertRaises(ZeroDivisionError):
+            calc.compile_expression('1/x').evaluate_samples(samples, {})
+        with self.assertRaisesRegexp(ValueError, 'factorial'):
+            calc.compile_expression('fact(x - 1)').evaluate_samples(samples, {})
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            calc.compile_expression('x + y').evaluate_samples(samples, {})
+
+        results = calc.compile_expression('1 || x').evaluate_samples(samples, {})
+        self.assertEqual(results[0], 0.5)
+        self.assertTrue(numpy.isnan(results[1]))
+
+        # Functions that only accept scalars still work.
+        samples = [{'x': 3.0}, {'x': 4.0}]
+        self.assertEqual(calc.compile_expression('fact(x)').evaluate_samples(samples, {}), [6, 24])
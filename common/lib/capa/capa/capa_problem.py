@@ -29,9 +29,10 @@ import capa.inputtypes as inputtypes
 import capa.responsetypes as responsetypes
 import capa.xqueue_interface as xqueue_interface
 from capa.correctmap import CorrectMap
-from capa.safe_exec import safe_exec
-from capa.util import contextualize_text, convert_files_to_filenames
+from capa.safe_exec import SafeExecResultCache, safe_exec
+from capa.util import contextualize_text, convert_files_to_filenames, get_course_key
 from openedx.core.djangolib.markup import HTML
+from openedx.core.lib.cache_utils import LRUCache
 from xmodule.stringify import stringify_children
 
 # extra things displayed after "show answers" is pressed
@@ -71,6 +72,11 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# Number of problem texts whose parsed trees are kept in memory, so that
+# problems don't have to be parsed again for every learner.
+PARSED_PROBLEM_CACHE_SIZE = 500
+_PARSED_PROBLEMS = LRUCache(PARSED_PROBLEM_CACHE_SIZE)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -171,15 +177,10 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        self.make_xml_compatible(self.tree)
+        # parse problem XML file into an element tree, which is modified below,
+        # so this problem gets its own copy of the cached tree.
+        self.problem_text, tree = self._parse_problem_text(problem_text)
+        self.tree = deepcopy(tree)
 
         # handle any <include file="foo"> tags
         self._process_includes()
@@ -214,6 +215,27 @@ class LoncapaProblem(object):
 
             self.extracted_tree = self._extract_html(self.tree)
 
+    def _parse_problem_text(self, problem_text):
+        """
+        Returns the problem text, with startouttext and endouttext converted,
+        and its parsed, XML compatible tree.
+
+        The results for the PARSED_PROBLEM_CACHE_SIZE most recently used
+        problem texts are cached, so the returned tree must not be modified.
+        """
+        parsed = _PARSED_PROBLEMS.get(problem_text)
+        if parsed is None:
+            # Convert startouttext and endouttext to proper <text></text>
+            converted_text = re.sub(r"startouttext\s*/", "text", problem_text)
+            converted_text = re.sub(r"endouttext\s*/", "/text", converted_text)
+
+            tree = etree.XML(converted_text)
+            self.make_xml_compatible(tree)
+
+            parsed = (converted_text, tree)
+            _PARSED_PROBLEMS.set(problem_text, parsed)
+        return parsed
+
     def make_xml_compatible(self, tree):
         """
         Adjust tree xml in-place for compatibility before creating
@@ -698,7 +720,6 @@ class LoncapaProblem(object):
         """
         context = {}
         context['seed'] = self.seed
-        context['anonymous_student_id'] = self.capa_system.anonymous_student_id
         all_code = ''
 
         python_path = []
@@ -721,6 +742,14 @@ class LoncapaProblem(object):
             code = unescape(script.text, XMLESC)
             all_code += code
 
+        # A SafeExecResultCache keys the results of the code by the values of
+        # its globals, so only give it the id of the student if it uses it;
+        # the results of the code that doesn't can then be shared by all
+        # students. Other caches get the same globals as always.
+        shares_results = isinstance(self.capa_system.cache, SafeExecResultCache)
+        if 'anonymous_student_id' in all_code or not shares_results:
+            context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+
         extra_files = []
         if all_code:
             # An asset named python_lib.zip can be imported by Python code.
@@ -739,12 +768,15 @@ class LoncapaProblem(object):
                     cache=self.capa_system.cache,
                     slug=self.problem_id,
                     unsafely=self.capa_system.can_execute_unsafe_code(),
+                    course_key=get_course_key(self.capa_module),
                 )
             except Exception as err:
                 log.exception("Error while execing script code: " + all_code)
                 msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
                 raise responsetypes.LoncapaProblemError(msg)
 
+        context.setdefault('anonymous_student_id', self.capa_system.anonymous_student_id)
+
         # Store code source in context, along with the Python path needed to run it correctly.
         context['script_code'] = all_code
         context['python_path'] = python_path
@@ -778,7 +810,7 @@ class LoncapaProblem(object):
 
         problemid = problemtree.get('id')    # my ID
 
-        if problemtree.tag in inputtypes.registry.registered_tags():
+        if inputtypes.registry.is_registered(problemtree.tag):
             # If this is an inputtype subtree, let it render itself.
             response_data = self.problem_data[problemid]
 
@@ -843,7 +875,7 @@ class LoncapaProblem(object):
             )
 
         # let each custom renderer render itself:
-        if problemtree.tag in customrender.registry.registered_tags():
+        if customrender.registry.is_registered(problemtree.tag):
             renderer_class = customrender.registry.get_class_for_tag(problemtree.tag)
             renderer = renderer_class(self.capa_system, problemtree)
             return renderer.get_html()
@@ -52,6 +52,12 @@ class TagRegistry(object):
         """
         return self._mapping.keys()
 
+    def is_registered(self, tag):
+        """
+        Returns whether `tag` is in registered_tags(), without building the list.
+        """
+        return tag in self._mapping
+
     def get_class_for_tag(self, tag):
         """
         For any tag in registered_tags(), returns the corresponding class.  Otherwise, will raise
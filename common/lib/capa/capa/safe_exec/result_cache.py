@@ -0,0 +1,156 @@
+"""
+A bounded cache for the results of `safe_exec`, shared by all the problems
+rendered by a process.
+
+Results are looked up in an in-process LRU tier first, bounded by the total
+size of its results, then in an optional backend tier, such as memcached,
+which is shared by all the workers.  Both tiers skip results that are too
+large, and expire results after a timeout.
+The in-process tier keeps results pickled, so that every hit returns a new
+copy that the caller is free to modify, as the backend tier does.
+
+Running sandboxed code takes orders of magnitude longer than reading its
+cached result, so the cache keeps track of how long each result took to
+compute, and reports the time saved by its hits.
+"""
+import cPickle as pickle
+import threading
+import time
+
+from dogapi import dog_stats_api
+
+from openedx.core.lib.cache_utils import LRUCache
+
+METRIC_NAME = 'capa.safe_exec.result_cache'
+
+
+class SafeExecResultCache(object):
+    """
+    A cache with the `.get(key)` and `.set(key, value)` methods `safe_exec`
+    expects, see its `cache` argument.
+    """
+    # Prefix of the keys of the backend tier, whose values also hold the
+    # time the result took to compute.
+    BACKEND_KEY_PREFIX = 'safe_exec_result.'
+
+    # The number of missed lookups whose time is kept track of.
+    MAX_TRACKED_MISSES = 1000
+
+    def __init__(self, backend=None, max_size=64 * 1024 * 1024, max_entry_size=512 * 1024, timeout=24 * 60 * 60):
+        """
+        Arguments:
+            backend: An object with `.get(key)` and `.set(key, value, timeout)`
+                methods, such as a django cache, or None to only cache results
+                in this process.
+            max_size (int): The total size, in bytes once pickled, of the
+                results kept in this process.
+            max_entry_size (int): The size, in bytes once pickled, of the
+                largest result that is cached.
+            timeout (int): The number of seconds results are cached for, or
+                None to keep them until they are evicted.
+        """
+        self.backend = backend
+        self.max_entry_size = max_entry_size
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        # Mapping of keys to (expiration time, pickled value, seconds to compute).
+        self._entries = LRUCache(max_size, get_size=lambda entry: len(entry[1]))
+        # Mapping of the keys of missed lookups to the time of the miss, so
+        # that the time it took to compute their results is known when they
+        # are set.
+        self._misses = LRUCache(self.MAX_TRACKED_MISSES)
+        self._stats = {'local_hits': 0, 'backend_hits': 0, 'misses': 0, 'time_saved': 0.0}
+
+    def get(self, key):
+        """
+        Returns the cached result for the given key, or None.
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, pickled_value, cost = entry
+            if expires_at is None or expires_at > now:
+                with self._lock:
+                    self._record('local_hits', cost)
+                return pickle.loads(pickled_value)
+            self._entries.delete(key)
+
+        if self.backend is not None:
+            cached = self.backend.get(self.BACKEND_KEY_PREFIX + key)
+            if cached is not None:
+                value, cost = cached
+                self._store_locally(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), cost)
+                with self._lock:
+                    self._record('backend_hits', cost)
+                return value
+
+        self._misses.set(key, now)
+        with self._lock:
+            self._record('misses')
+        return None
+
+    def set(self, key, value):
+        """
+        Caches the result for the given key, unless it is too large.
+        """
+        missed_at = self._misses.get(key)
+        self._misses.delete(key)
+        cost = time.time() - missed_at if missed_at is not None else 0.0
+
+        pickled_value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(pickled_value) > self.max_entry_size:
+            dog_stats_api.increment(METRIC_NAME, tags=[u'result:too_large'])
+            return
+
+        self._store_locally(key, pickled_value, cost)
+        if self.backend is not None:
+            self.backend.set(self.BACKEND_KEY_PREFIX + key, (value, cost), self.timeout)
+
+    def delete(self, key):
+        """
+        Removes the result for the given key from the in-process tier.
+        """
+        self._entries.delete(key)
+
+    def clear(self):
+        """
+        Removes all the results from the in-process tier, and resets the stats.
+        """
+        self._entries.clear()
+        self._misses.clear()
+        with self._lock:
+            self._stats = dict.fromkeys(self._stats, 0)
+            self._stats['time_saved'] = 0.0
+
+    def stats(self):
+        """
+        Returns a dict of the number of hits of each tier, the number of
+        misses, the hit rate, and the seconds of execution saved by the hits,
+        since the cache was created or cleared, and of the number and total
+        size of the results kept in this process.
+        """
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), size=self._entries.size)
+        lookups = stats['local_hits'] + stats['backend_hits'] + stats['misses']
+        stats['hit_rate'] = float(lookups - stats['misses']) / lookups if lookups else 0.0
+        return stats
+
+    def _store_locally(self, key, pickled_value, cost):
+        """
+        Adds a pickled result to the in-process tier, evicting the least
+        recently used ones once their total size exceeds `max_size`.
+        """
+        expires_at = time.time() + self.timeout if self.timeout is not None else None
+        self._entries.set(key, (expires_at, pickled_value, cost))
+
+    def _record(self, result, cost=0.0):
+        """
+        Counts a lookup with the given result, and reports it.  Must be called
+        with the lock held.
+        """
+        self._stats[result] += 1
+        self._stats['time_saved'] += cost
+        dog_stats_api.increment(METRIC_NAME, tags=[u'result:{}'.format(result)])
+        if cost:
+            dog_stats_api.histogram(METRIC_NAME + '.time_saved', cost)
@@ -3,11 +3,12 @@
 from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
-from . import lazymod
+from . import lazymod, worker_pool
 from dogapi import dog_stats_api
 from six import text_type
 
 import hashlib
+from functools import partial
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -84,6 +85,7 @@ def safe_exec(
     cache=None,
     slug=None,
     unsafely=False,
+    course_key=None,
 ):
     """
     Execute python code safely.
@@ -110,6 +112,10 @@ def safe_exec(
 
     If `unsafely` is true, then the code will actually be executed without sandboxing.
 
+    `course_key` is the key of the course the code belongs to.  When the code
+    runs on the worker pool, the workers that run it never run the code of
+    another course.
+
     """
     # Check the cache for a previous result.
     if cache:
@@ -131,9 +137,13 @@ def safe_exec(
     # Create the complete code we'll run.
     code_prolog = CODE_PROLOG % random_seed
 
-    # Decide which code executor to use.
+    # Decide which code executor to use.  The workers of the pool can't run
+    # code that needs files.
+    pool = worker_pool.get_pool()
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif pool and not python_path and not extra_files:
+        exec_fn = partial(pool.safe_exec, course_key=course_key)
     else:
         exec_fn = codejail_safe_exec
 
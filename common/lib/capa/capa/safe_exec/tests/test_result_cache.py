@@ -0,0 +1,107 @@
+"""Test result_cache.py"""
+
+import cPickle as pickle
+import unittest
+
+from mock import patch
+
+from capa.safe_exec import SafeExecResultCache, safe_exec
+
+
+class BackendCache(object):
+    """A cache with the interface of a django cache over a simple dict, for testing."""
+
+    def __init__(self):
+        self.cache = {}
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        self.cache[key] = value
+
+
+class TestSafeExecResultCache(unittest.TestCase):
+    """Test the tiers, limits and stats of SafeExecResultCache."""
+
+    def test_safe_exec(self):
+        cache = SafeExecResultCache(backend=BackendCache())
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertEqual(g['a'], 3)
+
+        # The second execution finds the result of the first one.
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertEqual(g['a'], 3)
+
+        stats = cache.stats()
+        self.assertEqual((stats['local_hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertGreater(stats['time_saved'], 0)
+
+    def test_backend_tier(self):
+        backend = BackendCache()
+        cache = SafeExecResultCache(backend=backend)
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', (None, {'a': 1}))
+
+        # Another process only finds the result in the backend.
+        other_cache = SafeExecResultCache(backend=backend)
+        self.assertEqual(other_cache.get('key'), (None, {'a': 1}))
+        self.assertEqual(other_cache.get('key'), (None, {'a': 1}))
+        self.assertEqual(other_cache.stats()['backend_hits'], 1)
+        self.assertEqual(other_cache.stats()['local_hits'], 1)
+
+    def test_hits_return_copies(self):
+        cache = SafeExecResultCache()
+        cache.set('key', (None, {'a': [1]}))
+        cache.get('key')[1]['a'].append(2)
+        self.assertEqual(cache.get('key'), (None, {'a': [1]}))
+
+    def test_lru_eviction(self):
+        result = (None, {})
+        # Room for two results.
+        cache = SafeExecResultCache(max_size=2 * len(pickle.dumps(result, pickle.HIGHEST_PROTOCOL)))
+        cache.set('a', result)
+        cache.set('b', result)
+        cache.get('a')
+        cache.set('c', result)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+        cache.delete('a')
+        self.assertIsNone(cache.get('a'))
+        cache.clear()
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_max_entry_size(self):
+        backend = BackendCache()
+        cache = SafeExecResultCache(backend=backend, max_entry_size=100)
+        cache.set('small', (None, {'a': 1}))
+        cache.set('large', (None, {'a': 'x' * 100}))
+        self.assertIsNotNone(cache.get('small'))
+        self.assertIsNone(cache.get('large'))
+        self.assertEqual(len(backend.cache), 1)
+
+    def test_max_size(self):
+        cache = SafeExecResultCache(max_size=1000, max_entry_size=1000)
+        for key in range(10):
+            cache.set(str(key), (None, {'a': 'x' * 200}))
+        stats = cache.stats()
+        self.assertLessEqual(stats['size'], 1000)
+        self.assertEqual(stats['entries'], 4)
+        self.assertIsNotNone(cache.get('9'))
+        self.assertIsNone(cache.get('0'))
+
+    @patch('capa.safe_exec.result_cache.time.time')
+    def test_timeout(self, mock_time):
+        mock_time.return_value = 1000
+        cache = SafeExecResultCache(timeout=60)
+        cache.set('key', (None, {}))
+        mock_time.return_value = 1059
+        self.assertIsNotNone(cache.get('key'))
+        mock_time.return_value = 1060
+        self.assertIsNone(cache.get('key'))
@@ -0,0 +1,91 @@
+"""Test worker_pool.py"""
+
+import random
+import sys
+import unittest
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+from mock import patch
+from six import text_type
+
+from capa.safe_exec import safe_exec, worker_pool
+
+
+@patch.dict(jail_code.COMMANDS, {'python': {'cmdline_start': [sys.executable, '-E', '-B'], 'user': None}})
+class TestSandboxWorkerPool(unittest.TestCase):
+    """
+    Test running code on a worker pool.  The workers run the current Python,
+    without a sandbox.
+    """
+    def setUp(self):
+        super(TestSandboxWorkerPool, self).setUp()
+        limits_patcher = patch.dict(jail_code.LIMITS, {'CPU': 0, 'REALTIME': 5, 'VMEM': 0, 'FSIZE': 0})
+        limits_patcher.start()
+        self.addCleanup(limits_patcher.stop)
+        worker_pool.configure(size=1, max_executions=3, preload_modules=['math'])
+        self.addCleanup(worker_pool.configure, size=0)
+
+    def test_configure_without_realtime_limit(self):
+        with patch.dict(jail_code.LIMITS, {'REALTIME': 0}):
+            with self.assertRaisesRegexp(ValueError, 'REALTIME'):
+                worker_pool.configure(size=1)
+            # Running without a pool doesn't need the limit.
+            worker_pool.configure(size=0)
+        self.assertIsNone(worker_pool.get_pool())
+
+    def test_safe_exec(self):
+        for value in range(5):
+            g = {'value': value}
+            safe_exec("import math; a = int(math.pi) * value; b = random.randint(0, 100)", g, random_seed=value)
+            self.assertEqual(g['a'], 3 * value)
+            # Each execution gets its own seeded random module.
+            self.assertEqual(g['b'], random.Random(value).randint(0, 100))
+
+    def test_output_is_ignored(self):
+        g = {}
+        safe_exec("print 'hello'\nimport os; os.write(1, 'world')\na = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_raising_exceptions(self):
+        g = {}
+        with self.assertRaises(SafeExecException) as cm:
+            safe_exec("a = 1\n1/0", g)
+        self.assertIn("ZeroDivisionError", text_type(cm.exception))
+        self.assertNotIn('a', g)
+
+        # The worker is still usable.
+        safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_recycling(self):
+        pool = worker_pool.get_pool()
+        pids = set()
+        for _ in range(4):
+            worker = pool._acquire()  # pylint: disable=protected-access
+            pids.add(worker._process.pid)  # pylint: disable=protected-access
+            worker.execute("a = 1", {})
+            pool._release(worker, discard=worker.executions >= pool.max_executions)  # pylint: disable=protected-access
+        self.assertEqual(len(pids), 2)
+
+    def test_workers_per_course(self):
+        pool = worker_pool.get_pool()
+        pids = []
+        for course_key in ['course-a', 'course-a', 'course-b', 'course-a']:
+            worker = pool._acquire(course_key)  # pylint: disable=protected-access
+            self.assertEqual(worker.course_key, course_key)
+            pids.append(worker._process.pid)  # pylint: disable=protected-access
+            pool._release(worker)  # pylint: disable=protected-access
+        # The pool only has room for one worker, so the worker of the other
+        # course is replaced each time.
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(len(set(pids)), 3)
+        self.assertEqual(pool._num_workers, 1)  # pylint: disable=protected-access
+
+    def test_timeout(self):
+        with patch.dict(jail_code.LIMITS, {'REALTIME': 0.5}):
+            with self.assertRaisesRegexp(SafeExecException, 'timed out'):
+                safe_exec("while True: pass", {})
+        g = {}
+        safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
@@ -0,0 +1,368 @@
+"""
+A pool of long-lived sandboxed Python processes that run the code of
+`safe_exec`.
+
+CodeJail starts a new sandboxed interpreter for each execution, which then
+imports numpy and the other modules the code uses, and that costs far more
+than running the code of most problems.  The workers of the pool are started
+with the same command, user and limits as CodeJail's sandboxes, import the
+configured modules once, and then run executions sent to them over a pipe,
+one at a time.  Workers are replaced after a number of executions, when their
+memory grows past a limit, and when an execution fails to complete in time.
+
+Modules are restored in between executions, but the state of the preloaded
+modules is shared by all the executions of a worker.  Workers therefore only
+run the code of a single course, and a worker of another course is replaced
+when the pool is full.  Problems of the same course can still tamper with each
+other, so the pool should only be enabled where course authors are trusted.
+"""
+import json
+import logging
+import os
+import resource
+import select
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException, json_safe
+
+log = logging.getLogger(__name__)
+
+# The code of the workers.  Requests and responses are single lines of JSON.
+# Responses are written to a copy of stdout, so that they can't get mixed up
+# with the output of the code they run.
+WORKER_CODE = r"""
+import json, os, resource, sys, traceback
+
+os.environ["OPENBLAS_NUM_THREADS"] = "1"    # See TNL-6456
+
+requests = sys.stdin
+responses = os.fdopen(os.dup(1), "w")
+os.dup2(os.open(os.devnull, os.O_WRONLY), 1)
+sys.stdin = open(os.devnull)
+
+for module_name in json.loads(sys.argv[1]):
+    try:
+        __import__(module_name)
+    except Exception:
+        pass
+
+clean_modules = dict(sys.modules)
+clean_path = list(sys.path)
+clean_environ = dict(os.environ)
+
+def is_json_safe(name, value):
+    if not isinstance(name, basestring) or name == "__builtins__":
+        return False
+    try:
+        json.dumps(value)
+    except Exception:
+        return False
+    return True
+
+responses.write("ready\n")
+responses.flush()
+
+while True:
+    request = requests.readline()
+    if not request:
+        break
+    request = json.loads(request)
+    globals_dict = request["globals"]
+    try:
+        exec compile(request["code"], "jailed_code", "exec") in globals_dict
+    except BaseException:
+        emsg = traceback.format_exc()
+    else:
+        emsg = None
+    results = dict(item for item in globals_dict.items() if is_json_safe(*item))
+
+    sys.modules.clear()
+    sys.modules.update(clean_modules)
+    sys.path[:] = clean_path
+    os.environ.clear()
+    os.environ.update(clean_environ)
+
+    responses.write(json.dumps({
+        "globals": results,
+        "emsg": emsg,
+        "maxrss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }) + "\n")
+    responses.flush()
+"""
+
+# Modules imported by the workers when they start.
+DEFAULT_PRELOAD_MODULES = [
+    'numpy', 'scipy', 'sympy', 'lxml.etree',
+    'calc', 'chem.chemcalc', 'chem.chemtools', 'chem.miller', 'eia', 'loncapa', 'verifiers.draganddrop',
+]
+
+# Seconds that workers have to import their modules.
+STARTUP_TIMEOUT = 30
+
+_POOL = None
+
+
+class SandboxWorkerError(Exception):
+    """
+    A worker failed to start, respond in time, or respond correctly.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    One sandboxed Python process that runs executions sent to it, all of
+    which belong to the course with `course_key`.
+    """
+    def __init__(self, preload_modules, max_executions, course_key=None):
+        command = jail_code.COMMANDS['python']
+        cmd = []
+        if command.get('user'):
+            cmd.extend(['sudo', '-u', command['user']])
+        cmd.extend(command['cmdline_start'])
+        cmd.extend(['-c', WORKER_CODE, json.dumps(preload_modules)])
+
+        self.course_key = course_key
+        self.executions = 0
+        self.max_rss = 0
+        self._buffer = ''
+        self._tmpdir = tempfile.mkdtemp(prefix='codejail-worker-')
+        os.chmod(self._tmpdir, 0o755)
+        self._process = subprocess.Popen(
+            cmd,
+            cwd=self._tmpdir,
+            env={},
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            preexec_fn=lambda: _set_worker_limits(max_executions),
+        )
+        try:
+            if self._read_line(STARTUP_TIMEOUT) != 'ready':
+                raise SandboxWorkerError('Worker failed to start')
+        except SandboxWorkerError:
+            self.stop()
+            raise
+
+    def execute(self, code, globals_dict):
+        """
+        Runs `code` with the JSON-safe `globals_dict`.
+
+        Returns a pair of the exception message, if the code raised one, else
+        None, and the resulting JSON-safe globals.
+        """
+        self.executions += 1
+        try:
+            self._process.stdin.write(json.dumps({'code': code, 'globals': globals_dict}) + '\n')
+            self._process.stdin.flush()
+        except (IOError, OSError) as exc:
+            raise SandboxWorkerError(u'Worker is gone: {}'.format(exc))
+
+        try:
+            response = json.loads(self._read_line(jail_code.LIMITS.get('REALTIME') or None))
+        except ValueError:
+            raise SandboxWorkerError('Worker sent an invalid response')
+        self.max_rss = response['maxrss']
+        return response['emsg'], response['globals']
+
+    def stop(self):
+        """
+        Stops the worker.  Workers exit when their stdin is closed, so they
+        are only killed when they may be running code.
+        """
+        try:
+            self._process.stdin.close()
+            if self._process.poll() is None:
+                os.killpg(self._process.pid, signal.SIGKILL)
+        except (IOError, OSError):
+            log.warning(u'Could not kill sandbox worker %s', self._process.pid)
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def _read_line(self, timeout):
+        """
+        Returns the next line the worker writes, without its newline.
+        """
+        deadline = time.time() + timeout if timeout else None
+        fileno = self._process.stdout.fileno()
+        while '\n' not in self._buffer:
+            remaining = deadline - time.time() if deadline else None
+            if remaining is not None and remaining <= 0:
+                raise SandboxWorkerError('Worker timed out')
+            readable, _, _ = select.select([fileno], [], [], remaining)
+            if readable:
+                data = os.read(fileno, 64 * 1024)
+                if not data:
+                    raise SandboxWorkerError('Worker exited')
+                self._buffer += data
+        line, self._buffer = self._buffer.split('\n', 1)
+        return line
+
+
+class SandboxWorkerPool(object):
+    """
+    Runs `safe_exec` executions on a bounded number of sandbox workers,
+    starting them when they are first needed.  A worker only runs the code of
+    the course it was started for.
+    """
+    def __init__(self, size, max_executions=100, max_memory=256 * 1024 * 1024, preload_modules=None):
+        """
+        Arguments:
+            size (int): The maximum number of workers.
+            max_executions (int): The number of executions after which a
+                worker is replaced.
+            max_memory (int): The resident size, in bytes, after which a worker
+                is replaced.
+            preload_modules (list of str): The modules imported by workers when
+                they start; defaults to DEFAULT_PRELOAD_MODULES.
+        """
+        self.size = size
+        self.max_executions = max_executions
+        self.max_memory = max_memory
+        self.preload_modules = DEFAULT_PRELOAD_MODULES if preload_modules is None else preload_modules
+
+        self._condition = threading.Condition()
+        self._idle_workers = deque()
+        self._num_workers = 0
+        self._pid = os.getpid()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None, course_key=None):
+        """
+        Runs `code` as `codejail.safe_exec.safe_exec` would, updating
+        `globals_dict` with its results, or raising a SafeExecException.
+        The code is run by a worker of the course with `course_key`.
+        """
+        assert not python_path and not extra_files, "Workers can't run code that needs files"
+        worker = self._acquire(course_key)
+        try:
+            emsg, results = worker.execute(code, json_safe(globals_dict))
+        except SandboxWorkerError as exc:
+            log.warning(u'Sandbox worker failed running %s: %s', slug, exc)
+            self._release(worker, discard=True)
+            raise SafeExecException(u"Couldn't execute jailed code: {}".format(exc))
+        self._release(
+            worker,
+            discard=worker.executions >= self.max_executions or worker.max_rss > self.max_memory,
+        )
+
+        if emsg:
+            raise SafeExecException(u"Couldn't execute jailed code: {}".format(emsg))
+        globals_dict.update(results)
+
+    def shutdown(self):
+        """
+        Stops all the idle workers.
+        """
+        with self._condition:
+            while self._idle_workers:
+                self._idle_workers.pop().stop()
+                self._num_workers -= 1
+
+    def _acquire(self, course_key=None):
+        """
+        Returns an idle worker of the course with `course_key`.  If there is
+        none, starts one if there are fewer than `size` workers, or else in
+        place of the least recently used idle worker of another course, or
+        waits for a worker to be released.
+        """
+        stale_worker = None
+        with self._condition:
+            if self._pid != os.getpid():
+                # The workers belong to the process this one was forked from.
+                self._idle_workers.clear()
+                self._num_workers = 0
+                self._pid = os.getpid()
+
+            while True:
+                for worker in reversed(self._idle_workers):
+                    if worker.course_key == course_key:
+                        self._idle_workers.remove(worker)
+                        return worker
+                if self._num_workers < self.size:
+                    self._num_workers += 1
+                    break
+                if self._idle_workers:
+                    stale_worker = self._idle_workers.popleft()
+                    break
+                self._condition.wait()
+
+        if stale_worker is not None:
+            stale_worker.stop()
+        try:
+            return SandboxWorker(self.preload_modules, self.max_executions, course_key)
+        except Exception:
+            with self._condition:
+                self._num_workers -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, worker, discard=False):
+        """
+        Returns a worker to the pool, or stops it if it is to be replaced.
+        """
+        if discard:
+            worker.stop()
+        with self._condition:
+            if discard:
+                self._num_workers -= 1
+            else:
+                self._idle_workers.append(worker)
+            self._condition.notify()
+
+
+def configure(size=0, max_executions=100, max_memory=256 * 1024 * 1024, preload_modules=None):
+    """
+    Runs the sandboxed code of `safe_exec` on a pool of `size` workers, or on
+    a new sandbox per execution if `size` is 0.  See SandboxWorkerPool for the
+    other arguments.
+
+    Workers are only limited in CPU time over all their executions, so a pool
+    can only be configured when CodeJail's REALTIME limit is set; otherwise a
+    ValueError is raised.
+    """
+    global _POOL  # pylint: disable=global-statement
+    if size and not jail_code.LIMITS.get('REALTIME'):
+        raise ValueError("CodeJail's REALTIME limit must be set to run sandboxed code on a worker pool")
+    if _POOL is not None:
+        _POOL.shutdown()
+    if size:
+        _POOL = SandboxWorkerPool(size, max_executions, max_memory, preload_modules)
+    else:
+        _POOL = None
+
+
+def get_pool():
+    """
+    Returns the configured SandboxWorkerPool, or None if sandboxed code is
+    to be run without one.
+    """
+    if _POOL is None or not jail_code.is_configured('python'):
+        return None
+    return _POOL
+
+
+def _set_worker_limits(max_executions):  # pragma: no cover
+    """
+    Sets CodeJail's limits in a worker process.  CPU time is limited to
+    CPU * max_executions over all the executions of the worker, so a single
+    execution is only bounded by the REALTIME limit, which the pool applies
+    to each execution.
+    """
+    # Put the worker in a new process group, so that it can be killed with
+    # its children.
+    os.setsid()
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    cpu = jail_code.LIMITS.get('CPU')
+    if cpu:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu * max_executions, cpu * max_executions + 1))
+    vmem = jail_code.LIMITS.get('VMEM')
+    if vmem:
+        resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+    fsize = jail_code.LIMITS.get('FSIZE')
+    if fsize:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
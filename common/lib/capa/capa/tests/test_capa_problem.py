@@ -4,9 +4,12 @@ Test capa problem.
 import ddt
 import textwrap
 from lxml import etree
+import mock
 import unittest
 
+from capa.capa_problem import PARSED_PROBLEM_CACHE_SIZE
 from capa.tests.helpers import new_loncapa_problem
+from openedx.core.lib.cache_utils import LRUCache
 
 
 @ddt.ddt
@@ -454,6 +457,33 @@ class CAPAProblemTest(unittest.TestCase):
         self.assert_question_tag(question1, question2, tag='label', label_attr=False)
         self.assert_question_tag(question1, question2, tag='p', label_attr=True)
 
+    def test_parsed_tree_is_cached(self):
+        """
+        Verify that problems with the same text are only parsed once, and
+        don't share their trees.
+        """
+        xml = textwrap.dedent("""
+            <problem>
+                <optionresponse>
+                    <label>Which color?</label>
+                    <optioninput options="('yellow','blue')" correct="blue" label="first label"/>
+                </optionresponse>
+            </problem>
+        """)
+        with mock.patch('capa.capa_problem._PARSED_PROBLEMS', LRUCache(PARSED_PROBLEM_CACHE_SIZE)):
+            with mock.patch('capa.capa_problem.etree.XML', wraps=etree.XML) as mock_xml:
+                problems = [new_loncapa_problem(xml, seed=seed) for seed in range(3)]
+            self.assertEqual(
+                [call[0][0] for call in mock_xml.call_args_list if call[0][0] == xml],
+                [xml],
+            )
+
+            problems[0].tree.set('data-test', 'changed')
+            problems.append(new_loncapa_problem(xml))
+            for problem in problems[1:]:
+                self.assertIsNone(problem.tree.get('data-test'))
+                self.assertIn('Which color?', problem.get_html())
+
 
 @ddt.ddt
 class CAPAMultiInputProblemTest(unittest.TestCase):
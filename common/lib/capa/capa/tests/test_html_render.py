@@ -9,6 +9,7 @@ import mock
 import os
 # Changes formatting of empty elements; import here to avoid test order dependence
 import xmodule.modulestore.xml  # pylint: disable=unused-import
+from capa.safe_exec import SafeExecResultCache
 from capa.tests.helpers import test_capa_system, new_loncapa_problem
 from lxml import etree
 from openedx.core.djangolib.markup import HTML
@@ -120,6 +121,35 @@ class CapaHtmlRenderTest(unittest.TestCase):
         script_element = rendered_html.find('script')
         self.assertEqual(None, script_element)
 
+    @ddt.data(
+        ('test=True', None, True),
+        ('test=anonymous_student_id', None, True),
+        ('test=True', SafeExecResultCache(), False),
+        ('test=anonymous_student_id', SafeExecResultCache(), True),
+    )
+    @ddt.unpack
+    def test_script_anonymous_student_id(self, script, cache, uses_student_id):
+        # With a SafeExecResultCache, only scripts that use the
+        # anonymous_student_id are run with it, so that the results of the
+        # others can be cached for all students.
+        xml_str = textwrap.dedent("""
+            <problem>
+                <script>{}</script>
+                <span>Welcome $anonymous_student_id</span>
+            </problem>
+        """.format(script))
+
+        script_globals = []
+        with mock.patch('capa.capa_problem.safe_exec') as mock_safe_exec:
+            mock_safe_exec.side_effect = lambda code, globals_dict, **kwargs: script_globals.extend(globals_dict)
+            capa_system = test_capa_system()
+            capa_system.cache = cache
+            problem = new_loncapa_problem(xml_str, capa_system=capa_system)
+
+        self.assertEqual('anonymous_student_id' in script_globals, uses_student_id)
+        span_element = etree.XML(problem.get_html()).find('span')
+        self.assertEqual(span_element.text, 'Welcome student')
+
     def test_render_javascript(self):
         # Generate some XML with a <script> tag
         xml_str = textwrap.dedent("""
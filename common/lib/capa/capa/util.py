@@ -211,3 +211,12 @@ def remove_markup(html):
     u'Rock &amp; Roll'
     """
     return HTML(bleach.clean(html, tags=[], strip=True))
+
+
+def get_course_key(capa_module):
+    """
+    Returns the key of the course of the given capa module, or None if it
+    isn't known.
+    """
+    location = getattr(capa_module, 'location', None)
+    return getattr(location, 'course_key', None)
@@ -1256,6 +1256,14 @@ class ModuleStoreReadBase(BulkOperationsMixin, ModuleStoreRead):
         """
         return True
 
+    def prefetch_definitions(self, course_key, usage_keys, depth=0):
+        """
+        Loads the definitions of the blocks of usage_keys, and of their
+        descendants to depth, ahead of the blocks being loaded.  Does nothing
+        in modulestores which load definitions along with their blocks.
+        """
+        pass
+
     def heartbeat(self):
         """
         Is this modulestore ready?
@@ -291,14 +291,19 @@ def own_metadata(module):
 class InheritingFieldData(KvsFieldData):
     """A `FieldData` implementation that can inherit value from parents to children."""
 
-    def __init__(self, inheritable_names, **kwargs):
+    def __init__(self, inheritable_names, inherited_settings=None, **kwargs):
         """
         `inheritable_names` is a list of names that can be inherited from
         parents.
 
+        `inherited_settings`, if given, is a dict of the json values that the
+        block inherits from its ancestors, computed ahead of time, which is
+        used instead of walking up the content tree.
+
         """
         super(InheritingFieldData, self).__init__(**kwargs)
         self.inheritable_names = set(inheritable_names)
+        self.inherited_settings = inherited_settings
 
     def has_default_value(self, name):
         """
@@ -314,7 +319,10 @@ class InheritingFieldData(KvsFieldData):
         """
         The default for an inheritable name is found on a parent.
         """
-        if name in self.inheritable_names:
+        if name in self.inheritable_names and self.inherited_settings is not None:
+            if name in self.inherited_settings:
+                return self.inherited_settings[name]
+        elif name in self.inheritable_names:
             # Walk up the content tree to find the first ancestor
             # that this field is set on. Use the field from the current
             # block so that if it has a different default than the root
@@ -338,10 +346,11 @@ class InheritingFieldData(KvsFieldData):
         return super(InheritingFieldData, self).default(block, name)
 
 
-def inheriting_field_data(kvs):
+def inheriting_field_data(kvs, inherited_settings=None):
     """Create an InheritanceFieldData that inherits the names in InheritanceMixin."""
     return InheritingFieldData(
         inheritable_names=InheritanceMixin.fields.keys(),
+        inherited_settings=inherited_settings,
         kvs=kvs,
     )
 
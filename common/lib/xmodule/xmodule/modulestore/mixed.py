@@ -594,6 +594,14 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         store = self._get_modulestore_for_courselike(location.course_key)
         return store.get_parent_location(location, **kwargs)
 
+    def prefetch_definitions(self, course_key, usage_keys, depth=0):
+        """
+        Loads the definitions of the blocks of usage_keys, and of their
+        descendants to depth, ahead of the blocks being loaded.
+        """
+        store = self._get_modulestore_for_courselike(course_key)
+        return store.prefetch_definitions(course_key, usage_keys, depth)
+
     def get_block_original_usage(self, usage_key):
         """
         If a block was inherited into another structure using copy_from_template,
@@ -0,0 +1,110 @@
+"""
+Performance test comparing the serialization of split course structures for
+the course structure cache with pickling them.
+"""
+import cPickle as pickle
+import unittest
+import zlib
+
+import ddt
+from nose.plugins.skip import SkipTest
+from path import Path as path
+
+from xmodule.modulestore.split_mongo.structure_serialization import (
+    compress, decompress, dump_structure, load_structure
+)
+from xmodule.modulestore.tests.utils import SPLIT_MODULESTORE_SETUP, TEST_DATA_DIR
+from xmodule.modulestore.xml_importer import import_course_from_xml
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+# The number of times each serialization is timed.
+REPETITIONS = 20
+
+# The test courses whose structures are serialized.
+TEST_COURSES = ('toy', 'manual-testing-complete', 'split_test_module', 'graded')
+
+# pylint: disable=invalid-name
+TEST_DIR = path(__file__).dirname()
+PLATFORM_ROOT = TEST_DIR.parent.parent.parent.parent.parent.parent
+TEST_DATA_ROOT = PLATFORM_ROOT / TEST_DATA_DIR
+
+
+def pickle_structure(structure):
+    """
+    Serializes a structure the way the course structure cache used to.
+    """
+    return zlib.compress(pickle.dumps(structure, pickle.HIGHEST_PROTOCOL), 1)
+
+
+def unpickle_structure(data):
+    """
+    Deserializes a structure the way the course structure cache used to.
+    """
+    return pickle.loads(zlib.decompress(data))
+
+
+def time_function(desc, function, argument):
+    """
+    Times REPETITIONS calls of `function(argument)` with a CodeBlockTimer
+    named desc, and returns what the last call returns.
+    """
+    result = None
+    with CodeBlockTimer(desc):
+        for __ in xrange(REPETITIONS):
+            result = function(argument)
+    return result
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class StructureSerializationTimings(unittest.TestCase):
+    """
+    Times the serialization of the structures of the test courses.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*TEST_COURSES)
+    def test_structure_serialization_timings(self, course_name):
+        """
+        Time the serialization of the structure of course_name, pickled and
+        with dump_structure.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        with SPLIT_MODULESTORE_SETUP.build() as (content_store, store):
+            course_key = store.make_course_key('a', course_name, 'run')
+            import_course_from_xml(
+                store,
+                'test_user',
+                TEST_DATA_ROOT,
+                source_dirs=[course_name],
+                static_content_store=content_store,
+                target_id=course_key,
+                create_if_not_present=True,
+                raise_on_failure=True,
+            )
+            split_store = store._get_modulestore_for_courselike(course_key)  # pylint: disable=protected-access
+            structure = split_store._lookup_course(course_key).structure  # pylint: disable=protected-access
+
+        desc = "StructureSerialization:{}:{}".format(course_name, len(structure['blocks']))
+        with CodeBlockTimer(desc):
+            pickled = time_function("pickle_set", pickle_structure, structure)
+            unpickled = time_function("pickle_get", unpickle_structure, pickled)
+            dumped = time_function(
+                "dump_structure_set", lambda structure: compress(dump_structure(structure)), structure
+            )
+            loaded = time_function("dump_structure_get", lambda data: load_structure(decompress(data)), dumped)
+
+        self.assertEqual(loaded, unpickled)
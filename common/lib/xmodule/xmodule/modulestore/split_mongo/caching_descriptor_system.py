@@ -214,8 +214,20 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         converted_fields = convert_fields(block_data.fields)
         converted_defaults = convert_fields(block_data.defaults)
-        if block_key in self._parent_map:
-            parent_key = self._parent_map[block_key]
+
+        # The structure index of saved structures knows the parents of blocks,
+        # and the settings they inherit, so that neither has to be worked out
+        # for each descriptor.
+        structure_index = self.modulestore._get_structure_index(  # pylint: disable=protected-access
+            self.course_entry.course_key, self.course_entry.structure
+        )
+        if structure_index is not None:
+            parent_key = structure_index.parent_key(block_key)
+            inherited_settings = structure_index.inherited_settings(block_key)
+        else:
+            parent_key = self._parent_map.get(block_key)
+            inherited_settings = None
+        if parent_key is not None:
             parent = course_key.make_usage_key(parent_key.type, parent_key.id)
         else:
             parent = None
@@ -243,7 +255,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
             )
 
             if InheritanceMixin in self.modulestore.xblock_mixins:
-                field_data = inheriting_field_data(kvs)
+                field_data = inheriting_field_data(kvs, inherited_settings)
             else:
                 field_data = KvsFieldData(kvs)
 
@@ -4,7 +4,6 @@ Segregation of pymongo functions from the data modeling mechanisms for split mod
 import datetime
 import cPickle as pickle
 import math
-import zlib
 import pymongo
 import pytz
 import re
@@ -15,6 +14,7 @@ from time import time
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -25,15 +25,21 @@ import logging
 
 from contracts import check, new_contract
 from mongodb_proxy import autoretry_read
+from openedx.core.lib.cache_utils import LRUCache
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_serialization import (
+    STRUCTURE_FORMAT_VERSION, compress, decompress, dump_structure, load_structure
+)
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 
 
 new_contract('BlockData', BlockData)
 log = logging.getLogger(__name__)
 
+_LOCAL_STRUCTURE_CACHE = None
+
 
 def get_cache(alias):
     """
@@ -44,6 +50,26 @@ def get_cache(alias):
     return caches[alias]
 
 
+def get_local_structure_cache():
+    """
+    Return the local structure cache of this process, or None if the
+    COURSE_STRUCTURE_LOCAL_CACHE_SIZE setting doesn't enable one.
+
+    The cache is an LRUCache of pickled course structures (and definitions),
+    bounded by the total size of the pickles.  Structures are immutable, so
+    they never need to be invalidated, but the structure objects that callers
+    get are modified while loading blocks, so the cache keeps them as pickles
+    from dump_structure and each get loads a new copy.
+    """
+    global _LOCAL_STRUCTURE_CACHE  # pylint: disable=global-statement
+    max_size = getattr(settings, 'COURSE_STRUCTURE_LOCAL_CACHE_SIZE', 0) if DJANGO_AVAILABLE else 0
+    if not max_size:
+        return None
+    if _LOCAL_STRUCTURE_CACHE is None or _LOCAL_STRUCTURE_CACHE.max_size != max_size:
+        _LOCAL_STRUCTURE_CACHE = LRUCache(max_size, get_size=len)
+    return _LOCAL_STRUCTURE_CACHE
+
+
 def round_power_2(value):
     """
     Return value rounded up to the nearest power of 2.
@@ -228,55 +254,159 @@ def structure_to_mongo(structure, course_context=None):
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
-    The course structures are pickled and compressed when cached.
+    The course structures are serialized with dump_structure and compressed
+    when cached.
 
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
+
+    If the COURSE_STRUCTURE_LOCAL_CACHE_SIZE setting is set, the serialized
+    structures are also kept in a local cache of that size, which is checked
+    first.
     """
     def __init__(self):
         self.cache = None
+        self.local_cache = None
         if DJANGO_AVAILABLE:
             try:
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+            else:
+                self.local_cache = get_local_structure_cache()
+
+    @staticmethod
+    def _cache_key(key):
+        """The django cache key of the structure with the id key."""
+        return u'{}.v{}'.format(key, STRUCTURE_FORMAT_VERSION)
 
     def get(self, key, course_context=None):
-        """Pull the compressed, pickled struct data from cache and deserialize."""
+        """Pull the compressed, serialized struct data from cache and deserialize."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
-            compressed_pickled_data = self.cache.get(key)
-            tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
-
-            if compressed_pickled_data is None:
-                # Always log cache misses, because they are unexpected
-                tagger.sample_rate = 1
-                return None
-
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+            pickled_data = None
+            if self.local_cache is not None:
+                pickled_data = self.local_cache.get(key)
+                tagger.tag(from_local_cache=str(pickled_data is not None).lower())
+                tagger.measure('local_cache_size', self.local_cache.size)
+
+            if pickled_data is None:
+                compressed_pickled_data = self.cache.get(self._cache_key(key))
+                if compressed_pickled_data is not None:
+                    tagger.measure('compressed_size', len(compressed_pickled_data))
+                    pickled_data = decompress(compressed_pickled_data)
+                tagger.tag(from_cache=str(pickled_data is not None).lower())
+
+                if pickled_data is None:
+                    # Always log cache misses, because they are unexpected
+                    tagger.sample_rate = 1
+                    return None
+
+                if self.local_cache is not None:
+                    self.local_cache.set(key, pickled_data)
 
-            pickled_data = zlib.decompress(compressed_pickled_data)
             tagger.measure('uncompressed_size', len(pickled_data))
 
-            return pickle.loads(pickled_data)
+            return load_structure(pickled_data)
 
     def set(self, key, structure, course_context=None):
-        """Given a structure, will pickle, compress, and write to cache."""
+        """Given a structure, will serialize, compress, and write to cache."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
-            pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+            pickled_data = dump_structure(structure)
             tagger.measure('uncompressed_size', len(pickled_data))
 
-            # 1 = Fastest (slightly larger results)
-            compressed_pickled_data = zlib.compress(pickled_data, 1)
+            compressed_pickled_data = compress(pickled_data)
             tagger.measure('compressed_size', len(compressed_pickled_data))
 
             # Stuctures are immutable, so we set a timeout of "never"
-            self.cache.set(key, compressed_pickled_data, None)
+            self.cache.set(self._cache_key(key), compressed_pickled_data, None)
+            if self.local_cache is not None:
+                self.local_cache.set(key, pickled_data)
+
+
+class CourseDefinitionCache(object):
+    """
+    Wrapper around the django cache of course structures to also cache the
+    definitions of blocks, which are immutable like structures.  Definitions
+    are pickled and compressed when cached, and are also kept in the local
+    structure cache, if there's one.
+
+    If the 'course_structure_cache' doesn't exist, then don't do anything for
+    for set and get.
+    """
+    def __init__(self):
+        self.cache = None
+        self.local_cache = None
+        if DJANGO_AVAILABLE:
+            try:
+                self.cache = get_cache('course_structure_cache')
+            except InvalidCacheBackendError:
+                pass
+            else:
+                self.local_cache = get_local_structure_cache()
+
+    @staticmethod
+    def _cache_key(definition_id):
+        """The django cache key of the definition with the id definition_id."""
+        return u'definition.{}'.format(definition_id)
+
+    def get_many(self, definition_ids, course_context=None):
+        """Return a dict of the cached definitions of definition_ids, by id."""
+        if self.cache is None or not definition_ids:
+            return {}
+
+        with TIMER.timer("CourseDefinitionCache.get_many", course_context) as tagger:
+            tagger.measure('definitions', len(definition_ids))
+            pickled_definitions = {}
+            if self.local_cache is not None:
+                for definition_id in definition_ids:
+                    pickled_data = self.local_cache.get(self._cache_key(definition_id))
+                    if pickled_data is not None:
+                        pickled_definitions[definition_id] = pickled_data
+                tagger.measure('from_local_cache', len(pickled_definitions))
+
+            missing_keys = {
+                self._cache_key(definition_id): definition_id
+                for definition_id in definition_ids
+                if definition_id not in pickled_definitions
+            }
+            if missing_keys:
+                for key, compressed_data in self.cache.get_many(missing_keys.keys()).iteritems():
+                    pickled_data = decompress(compressed_data)
+                    if pickled_data is None:
+                        continue
+                    pickled_definitions[missing_keys[key]] = pickled_data
+                    if self.local_cache is not None:
+                        self.local_cache.set(key, pickled_data)
+
+            tagger.measure('from_cache', len(pickled_definitions))
+            return {
+                definition_id: pickle.loads(pickled_data)
+                for definition_id, pickled_data in pickled_definitions.iteritems()
+            }
+
+    def set_many(self, definitions, course_context=None):
+        """Pickle, compress, and write the definitions to the cache."""
+        if self.cache is None or not definitions:
+            return
+
+        with TIMER.timer("CourseDefinitionCache.set_many", course_context) as tagger:
+            tagger.measure('definitions', len(definitions))
+            compressed_definitions = {}
+            for definition in definitions:
+                key = self._cache_key(definition['_id'])
+                pickled_data = pickle.dumps(definition, pickle.HIGHEST_PROTOCOL)
+                compressed_definitions[key] = compress(pickled_data)
+                if self.local_cache is not None:
+                    self.local_cache.set(key, pickled_data)
+
+            # Definitions are immutable, so we set a timeout of "never"
+            self.cache.set_many(compressed_definitions, None)
 
 
 class MongoConnection(object):
@@ -555,7 +685,13 @@ class MongoConnection(object):
         Get the definition from the persistence mechanism whose id is the given key
         """
         with TIMER.timer("get_definition", course_context) as tagger:
-            definition = self.definitions.find_one({'_id': key})
+            cache = CourseDefinitionCache()
+            definition = cache.get_many([key], course_context).get(key)
+            tagger.tag(from_cache=str(definition is not None).lower())
+            if definition is None:
+                definition = self.definitions.find_one({'_id': key})
+                if definition is not None:
+                    cache.set_many([definition], course_context)
             tagger.measure("fields", len(definition['fields']))
             tagger.tag(block_type=definition['block_type'])
             return definition
@@ -563,11 +699,24 @@ class MongoConnection(object):
     def get_definitions(self, definitions, course_context=None):
         """
         Retrieve all definitions listed in `definitions`.
+
+        The definitions that aren't cached are retrieved with a single query.
         """
         with TIMER.timer("get_definitions", course_context) as tagger:
             tagger.measure('definitions', len(definitions))
-            definitions = self.definitions.find({'_id': {'$in': definitions}})
-            return definitions
+            cache = CourseDefinitionCache()
+            cached_definitions = cache.get_many(definitions, course_context)
+            tagger.measure('cached_definitions', len(cached_definitions))
+
+            found_definitions = cached_definitions.values()
+            missing_ids = [
+                definition_id for definition_id in definitions if definition_id not in cached_definitions
+            ]
+            if missing_ids:
+                definitions_from_db = list(self.definitions.find({'_id': {'$in': missing_ids}}))
+                cache.set_many(definitions_from_db, course_context)
+                found_definitions.extend(definitions_from_db)
+            return found_definitions
 
     def insert_definition(self, definition, course_context=None):
         """
@@ -88,6 +88,7 @@ from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -444,6 +445,29 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
             definitions.extend(defs_from_db)
         return definitions
 
+    def prefetch_definitions(self, course_key, usage_keys, depth=0):
+        """
+        Loads the definitions of the blocks of usage_keys, and of their
+        descendants to depth, with a single query for the definitions that
+        aren't cached, so that the blocks don't load their definitions one
+        at a time when they are loaded lazily.  The definitions are kept in
+        the bulk operation record of course_key, if one is active, and in
+        the definition cache.
+
+        Arguments:
+            course_key (:class:`.CourseKey`): The course of the blocks
+            usage_keys (list): The usage keys of the blocks
+            depth (int): How deep below the blocks to load definitions
+                (None to load all of them)
+        """
+        blocks = self._lookup_course(course_key).structure['blocks']
+        descendants = {}
+        for usage_key in usage_keys:
+            descendants = self.descendants(blocks, BlockKey.from_usage_key(usage_key), depth, descendants)
+        definition_ids = set(block.definition for block in descendants.itervalues())
+        if definition_ids:
+            self.get_definitions(course_key, list(definition_ids))
+
     def update_definition(self, course_key, definition):
         """
         Update a definition, respecting the current bulk operation status
@@ -862,8 +886,29 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 del self.request_cache.data.setdefault('course_cache', {})[course_version_guid]
             except KeyError:
                 pass
+            self.request_cache.data.setdefault('structure_indexes', {}).pop(course_version_guid, None)
         else:
             self.request_cache.data['course_cache'] = {}
+            self.request_cache.data['structure_indexes'] = {}
+
+    def _get_structure_index(self, course_key, structure):
+        """
+        Returns the StructureIndex of `structure`, building it if this request
+        hasn't yet, or None if there's no request cache or the structure is being
+        edited in an active bulk operation.
+        """
+        if self.request_cache is None:
+            return None
+
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active and structure['_id'] not in bulk_write_record.structures_in_db:
+            return None
+
+        structure_indexes = self.request_cache.data.setdefault('structure_indexes', {})
+        structure_index = structure_indexes.get(structure['_id'])
+        if structure_index is None:
+            structure_index = structure_indexes[structure['_id']] = StructureIndex(structure)
+        return structure_index
 
     def _lookup_course(self, course_key, head_validation=True):
         """
@@ -1304,15 +1349,27 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
 
+        blocks = course.structure['blocks']
+        structure_index = self._get_structure_index(course_locator, course.structure)
+        block_ids = None
+        if structure_index is not None:
+            block_ids = structure_index.candidate_keys(qualifiers, settings)
+        if block_ids is None:
+            block_ids = blocks.iterkeys()
+
         # No need of these caches unless include_orphans is set to False
         path_cache = None
         parents_cache = None
 
         if not include_orphans:
             path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
+            if structure_index is not None:
+                parents_cache = structure_index.parents
+            else:
+                parents_cache = self.build_block_key_to_parents_mapping(course.structure)
 
-        for block_id, value in course.structure['blocks'].iteritems():
+        for block_id in block_ids:
+            value = blocks[block_id]
             if _block_matches_all(value):
                 if not include_orphans:
                     if (  # pylint: disable=bad-continuation
@@ -1364,7 +1421,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if parents_cache is None:
             xblock_parents = self._get_parents_from_structure(block_key, course.structure)
         else:
-            xblock_parents = parents_cache[block_key]
+            xblock_parents = parents_cache.get(block_key, [])
 
         if len(xblock_parents) == 0 and block_key.type in ["course", "library"]:
             # Found, xblock has the path to the root
@@ -287,6 +287,14 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         course_locator = self._map_revision_to_branch(course_locator, revision=revision)
         return super(DraftVersioningModuleStore, self).get_items(course_locator, **kwargs)
 
+    def prefetch_definitions(self, course_key, usage_keys, depth=0, revision=None):
+        """
+        Loads the definitions of the blocks of usage_keys, and of their
+        descendants to depth, on the branch identified by revision.
+        """
+        course_key = self._map_revision_to_branch(course_key, revision=revision)
+        return super(DraftVersioningModuleStore, self).prefetch_definitions(course_key, usage_keys, depth=depth)
+
     def get_parent_location(self, location, revision=None, **kwargs):
         '''
         Returns the given location's parent location in this course.
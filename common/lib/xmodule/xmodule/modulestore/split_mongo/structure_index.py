@@ -0,0 +1,159 @@
+"""
+Indexes over the blocks of a split course structure, for answering get_items
+queries without scanning and matching every block of the structure, and for
+looking up the settings blocks inherit without walking up their ancestors.
+"""
+import re
+from collections import defaultdict
+
+from xmodule.modulestore.inheritance import InheritanceMixin
+
+
+class StructureIndex(object):
+    """
+    Indexes of the blocks of a structure by block type, by the values of their
+    settings fields, and by their children, and the settings they inherit.
+
+    Structures are immutable once saved, so an index stays valid for as long
+    as the structure version it was built from.  The indexes only narrow down
+    the blocks that may match a query: the candidates they return still have
+    to be matched against it.
+    """
+    def __init__(self, structure):
+        self._blocks = structure['blocks']
+        keys_by_type = defaultdict(list)
+        parents = defaultdict(list)
+        for block_key, block in self._blocks.iteritems():
+            keys_by_type[block_key.type].append(block_key)
+            for child_key in block.fields.get('children', []):
+                parents[child_key].append(block_key)
+        self.keys_by_type = dict(keys_by_type)
+        self.parents = dict(parents)
+        # The field value indexes are built when a field is first queried.
+        self._keys_by_field_value = {}
+        # The inherited settings are computed when they're first looked up.
+        self._inherited_settings = None
+
+    def parent_key(self, block_key):
+        """
+        Returns the key of the parent of the block of `block_key`, or None.  If
+        the block has several parents, it's the one the runtime uses too.
+        """
+        parent_keys = self.parents.get(block_key)
+        return parent_keys[-1] if parent_keys else None
+
+    def inherited_settings(self, block_key):
+        """
+        Returns a dict of the json values of the inheritable settings that the
+        block of `block_key` gets from its nearest ancestors which set them, or
+        None if the block isn't in the structure.  The dict must not be
+        modified.
+
+        Like InheritingFieldData, the children of library_content blocks don't
+        inherit the settings they have template defaults for.
+        """
+        if block_key not in self._blocks:
+            return None
+        if self._inherited_settings is None:
+            self._inherited_settings = self._compute_inherited_settings()
+
+        inherited_settings = self._inherited_settings[block_key]
+        parent_key = self.parent_key(block_key)
+        if parent_key is not None and parent_key.type == 'library_content':
+            defaults = self._blocks[block_key].defaults
+            if defaults:
+                inherited_settings = {
+                    name: value for name, value in inherited_settings.iteritems() if name not in defaults
+                }
+        return inherited_settings
+
+    def keys_with_field_value(self, field_name, value):
+        """
+        Returns the keys of the blocks whose `field_name` settings field is
+        `value` or, for list fields, contains `value`.
+        """
+        keys_by_value = self._keys_by_field_value.get(field_name)
+        if keys_by_value is None:
+            keys_by_value = self._keys_by_field_value[field_name] = self._index_field(field_name)
+        return keys_by_value.get(value, [])
+
+    def candidate_keys(self, qualifiers, settings):
+        """
+        Returns the keys of the blocks which may match the get_items `qualifiers`
+        and `settings`, in structure order, or None if the indexes can't narrow
+        them down.
+        """
+        candidates = []
+        block_type = qualifiers.get('block_type')
+        if isinstance(block_type, basestring):
+            candidates.append(self.keys_by_type.get(block_type, []))
+        for field_name, value in settings.iteritems():
+            if _is_plain_value(value):
+                candidates.append(self.keys_with_field_value(field_name, value))
+
+        if not candidates:
+            return None
+        return min(candidates, key=len)
+
+    def _compute_inherited_settings(self):
+        """
+        Returns a dict from the keys of all the blocks to the settings they
+        inherit.  Blocks share the dict of their parent when it doesn't set any
+        inheritable settings itself.
+        """
+        inheritable_names = InheritanceMixin.fields.keys()
+        inherited_settings = {}
+        for block_key in self._blocks:
+            # Find the nearest ancestor whose settings are known, then work
+            # back down to the block.
+            lineage = []
+            ancestor_key = block_key
+            while ancestor_key not in inherited_settings:
+                parent_key = self.parent_key(ancestor_key)
+                if parent_key is None or parent_key in lineage:
+                    inherited_settings[ancestor_key] = {}
+                    break
+                lineage.append(ancestor_key)
+                ancestor_key = parent_key
+
+            for child_key in reversed(lineage):
+                parent_key = self.parent_key(child_key)
+                parent_fields = self._blocks[parent_key].fields
+                settings = inherited_settings[parent_key]
+                set_names = [name for name in inheritable_names if name in parent_fields]
+                if set_names:
+                    settings = dict(settings)
+                    settings.update((name, parent_fields[name]) for name in set_names)
+                inherited_settings[child_key] = settings
+        return inherited_settings
+
+    def _index_field(self, field_name):
+        """
+        Returns a dict from the hashable values of the `field_name` field to
+        the keys of the blocks with those values.
+        """
+        keys_by_value = defaultdict(list)
+        for block_key, block in self._blocks.iteritems():
+            if field_name not in block.fields:
+                continue
+            value = block.fields[field_name]
+            for element in (value if isinstance(value, list) else [value]):
+                if not _is_plain_value(element):
+                    continue
+                keys = keys_by_value[element]
+                if not keys or keys[-1] != block_key:
+                    keys.append(block_key)
+        return dict(keys_by_value)
+
+
+def _is_plain_value(value):
+    """
+    Is `value` matched by equality in get_items queries, and hashable?
+    """
+    if callable(value) or isinstance(value, (dict, list, re._pattern_type)):  # pylint: disable=protected-access
+        return False
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
@@ -0,0 +1,179 @@
+"""
+A compact serialization of split course structures, for the course structure
+caches.
+
+Pickling a structure pickles one BlockKey per block and child reference, and
+one BlockData and EditInfo object per block, along with the names of all
+their attributes.  Instead, structures are reduced to tuples of block records
+before they're pickled, with the strings, ids and dates that blocks share
+interned so that they are pickled, and unpickled, once.
+
+The cyclic garbage collector is paused while structures are loaded: loading
+allocates tens of thousands of objects, none of them garbage, and would
+otherwise set off collections over the whole heap many times.
+"""
+import cPickle as pickle
+import gc
+import zlib
+from contextlib import contextmanager
+
+from xmodule.modulestore import BlockData, EditInfo
+from xmodule.modulestore.split_mongo import BlockKey
+
+try:
+    import lz4.block as lz4_block
+except ImportError:
+    lz4_block = None
+
+# The version of the serialization format, which is part of the cache keys of
+# serialized structures so that formats don't get mixed up during deploys.
+STRUCTURE_FORMAT_VERSION = 2
+
+# The prefixes that identify how serialized structures are compressed.
+ZLIB_PREFIX = 'z'
+LZ4_PREFIX = 'l'
+
+EDIT_INFO_ATTRIBUTES = (
+    'previous_version', 'update_version', 'source_version', 'edited_on', 'edited_by',
+    'original_usage', 'original_usage_version',
+)
+
+
+def dump_structure(structure):
+    """
+    Returns the pickle of the packed form of `structure`.
+    """
+    interned = {}
+
+    def intern_value(value):
+        """
+        Returns the value equal to `value` that was first seen while packing.
+        """
+        return interned.setdefault(value, value)
+
+    packed_blocks = []
+    for block_key, block in structure['blocks'].iteritems():
+        fields = block.fields
+        if 'children' in fields:
+            fields = dict(fields)
+            fields['children'] = [
+                (intern_value(child.type), intern_value(child.id)) for child in fields['children']
+            ]
+        edit_info = block.edit_info
+        packed_blocks.append((
+            intern_value(block_key.type),
+            intern_value(block_key.id),
+            intern_value(block.block_type),
+            block.definition,
+            fields,
+            block.defaults,
+            block.get_asides(),
+            tuple(_intern_if_hashable(intern_value, getattr(edit_info, name)) for name in EDIT_INFO_ATTRIBUTES),
+        ))
+
+    header = dict(structure)
+    del header['blocks']
+    header['root'] = tuple(structure['root'])
+    return pickle.dumps((STRUCTURE_FORMAT_VERSION, header, packed_blocks), pickle.HIGHEST_PROTOCOL)
+
+
+def load_structure(pickled_data):
+    """
+    Returns the structure whose packed form is pickled in `pickled_data`.
+    """
+    with _gc_paused():
+        return _load_structure(pickled_data)
+
+
+def _load_structure(pickled_data):
+    """
+    Implements load_structure.
+    """
+    version, structure, packed_blocks = pickle.loads(pickled_data)
+    if version != STRUCTURE_FORMAT_VERSION:
+        raise ValueError(u'Unknown structure format {}'.format(version))
+
+    # Blocks and child references to them share their BlockKey.  BlockKey._make
+    # skips the argument contracts of BlockKey(), since the keys come from a
+    # valid structure.
+    block_keys = {}
+
+    def make_block_key(key_tuple):
+        """Return the BlockKey of the (type, id) `key_tuple`."""
+        block_key = block_keys.get(key_tuple)
+        if block_key is None:
+            block_key = block_keys[key_tuple] = BlockKey._make(key_tuple)  # pylint: disable=protected-access
+        return block_key
+
+    # The BlockData and EditInfo objects are made without calling their
+    # constructors, which convert their keyword arguments one at a time.
+    blocks = {}
+    for block_type, block_id, data_block_type, definition, fields, defaults, asides, edit_info in packed_blocks:
+        if 'children' in fields:
+            fields['children'] = [make_block_key(child) for child in fields['children']]
+
+        edit_info_object = EditInfo.__new__(EditInfo)
+        edit_info_object.__dict__ = dict(zip(EDIT_INFO_ATTRIBUTES, edit_info))
+        edit_info_object.__dict__.update(_subtree_edited_on=None, _subtree_edited_by=None)
+
+        block_data = BlockData.__new__(BlockData)
+        block_data.__dict__ = {
+            'definition_loaded': False,
+            'fields': fields,
+            'block_type': data_block_type,
+            'definition': definition,
+            'defaults': defaults,
+            'asides': asides,
+            'edit_info': edit_info_object,
+        }
+        blocks[make_block_key((block_type, block_id))] = block_data
+    structure['blocks'] = blocks
+    structure['root'] = make_block_key(structure['root'])
+    return structure
+
+
+def compress(data):
+    """
+    Compresses `data` with LZ4 if it's installed, or else with zlib.
+    """
+    if lz4_block is not None:
+        return LZ4_PREFIX + lz4_block.compress(data)
+    # 1 = Fastest (slightly larger results)
+    return ZLIB_PREFIX + zlib.compress(data, 1)
+
+
+def decompress(compressed_data):
+    """
+    Decompresses data compressed by `compress`, or returns None if it was
+    compressed with LZ4 and LZ4 isn't installed.
+    """
+    prefix, data = compressed_data[:1], compressed_data[1:]
+    if prefix == LZ4_PREFIX:
+        if lz4_block is None:
+            return None
+        return lz4_block.decompress(data)
+    return zlib.decompress(data)
+
+
+def _intern_if_hashable(intern_value, value):
+    """
+    Returns the interned `value`, or `value` itself if it can't be interned.
+    """
+    try:
+        return intern_value(value)
+    except TypeError:
+        return value
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pauses the cyclic garbage collector, if it's enabled, in the context.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
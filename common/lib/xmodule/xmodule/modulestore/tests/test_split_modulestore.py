@@ -14,11 +14,12 @@ import ddt
 from contracts import contract
 from nose.plugins.attrib import attr
 from django.core.cache import caches, InvalidCacheBackendError
+from django.test.utils import override_settings
 
 from openedx.core.lib import tempdir
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
 from xmodule.course_module import CourseDescriptor
-from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore import BlockData, ModuleStoreEnum
 from xmodule.modulestore.exceptions import (
     ItemNotFoundError, VersionConflictError,
     DuplicateItemError, DuplicateCourseError,
@@ -32,9 +33,13 @@ from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import get_local_structure_cache
+from xmodule.modulestore.split_mongo.structure_serialization import (
+    compress, decompress, dump_structure, load_structure
+)
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
-from xmodule.modulestore.tests.utils import mock_tab_from_json
+from xmodule.modulestore.tests.utils import MemoryCache, mock_tab_from_json
 from xmodule.modulestore.edit_info import EditInfoMixin
 
 
@@ -987,6 +992,68 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_local_structure_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+
+        with override_settings(COURSE_STRUCTURE_LOCAL_CACHE_SIZE=10 * 1024 * 1024):
+            with check_mongo_calls(1):
+                not_cached_structure = self._get_structure(self.new_course)
+
+            # the structure is still found when it's gone from the django cache
+            self.cache.clear()
+            with check_mongo_calls(0):
+                cached_structure = self._get_structure(self.new_course)
+            self.assertEqual(cached_structure, not_cached_structure)
+
+            # each call gets its own copy of the structure
+            self.assertIsNot(cached_structure, self._get_structure(self.new_course))
+
+    @override_settings(COURSE_STRUCTURE_LOCAL_CACHE_SIZE=10)
+    def test_local_structure_cache_eviction(self):
+        local_cache = get_local_structure_cache()
+        local_cache.clear()
+        local_cache.set('a', 'x' * 4)
+        local_cache.set('b', 'x' * 4)
+        local_cache.get('a')
+        local_cache.set('c', 'x' * 4)
+        self.assertIsNone(local_cache.get('b'))
+        self.assertEqual(local_cache.get('a'), 'x' * 4)
+        self.assertEqual((len(local_cache), local_cache.size), (2, 8))
+
+        local_cache.set('d', 'x' * 11)
+        self.assertIsNone(local_cache.get('d'))
+
+    def test_structure_serialization(self):
+        structure = self._get_structure(self.new_course)
+        loaded_structure = load_structure(dump_structure(structure))
+        self.assertEqual(loaded_structure, structure)
+        self.assertIsInstance(loaded_structure['root'], BlockKey)
+
+        for block_key, block_data in loaded_structure['blocks'].iteritems():
+            self.assertIsInstance(block_key, BlockKey)
+            # the loaded blocks have the attributes of blocks made by BlockData()
+            constructed_block_data = BlockData(**block_data.to_storable())
+            self.assertItemsEqual(vars(block_data), vars(constructed_block_data))
+            self.assertItemsEqual(vars(block_data.edit_info), vars(constructed_block_data.edit_info))
+
+        self.assertEqual(decompress(compress('data')), 'data')
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_definition_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        definition_id = self.new_course.definition_locator.definition_id
+
+        with check_mongo_calls(1):
+            not_cached_definition = modulestore().db_connection.get_definition(definition_id)
+
+        # cached definitions are found by get_definition and get_definitions
+        with check_mongo_calls(0):
+            cached_definition = modulestore().db_connection.get_definition(definition_id)
+            cached_definitions = modulestore().db_connection.get_definitions([definition_id])
+        self.assertEqual(cached_definition, not_cached_definition)
+        self.assertEqual(cached_definitions, [not_cached_definition])
+
     def test_dummy_cache(self):
         with check_mongo_calls(1):
             not_cached_structure = self._get_structure(self.new_course)
@@ -1221,6 +1288,50 @@ class SplitModuleItemTests(SplitModuleTest):
         matches = modulestore().get_items(locator, settings={'group_access': {'$exists': False}})
         self.assertEqual(len(matches), 7)
 
+    def test_get_items_with_structure_index(self):
+        """
+        get_items finds the same items when it looks up blocks in the structure index
+        """
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        queries = [
+            {},
+            {'qualifiers': {'category': 'chapter'}},
+            {'qualifiers': {'category': 'chapter'}, 'settings': {'display_name': re.compile(r'Hera')}},
+            {'settings': {'display_name': 'Hercules'}},
+            {'settings': {'display_name': 'Zeus'}},
+            {'qualifiers': {'category': 'chapter'}, 'include_orphans': False},
+        ]
+        expected = [
+            set(item.location for item in modulestore().get_items(locator, **query))
+            for query in queries
+        ]
+        self.assertEqual(len(expected[3]), 1)
+
+        request_cache = MemoryCache()
+        with patch.object(modulestore(), 'request_cache', request_cache):
+            for query, locations in zip(queries, expected):
+                self.assertEqual(
+                    set(item.location for item in modulestore().get_items(locator, **query)),
+                    locations
+                )
+        self.assertEqual(len(request_cache.data['structure_indexes']), 1)
+
+    def test_prefetch_definitions(self):
+        """
+        prefetch_definitions loads the definitions of a subtree with one query
+        """
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        with modulestore().bulk_operations(locator):
+            course = modulestore().get_course(locator)
+            with check_mongo_calls(1):
+                modulestore().prefetch_definitions(locator, [course.location], depth=None)
+
+            # the definitions of all the blocks are now in the bulk operation
+            with check_mongo_calls(0):
+                for block in modulestore().get_items(locator):
+                    definition_id = block.definition_locator.definition_id
+                    self.assertEqual(modulestore().get_definition(locator, definition_id)['_id'], definition_id)
+
     def test_get_parents(self):
         '''
         get_parent_location(locator): BlockUsageLocator
@@ -2014,6 +2125,29 @@ class TestInheritance(SplitModuleTest):
         problem = modulestore().get_item(problem.location.version_agnostic())
         self.assertFalse(problem.visible_to_staff_only)
 
+    @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
+    def test_inheritance_from_structure_index(self, _from_json):
+        """
+        Blocks inherit the same settings from the structure index as they do by
+        walking up their ancestors
+        """
+        course_key = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+
+        def get_inherited_values():
+            """Return the values of the inheritable settings of all the blocks of the course."""
+            return {
+                block.location: {name: getattr(block, name) for name in InheritanceMixin.fields}
+                for block in modulestore().get_items(course_key)
+            }
+
+        expected = get_inherited_values()
+        with patch.object(modulestore(), 'request_cache', MemoryCache()):
+            self.assertEqual(get_inherited_values(), expected)
+
+            node = modulestore().get_item(BlockUsageLocator(course_key, 'problem', 'problem3_2'))
+            self.assertEqual(node.graceperiod, datetime.timedelta(hours=2))
+            self.assertIn('graceperiod', node._field_data.inherited_settings)  # pylint: disable=protected-access
+
     def test_dynamic_inheritance(self):
         """
         Test inheritance for create_item with and without a parent pointer
@@ -170,6 +170,32 @@ class InheritingFieldDataTest(unittest.TestCase):
             child.parent = parent.location
             self.assertEqual(child.inherited, "Changed!")
 
+    def test_precomputed_inherited_settings(self):
+        """
+        Test that a block with precomputed inherited settings gets its
+        inherited values from them, without looking at its parent.
+        """
+        parent = self.get_a_block(usage_id=self.get_usage_id("course", "parent"))
+        parent.inherited = "Changed!"
+
+        self.field_data = InheritingFieldData(
+            inheritable_names=['inherited'],
+            inherited_settings={'inherited': "Precomputed!"},
+            kvs=DictKeyValueStore({}),
+        )
+        child = self.get_a_block(usage_id=self.get_usage_id("vertical", "child"))
+        child.parent = parent.location
+        self.assertEqual(child.inherited, "Precomputed!")
+
+        self.field_data = InheritingFieldData(
+            inheritable_names=['inherited'],
+            inherited_settings={},
+            kvs=DictKeyValueStore({}),
+        )
+        child = self.get_a_block(usage_id=self.get_usage_id("vertical", "other_child"))
+        child.parent = parent.location
+        self.assertEqual(child.inherited, "the default")
+
     def test_not_inherited(self):
         """
         Test that the fields not in the inherited_names list won't be inherited.
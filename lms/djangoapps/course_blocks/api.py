@@ -23,6 +23,7 @@ def get_course_blocks(
         starting_block_usage_key,
         transformers=None,
         collected_block_structure=None,
+        transformed_structures=None,
 ):
     """
     A higher order function implemented on top of the
@@ -45,6 +46,14 @@ def get_course_blocks(
             BlockStructureManager.get_collected.  Can be optionally
             provided if already available, for optimization.
 
+        transformed_structures (dict) - A dict shared by calls for
+            different users with the same collected_block_structure, so
+            that users whose transforms have the same signature share a
+            single computation of the transform, see
+            get_course_blocks_for_users.  Each user is given a
+            copy-on-write copy of the shared transform.  If None, the
+            transform is computed for the user alone.
+
     Returns:
         BlockStructureBlockData - A transformed block structure,
             starting at starting_block_usage_key, that has undergone the
@@ -57,9 +66,71 @@ def get_course_blocks(
     if not transformers:
         transformers = BlockStructureTransformers(COURSE_BLOCK_ACCESS_TRANSFORMERS)
     transformers.usage_info = CourseUsageInfo(starting_block_usage_key.course_key, user)
+    block_structure_manager = get_block_structure_manager(starting_block_usage_key.course_key)
+
+    signature = None
+    if transformed_structures is not None:
+        if collected_block_structure is None:
+            collected_block_structure = block_structure_manager.get_collected()
+        signature = transformers.transform_signature(collected_block_structure)
+    if signature is None:
+        return block_structure_manager.get_transformed(
+            transformers,
+            starting_block_usage_key,
+            collected_block_structure,
+        )
+
+    key = (starting_block_usage_key, signature)
+    if key not in transformed_structures:
+        transformed_structures[key] = block_structure_manager.get_transformed(
+            transformers,
+            starting_block_usage_key,
+            collected_block_structure,
+        )
+    return transformed_structures[key].copy()
+
 
-    return get_block_structure_manager(starting_block_usage_key.course_key).get_transformed(
-        transformers,
+def get_course_blocks_for_users(
+        users,
         starting_block_usage_key,
-        collected_block_structure,
-    )
+        transformers=None,
+        collected_block_structure=None,
+):
+    """
+    A bulk version of get_course_blocks that returns a transformed
+    block structure for each of the given users.
+
+    Users whose transforms have the same signature (for example, users
+    with the same staff, beta tester and user partition group
+    memberships) share a single computation of the transform, so
+    reports and batch jobs over many users do not repeat identical
+    work.  See BlockStructureTransformer.transform_signature.
+
+    Arguments:
+        users (iterable(django.contrib.auth.models.User)) - User objects
+            for which the block structure is to be transformed.
+
+        starting_block_usage_key, transformers,
+        collected_block_structure - See the description in
+            get_course_blocks.
+
+    Returns:
+        dict {int: BlockStructureBlockData} - A map of each user's id
+            to the user's transformed block structure.  Users who share
+            a transform are given their own copy-on-write copies of it.
+    """
+    course_key = starting_block_usage_key.course_key
+    if collected_block_structure is None:
+        collected_block_structure = get_block_structure_manager(course_key).get_collected()
+
+    transformed_structures = {}
+    return {
+        user.id: get_course_blocks(
+            user,
+            starting_block_usage_key,
+            transformers,
+            collected_block_structure,
+            transformed_structures,
+        )
+        for user in users
+    }
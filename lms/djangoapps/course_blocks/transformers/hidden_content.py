@@ -11,7 +11,7 @@ from openedx.core.djangoapps.content.block_structure.transformer import (
 )
 from xmodule.seq_module import SequenceModule
 
-from .utils import collect_merged_boolean_field, collect_merged_date_field
+from .utils import DateBitsets, collect_block_bitset, collect_merged_boolean_field, collect_merged_date_field
 
 MAXIMUM_DATE = utc.localize(datetime.max)
 
@@ -29,10 +29,12 @@ class HiddenContentTransformer(FilteringTransformerMixin, BlockStructureTransfor
 
     Staff users are exempted from hidden content rules.
     """
-    WRITE_VERSION = 2
+    WRITE_VERSION = 3
     READ_VERSION = 2
     MERGED_DUE_DATE = 'merged_due_date'
     MERGED_HIDE_AFTER_DUE = 'merged_hide_after_due'
+    HIDE_AFTER_DUE_BITSET = 'hide_after_due_bitset'
+    DUE_DATE_BITSETS = 'due_date_bitsets'
 
     @classmethod
     def name(cls):
@@ -88,6 +90,25 @@ class HiddenContentTransformer(FilteringTransformerMixin, BlockStructureTransfor
 
         block_structure.request_xblock_fields(u'self_paced', u'end')
 
+        collect_block_bitset(
+            block_structure,
+            transformer=cls,
+            bitset_name=cls.HIDE_AFTER_DUE_BITSET,
+            filter_by=lambda block_key: cls._get_merged_hide_after_due(block_structure, block_key),
+        )
+        if block_structure.block_index is not None:
+            block_structure.set_transformer_data(cls, cls.DUE_DATE_BITSETS, DateBitsets(
+                block_structure.block_index,
+                (
+                    (block_key, cls._get_merged_due_date(block_structure, block_key))
+                    for block_key in block_structure
+                    if cls._get_merged_hide_after_due(block_structure, block_key)
+                ),
+            ))
+
+    def transform_signature(self, usage_info, block_structure):
+        return usage_info.has_staff_access
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Visibility check.
         if usage_info.has_staff_access:
@@ -99,15 +120,32 @@ class HiddenContentTransformer(FilteringTransformerMixin, BlockStructureTransfor
             ),
         ]
 
+    def transform_block_bitsets(self, usage_info, block_structure):
+        # Users with staff access bypass the Visibility check.
+        if usage_info.has_staff_access:
+            return []
+
+        hide_after_due_bitset = block_structure.get_transformer_data(self, self.HIDE_AFTER_DUE_BITSET)
+        if hide_after_due_bitset is None:
+            return None
+
+        now = datetime.now(utc)
+        if block_structure.get_xblock_field(block_structure.root_block_usage_key, 'self_paced'):
+            end = block_structure.get_xblock_field(block_structure.root_block_usage_key, 'end')
+            return [(hide_after_due_bitset, False)] if end and end <= now else []
+
+        due_date_bitsets = block_structure.get_transformer_data(self, self.DUE_DATE_BITSETS)
+        return [(due_date_bitsets.at_or_before(now), False)]
+
     def _is_block_hidden(self, block_structure, block_key):
         """
         Returns whether the block with the given block_key should
         be hidden, given the current time.
         """
         hide_after_due = self._get_merged_hide_after_due(block_structure, block_key)
-        self_paced = block_structure[block_structure.root_block_usage_key].self_paced
+        self_paced = block_structure.get_xblock_field(block_structure.root_block_usage_key, 'self_paced')
         if self_paced:
-            hidden_date = block_structure[block_structure.root_block_usage_key].end
+            hidden_date = block_structure.get_xblock_field(block_structure.root_block_usage_key, 'end')
         else:
             hidden_date = self._get_merged_due_date(block_structure, block_key)
         return not SequenceModule.verify_current_content_visibility(hidden_date, hide_after_due)
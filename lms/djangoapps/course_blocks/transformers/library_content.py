@@ -67,6 +67,13 @@ class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransfo
                 summary = summarize_block(child_key)
                 block_structure.set_transformer_block_field(child_key, cls, 'block_analytics_summary', summary)
 
+    def transform_signature(self, usage_info, block_structure):
+        # Selections of library content are specific to each user.
+        for block_key in block_structure:
+            if block_key.block_type == 'library_content' and block_structure.get_children(block_key):
+                return None
+        return ()
+
     def transform_block_filters(self, usage_info, block_structure):
         all_library_children = set()
         all_selected_children = set()
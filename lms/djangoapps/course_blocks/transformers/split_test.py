@@ -6,6 +6,8 @@ from openedx.core.djangoapps.content.block_structure.transformer import (
     FilteringTransformerMixin
 )
 
+from .utils import collect_block_bitset
+
 
 class SplitTestTransformer(FilteringTransformerMixin, BlockStructureTransformer):
     """
@@ -22,8 +24,9 @@ class SplitTestTransformer(FilteringTransformerMixin, BlockStructureTransformer)
     to actually enforce the access using the 'user_partitions' and
     'group_access' fields.
     """
-    WRITE_VERSION = 1
+    WRITE_VERSION = 2
     READ_VERSION = 1
+    SPLIT_TEST_BITSET = 'split_test_bitset'
 
     @classmethod
     def name(cls):
@@ -72,6 +75,13 @@ class SplitTestTransformer(FilteringTransformerMixin, BlockStructureTransformer)
                 group = child_to_group.get(child_location, None)
                 child.group_access[partition_for_this_block.id] = [group] if group is not None else []
 
+        collect_block_bitset(
+            block_structure,
+            transformer=cls,
+            bitset_name=cls.SPLIT_TEST_BITSET,
+            filter_by=lambda block_key: block_key.block_type == 'split_test',
+        )
+
     def transform_block_filters(self, usage_info, block_structure):
         """
         Mutates block_structure based on the given usage_info.
@@ -85,3 +95,9 @@ class SplitTestTransformer(FilteringTransformerMixin, BlockStructureTransformer)
                 keep_descendants=True,
             )
         ]
+
+    def transform_block_bitsets(self, usage_info, block_structure):
+        split_test_bitset = block_structure.get_transformer_data(self, self.SPLIT_TEST_BITSET)
+        if split_test_bitset is None:
+            return None
+        return [(split_test_bitset, True)]
@@ -1,14 +1,20 @@
 """
 Start Date Transformer implementation.
 """
-from lms.djangoapps.courseware.access_utils import check_start_date
+from datetime import datetime
+
+from pytz import UTC
+
+from lms.djangoapps.courseware.access_utils import check_start_date, start_dates_enforced
+from lms.djangoapps.courseware.masquerade import is_masquerading_as_student
 from openedx.core.djangoapps.content.block_structure.transformer import (
     BlockStructureTransformer,
     FilteringTransformerMixin
 )
+from student.roles import CourseBetaTesterRole
 from xmodule.course_metadata_utils import DEFAULT_START_DATE
 
-from .utils import collect_merged_date_field
+from .utils import DateBitsets, collect_merged_date_field
 
 
 class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer):
@@ -27,9 +33,10 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
 
     Staff users are exempted from visibility rules.
     """
-    WRITE_VERSION = 1
+    WRITE_VERSION = 2
     READ_VERSION = 1
     MERGED_START_DATE = 'merged_start_date'
+    START_DATE_BITSETS = 'start_date_bitsets'
 
     @classmethod
     def name(cls):
@@ -67,6 +74,23 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
             func_merge_ancestors=max,
         )
 
+        if block_structure.block_index is not None:
+            block_structure.set_transformer_data(cls, cls.START_DATE_BITSETS, DateBitsets(
+                block_structure.block_index,
+                (
+                    (block_key, cls._get_merged_start_date(block_structure, block_key))
+                    for block_key in block_structure
+                ),
+            ))
+
+    def transform_signature(self, usage_info, block_structure):
+        if usage_info.has_staff_access:
+            return 'staff'
+        if is_masquerading_as_student(usage_info.user, usage_info.course_key):
+            return None
+        # Start dates are adjusted only for beta testers.
+        return CourseBetaTesterRole(usage_info.course_key).has_user(usage_info.user)
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Start Date check.
         if usage_info.has_staff_access:
@@ -79,3 +103,22 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
             usage_info.course_key,
         )
         return [block_structure.create_removal_filter(removal_condition)]
+
+    def transform_block_bitsets(self, usage_info, block_structure):
+        # Users with staff access bypass the Start Date check.
+        if usage_info.has_staff_access:
+            return []
+
+        start_date_bitsets = block_structure.get_transformer_data(self, self.START_DATE_BITSETS)
+        if start_date_bitsets is None:
+            return None
+
+        if not start_dates_enforced(usage_info.user, usage_info.course_key):
+            return []
+
+        # The start dates of beta testers are adjusted by each block's
+        # days_early_for_beta, so they are checked for each block.
+        if CourseBetaTesterRole(usage_info.course_key).has_user(usage_info.user):
+            return None
+
+        return [(start_date_bitsets.at_or_after(datetime.now(UTC)), False)]
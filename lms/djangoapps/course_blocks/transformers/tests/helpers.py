@@ -5,6 +5,7 @@ from mock import patch
 
 from course_modes.models import CourseMode
 from lms.djangoapps.courseware.access import has_access
+from openedx.core.djangoapps.content.block_structure.config import BITSET_TRANSFORMS, waffle
 from openedx.core.djangoapps.content.block_structure.tests.helpers import clear_registered_transformers_cache
 from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
 from student.tests.factories import CourseEnrollmentFactory, UserFactory
@@ -314,6 +315,11 @@ class BlockParentsMapTestCase(TransformerRegistryTestMixin, ModuleStoreTestCase)
         self.client.login(username=user.username, password=self.password)
         block_structure = get_course_blocks(user, self.course.location, transformers)
 
+        # verify transforming with bitsets yields the same blocks
+        with waffle().override(BITSET_TRANSFORMS, active=True):
+            bitset_block_structure = get_course_blocks(user, self.course.location, transformers)
+        self.assertEquals(set(bitset_block_structure), set(block_structure))
+
         for i, xblock_key in enumerate(self.xblock_keys):
 
             # compute access results of the block
@@ -6,17 +6,19 @@ import string
 from collections import namedtuple
 
 import ddt
+from mock import patch
 from nose.plugins.attrib import attr
 
+from openedx.core.djangoapps.content.block_structure.manager import BlockStructureManager
 from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort
 from openedx.core.djangoapps.course_groups.partition_scheme import CohortPartitionScheme
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory, config_course_cohorts
 from openedx.core.djangoapps.course_groups.views import link_cohort_to_partition_group
-from student.tests.factories import CourseEnrollmentFactory
+from student.tests.factories import CourseEnrollmentFactory, UserFactory
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.partitions.partitions import Group, UserPartition
 
-from ...api import get_course_blocks
+from ...api import get_course_blocks, get_course_blocks_for_users
 from ..user_partitions import UserPartitionTransformer, _MergedGroupAccess
 from .helpers import CourseStructureTestCase, update_block
 
@@ -241,6 +243,42 @@ class UserPartitionTransformerTestCase(UserPartitionTestMixin, CourseStructureTe
             self.get_block_key_set(self.blocks, *expected_blocks)
         )
 
+    def test_transform_for_users(self):
+        """
+        Tests that users with the same group memberships share a transform.
+        """
+        self.setup_partitions_and_course()
+        users_by_group = {}
+        for group_id in (None, 1, 1, 2):
+            user = UserFactory.create()
+            CourseEnrollmentFactory.create(user=user, course_id=self.course.id, is_active=True)
+            if group_id:
+                cohort = self.partition_cohorts[self.user_partition.id - 1][group_id - 1]
+                add_user_to_cohort(cohort, user.username)
+            users_by_group.setdefault(group_id, []).append(user)
+
+        with patch.object(
+            BlockStructureManager, 'get_transformed', autospec=True, side_effect=BlockStructureManager.get_transformed,
+        ) as mock_get_transformed:
+            trans_block_structures = get_course_blocks_for_users(
+                [user for users in users_by_group.itervalues() for user in users],
+                self.course.location,
+                self.transformers,
+            )
+        self.assertEquals(mock_get_transformed.call_count, 3)
+
+        expected_blocks_by_group = {
+            None: ('course', 'B', 'O'),
+            1: ('course', 'A', 'B', 'C', 'E', 'F', 'G', 'J', 'L', 'M', 'O'),
+            2: ('course', 'A', 'B', 'C', 'D', 'E', 'F', 'H', 'I', 'J', 'M', 'O'),
+        }
+        for group_id, users in users_by_group.iteritems():
+            for user in users:
+                self.assertSetEqual(
+                    set(trans_block_structures[user.id].get_block_keys()),
+                    self.get_block_key_set(self.blocks, *expected_blocks_by_group[group_id])
+                )
+
 
 @attr(shard=3)
 @ddt.ddt
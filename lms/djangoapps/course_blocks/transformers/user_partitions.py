@@ -1,6 +1,8 @@
 """
 User Partitions Transformer
 """
+from collections import defaultdict
+
 from openedx.core.djangoapps.content.block_structure.transformer import (
     BlockStructureTransformer,
     FilteringTransformerMixin
@@ -20,7 +22,7 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
 
     Staff users are *not* exempted from user partition pathways.
     """
-    WRITE_VERSION = 1
+    WRITE_VERSION = 2
     READ_VERSION = 1
 
     @classmethod
@@ -69,6 +71,27 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
             merged_group_access = _MergedGroupAccess(user_partitions, xblock, merged_parent_access_list)
             block_structure.set_transformer_block_field(block_key, cls, 'merged_group_access', merged_group_access)
 
+        if block_structure.block_index is not None:
+            block_structure.set_transformer_data(cls, 'group_access_bitsets', _GroupAccessBitsets(
+                block_structure.block_index,
+                (
+                    (block_key, block_structure.get_transformer_block_field(block_key, cls, 'merged_group_access'))
+                    for block_key in block_structure
+                ),
+            ))
+
+    def transform_signature(self, usage_info, block_structure):
+        user_partitions = block_structure.get_transformer_data(self, 'user_partitions')
+        if not user_partitions:
+            return ()
+
+        user_groups = _get_user_partition_groups(
+            usage_info.course_key, user_partitions, usage_info.user
+        )
+        return tuple(sorted(
+            (partition_id, group.id) for partition_id, group in user_groups.iteritems()
+        ))
+
     def transform_block_filters(self, usage_info, block_structure):
         result_list = SplitTestTransformer().transform_block_filters(usage_info, block_structure)
 
@@ -88,6 +111,22 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
         result_list.append(group_access_filter)
         return result_list
 
+    def transform_block_bitsets(self, usage_info, block_structure):
+        user_partitions = block_structure.get_transformer_data(self, 'user_partitions')
+        if not user_partitions:
+            return []
+
+        result_list = SplitTestTransformer().transform_block_bitsets(usage_info, block_structure)
+        group_access_bitsets = block_structure.get_transformer_data(self, 'group_access_bitsets')
+        if result_list is None or group_access_bitsets is None:
+            return None
+
+        user_groups = _get_user_partition_groups(
+            usage_info.course_key, user_partitions, usage_info.user
+        )
+        result_list.append((group_access_bitsets.get_denied_bitset(user_groups), False))
+        return result_list
+
 
 class _MergedGroupAccess(object):
     """
@@ -237,6 +276,62 @@ class _MergedGroupAccess(object):
         return True
 
 
+class _GroupAccessBitsets(object):
+    """
+    A class object to represent the merged group access of all blocks
+    as bitsets over the block_index of the block structure, so the
+    blocks to which a user does not have group access are computed with
+    a few bitwise operations for each partition rather than with a call
+    to _MergedGroupAccess.check_group_access for each block.
+    """
+    def __init__(self, block_index, merged_group_accesses):
+        """
+        Arguments:
+            block_index (BlockIndex)
+            merged_group_accesses (iterable((UsageKey, _MergedGroupAccess)))
+        """
+        restricted_block_keys = defaultdict(list)
+        allowed_block_keys = defaultdict(list)
+        for block_key, merged_group_access in merged_group_accesses:
+            # pylint: disable=protected-access
+            for partition_id, group_ids in merged_group_access._access.iteritems():
+                restricted_block_keys[partition_id].append(block_key)
+                for group_id in group_ids:
+                    allowed_block_keys[(partition_id, group_id)].append(block_key)
+
+        # { partition.id: bitset of blocks with group access
+        #   restrictions for the partition }
+        self._restricted = {
+            partition_id: block_index.bitset(block_keys)
+            for partition_id, block_keys in restricted_block_keys.iteritems()
+        }
+
+        # { partition.id: { group.id: bitset of blocks with group access
+        #   restrictions for the partition that the group can access } }
+        self._allowed = {}
+        for (partition_id, group_id), block_keys in allowed_block_keys.iteritems():
+            self._allowed.setdefault(partition_id, {})[group_id] = block_index.bitset(block_keys)
+
+    def get_denied_bitset(self, user_groups):
+        """
+        Arguments:
+            dict[int: Group]: Given a user, a mapping from user
+                partition IDs to the group to which the user belongs in
+                each partition.
+
+        Returns:
+            int: Bitset of the blocks to which said user does not have
+                group access, per _MergedGroupAccess.check_group_access.
+        """
+        denied_bitset = 0
+        for partition_id, restricted_bitset in self._restricted.iteritems():
+            if partition_id in user_groups:
+                allowed_bitset = self._allowed.get(partition_id, {}).get(user_groups[partition_id].id, 0)
+                restricted_bitset &= ~allowed_bitset
+            denied_bitset |= restricted_bitset
+        return denied_bitset
+
+
 def _get_user_partition_groups(course_key, user_partitions, user):
     """
     Collect group ID for each partition in this course for this user.
@@ -1,6 +1,8 @@
 """
 Common Helper utilities for transformers
 """
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
 
 
 def get_field_on_block(block, field_name, default_value=None):
@@ -147,3 +149,84 @@ def collect_merged_date_field(
             merged_field_name,
             merged_date_value
         )
+
+
+def collect_block_bitset(block_structure, transformer, bitset_name, filter_by):
+    """
+    Collects the bitset, over the block_index of the given
+    block_structure, of the blocks that match filter_by and stores it
+    as the transformer's data of name bitset_name.  Nothing is
+    collected if the blocks of the block_structure are not indexed.
+
+    Parameters:
+        block_structure: BlockStructure to collect the bitset for
+        transformer: transformer that will be used for get_ and
+            set_transformer_data
+        bitset_name: name of the transformer data to store
+        filter_by: a unary lambda that returns true if a given
+            block_key should be included in the bitset
+    """
+    if block_structure.block_index is None:
+        return
+
+    block_structure.set_transformer_data(
+        transformer,
+        bitset_name,
+        block_structure.block_index.bitset(
+            block_key for block_key in block_structure if filter_by(block_key)
+        ),
+    )
+
+
+class DateBitsets(object):
+    """
+    Bitsets, over the block_index of a block structure, of the blocks
+    whose dates are before or after any given date.  Allows the blocks
+    that are, for example, not yet started to be found with a binary
+    search rather than a comparison for each block.
+    """
+    def __init__(self, block_index, block_dates):
+        """
+        Arguments:
+            block_index (BlockIndex)
+            block_dates (iterable((UsageKey, datetime))): Blocks and
+                their dates.  Blocks without a date are excluded from
+                all bitsets.
+        """
+        block_keys_by_date = defaultdict(list)
+        for block_key, date in block_dates:
+            if date:
+                block_keys_by_date[date].append(block_key)
+
+        # Sorted list of the distinct dates of the blocks.
+        self._dates = sorted(block_keys_by_date)
+
+        # Bitsets of the blocks whose date is at or before the date at
+        # the same position in self._dates.
+        self._cumulative_bitsets = []
+        bitset = 0
+        for date in self._dates:
+            bitset |= block_index.bitset(block_keys_by_date[date])
+            self._cumulative_bitsets.append(bitset)
+
+    def at_or_before(self, date):
+        """
+        Returns the bitset of the blocks whose date is at or before the
+        given date.
+        """
+        return self._bitset_before_position(bisect_right(self._dates, date))
+
+    def at_or_after(self, date):
+        """
+        Returns the bitset of the blocks whose date is at or after the
+        given date.
+        """
+        all_blocks = self._cumulative_bitsets[-1] if self._cumulative_bitsets else 0
+        return all_blocks ^ self._bitset_before_position(bisect_left(self._dates, date))
+
+    def _bitset_before_position(self, position):
+        """
+        Returns the bitset of the blocks whose date is before the date
+        at the given position in self._dates.
+        """
+        return self._cumulative_bitsets[position - 1] if position else 0
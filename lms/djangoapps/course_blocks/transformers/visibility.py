@@ -6,7 +6,7 @@ from openedx.core.djangoapps.content.block_structure.transformer import (
     FilteringTransformerMixin
 )
 
-from .utils import collect_merged_boolean_field
+from .utils import collect_block_bitset, collect_merged_boolean_field
 
 
 class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer):
@@ -22,10 +22,11 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
 
     Staff users are exempted from visibility rules.
     """
-    WRITE_VERSION = 1
+    WRITE_VERSION = 2
     READ_VERSION = 1
 
     MERGED_VISIBLE_TO_STAFF_ONLY = 'merged_visible_to_staff_only'
+    VISIBLE_TO_STAFF_ONLY_BITSET = 'visible_to_staff_only_bitset'
 
     @classmethod
     def name(cls):
@@ -58,6 +59,15 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
             xblock_field_name='visible_to_staff_only',
             merged_field_name=cls.MERGED_VISIBLE_TO_STAFF_ONLY,
         )
+        collect_block_bitset(
+            block_structure,
+            transformer=cls,
+            bitset_name=cls.VISIBLE_TO_STAFF_ONLY_BITSET,
+            filter_by=lambda block_key: cls._get_visible_to_staff_only(block_structure, block_key),
+        )
+
+    def transform_signature(self, usage_info, block_structure):
+        return usage_info.has_staff_access
 
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Visibility check.
@@ -69,3 +79,13 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
                 lambda block_key: self._get_visible_to_staff_only(block_structure, block_key),
             )
         ]
+
+    def transform_block_bitsets(self, usage_info, block_structure):
+        # Users with staff access bypass the Visibility check.
+        if usage_info.has_staff_access:
+            return []
+
+        visible_to_staff_only_bitset = block_structure.get_transformer_data(self, self.VISIBLE_TO_STAFF_ONLY_BITSET)
+        if visible_to_staff_only_bitset is None:
+            return None
+        return [(visible_to_staff_only_bitset, False)]
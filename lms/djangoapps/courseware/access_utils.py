@@ -60,19 +60,26 @@ def check_start_date(user, days_early_for_beta, start, course_key):
     Returns:
         AccessResponse: Either ACCESS_GRANTED or StartDateError.
     """
-    start_dates_disabled = settings.FEATURES['DISABLE_START_DATES']
-    if start_dates_disabled and not is_masquerading_as_student(user, course_key):
+    if start is None or not start_dates_enforced(user, course_key):
         return ACCESS_GRANTED
-    else:
-        now = datetime.now(UTC)
-        if start is None or in_preview_mode():
-            return ACCESS_GRANTED
 
-        effective_start = adjust_start_date(user, days_early_for_beta, start, course_key)
-        if now > effective_start:
-            return ACCESS_GRANTED
+    now = datetime.now(UTC)
+    effective_start = adjust_start_date(user, days_early_for_beta, start, course_key)
+    if now > effective_start:
+        return ACCESS_GRANTED
+
+    return StartDateError(start)
+
 
-        return StartDateError(start)
+def start_dates_enforced(user, course_key):
+    """
+    Returns whether start dates are enforced for the given user in the
+    given course, regardless of the start date of any content.
+    """
+    start_dates_disabled = settings.FEATURES['DISABLE_START_DATES']
+    if start_dates_disabled and not is_masquerading_as_student(user, course_key):
+        return False
+    return not in_preview_mode()
 
 
 def in_preview_mode():
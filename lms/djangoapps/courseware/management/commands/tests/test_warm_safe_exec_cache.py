@@ -0,0 +1,56 @@
+"""
+Tests for the warm_safe_exec_cache management command.
+"""
+from textwrap import dedent
+
+import ddt
+from django.core.management import call_command
+from mock import patch
+from nose.plugins.attrib import attr
+from six import text_type
+
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+SCRIPT_PROBLEM = dedent("""
+    <problem>
+        <script type="loncapa/python">
+    x = random.randint(1, 10)
+        </script>
+        <p>What is $x?</p>
+        <numericalresponse answer="$x">
+            <formulaequationinput/>
+        </numericalresponse>
+    </problem>
+""")
+
+
+@attr(shard=1)
+@ddt.ddt
+class WarmSafeExecCacheTestCase(SharedModuleStoreTestCase):
+    """
+    Tests for the warm_safe_exec_cache management command.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(WarmSafeExecCacheTestCase, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        cls.randomized_problem = ItemFactory.create(
+            parent=cls.course, category='problem', data=SCRIPT_PROBLEM, rerandomize='always',
+        )
+        cls.per_student_problem = ItemFactory.create(
+            parent=cls.course, category='problem', data=SCRIPT_PROBLEM, rerandomize='per_student',
+        )
+        cls.fixed_problem = ItemFactory.create(
+            parent=cls.course, category='problem', data=SCRIPT_PROBLEM, rerandomize='never',
+        )
+        ItemFactory.create(parent=cls.course, category='problem', data='<problem><p>No script</p></problem>')
+
+    @ddt.data(1, 3, 25)
+    def test_warm(self, num_seeds):
+        with patch('capa.capa_problem.safe_exec') as mock_safe_exec:
+            call_command('warm_safe_exec_cache', text_type(self.course.id), '--seeds', str(num_seeds))
+
+        seeds = sorted(call[1]['random_seed'] for call in mock_safe_exec.call_args_list)
+        # Problems randomized per student only have NUM_RANDOMIZATION_BINS (20) seeds
+        self.assertEqual(seeds, sorted(range(num_seeds) + range(min(num_seeds, 20)) + [1]))
@@ -0,0 +1,111 @@
+"""
+Run the script code of the capa problems of courses, so that its results are
+cached before learners load the problems.
+
+Problems that are never randomized always use the same seed.  Problems that
+are randomized per student use the seed of the student's bin, one of
+NUM_RANDOMIZATION_BINS.  The seeds of the others are spread over
+MAX_RANDOMIZATION_BINS bins.  All of these seeds are run, unless --seeds
+limits how many are.
+"""
+import logging
+from textwrap import dedent
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from xmodule.capa_base import MAX_RANDOMIZATION_BINS, NUM_RANDOMIZATION_BINS
+from xmodule.capa_base_constants import RANDOMIZATION
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore
+
+from courseware.safe_exec_cache import get_safe_exec_cache
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = dedent(__doc__).strip()
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids',
+                            nargs='+',
+                            help='courses whose problems to run')
+        parser.add_argument('--seeds',
+                            type=int,
+                            default=MAX_RANDOMIZATION_BINS,
+                            help='maximum number of seeds to run randomized problems for')
+
+    def handle(self, *args, **options):
+        store = modulestore()
+        for course_id in options['course_ids']:
+            try:
+                course_key = CourseKey.from_string(course_id)
+            except InvalidKeyError:
+                raise CommandError(u'Invalid course_id: {}'.format(course_id))
+
+            warmed = failed = 0
+            for problem in store.get_items(course_key, qualifiers={'category': 'problem'}):
+                if '<script' not in getattr(problem, 'data', ''):
+                    continue
+                seeds = problem_seeds(problem, options['seeds'])
+                try:
+                    warm_problem(problem, course_key, seeds)
+                except Exception:  # pylint: disable=broad-except
+                    log.warning(u'Could not run the script code of %s', problem.location, exc_info=True)
+                    failed += 1
+                else:
+                    warmed += 1
+
+            log.info(u'Ran the script code of %d problems of %s, %d failed.', warmed, course_id, failed)
+
+
+def problem_seeds(problem, max_seeds):
+    """
+    Returns the seeds the given capa problem can be run with in the
+    courseware, limited to the first `max_seeds` of them.
+    """
+    if problem.rerandomize == RANDOMIZATION.NEVER:
+        return [1]
+    if problem.rerandomize == RANDOMIZATION.PER_STUDENT:
+        # The courseware seeds these problems with randomization_bin
+        return range(min(max_seeds, NUM_RANDOMIZATION_BINS))
+    return range(min(max_seeds, MAX_RANDOMIZATION_BINS))
+
+
+def warm_problem(problem, course_key, seeds):
+    """
+    Runs the script code of the given capa problem for each of the given seeds,
+    caching its results in the cache used by the courseware.
+    """
+    capa_system = LoncapaSystem(
+        ajax_url=None,
+        anonymous_student_id=None,
+        cache=get_safe_exec_cache(),
+        can_execute_unsafe_code=lambda: can_execute_unsafe_code(course_key),
+        get_python_lib_zip=lambda: get_python_lib_zip(contentstore, course_key),
+        DEBUG=None,
+        filestore=problem.runtime.resources_fs,
+        i18n=problem.runtime.service(problem, "i18n"),
+        node_path=None,
+        render_template=None,
+        seed=None,
+        STATIC_URL=None,
+        xqueue=None,
+        matlab_api_key=None,
+    )
+    for seed in seeds:
+        lcp = LoncapaProblem(
+            problem_text=problem.data,
+            id=problem.location.html_id(),
+            capa_system=capa_system,
+            capa_module=problem,
+            state={},
+            seed=seed,
+            minimal_init=True,
+        )
+        # A minimal problem doesn't run its script code; nothing else needs
+        # to be done to cache its results.
+        lcp._extract_context(lcp.tree)  # pylint: disable=protected-access
@@ -2,6 +2,9 @@
 Middleware for the courseware app
 """
 
+from capa.safe_exec import worker_pool
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.shortcuts import redirect
 
 from lms.djangoapps.courseware.exceptions import Redirect
@@ -17,3 +20,13 @@ class RedirectMiddleware(object):
         """
         if isinstance(exception, Redirect):
             return redirect(exception.url)
+
+
+class ConfigureCodeJailWorkerPoolMiddleware(object):
+    """
+    Configure the pool of sandbox workers of capa from settings.CODE_JAIL,
+    once, after codejail itself is configured.
+    """
+    def __init__(self):
+        worker_pool.configure(**settings.CODE_JAIL.get('worker_pool', {}))
+        raise MiddlewareNotUsed
@@ -27,17 +27,21 @@ from abc import ABCMeta, abstractmethod
 from collections import defaultdict, namedtuple
 
 from contracts import contract, new_contract
+from django.conf import settings
 from django.db import DatabaseError, IntegrityError, transaction
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.keys import CourseKey
-from xblock.core import XBlockAside
+from xblock.core import XBlock, XBlockAside
 from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
-from xblock.fields import Scope, UserScope
-from xblock.runtime import KeyValueStore
+from xblock.fields import Scope, ScopeIds, UserScope
+from xblock.plugin import PluginMissingError
+from xblock.runtime import KeyValueStore, Mixologist
 
+from courseware.user_state_buffer import UserStateWriteBuffer, is_write_behind_enabled
 from courseware.user_state_client import DjangoXBlockUserStateClient
 from xmodule.modulestore.django import modulestore
+from xmodule.x_module import XModuleMixin
 
 from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
 
@@ -82,6 +86,54 @@ def _all_block_types(descriptors, aside_types):
     return block_types
 
 
+class _PrefetchBlock(namedtuple('_PrefetchBlock', [
+        'scope_ids', 'location', 'entry_point', 'fields', 'has_score', 'has_required_blocks',
+])):
+    """
+    The attributes of a block that FieldDataCache needs to prefetch its
+    field data, used in place of the block's descriptor when only its usage
+    key is known.
+    """
+    __slots__ = ()
+
+    _mixologist = None
+
+    @classmethod
+    def create(cls, user_id, usage_key):
+        """
+        Returns a _PrefetchBlock for the block with the given usage key, based
+        on the class of its block type, or None if its block type isn't
+        installed.
+        """
+        try:
+            block_class = cls._block_class(usage_key.block_type)
+        except PluginMissingError:
+            return None
+        has_score = getattr(block_class, 'has_score', False)
+        get_required_blocks = getattr(block_class, 'get_required_module_descriptors', None)
+        return cls(
+            scope_ids=ScopeIds(user_id, usage_key.block_type, None, usage_key),
+            location=usage_key,
+            entry_point=block_class.entry_point,
+            fields=block_class.fields,
+            has_score=has_score if isinstance(has_score, bool) else False,
+            has_required_blocks=(
+                get_required_blocks is not None and
+                get_required_blocks.__func__ is not XModuleMixin.get_required_module_descriptors.__func__
+            ),
+        )
+
+    @classmethod
+    def _block_class(cls, block_type):
+        """
+        Returns the class of the given block type, with the XBlock mixins
+        applied, as the modulestore loads it.
+        """
+        if cls._mixologist is None:
+            cls._mixologist = Mixologist(settings.XBLOCK_MIXINS)
+        return cls._mixologist.mix(XBlock.load_class(block_type, select=settings.XBLOCK_SELECT_FUNCTION))
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -350,6 +402,9 @@ class UserStateCache(object):
         self.course_id = course_id
         self.user = user
         self._client = DjangoXBlockUserStateClient(self.user)
+        self._write_buffer = None
+        if is_write_behind_enabled() and self.user.is_authenticated():
+            self._write_buffer = UserStateWriteBuffer(self.user)
 
     def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
         """
@@ -361,13 +416,18 @@ class UserStateCache(object):
             xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
             aside_types (list of str): Aside types to cache fields for.
         """
+        usage_keys = _all_usage_keys(xblocks, aside_types)
         block_field_state = self._client.get_many(
             self.user.username,
-            _all_usage_keys(xblocks, aside_types),
+            usage_keys,
         )
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
 
+        if self._write_buffer is not None:
+            for block_key, buffered_state in self._write_buffer.get_many(usage_keys).iteritems():
+                self._cache[block_key].update(buffered_state)
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
         """
@@ -414,10 +474,15 @@ class UserStateCache(object):
             pending_updates[cache_key][kvs_key.field_name] = value
 
         try:
-            self._client.set_many(
-                self.user.username,
-                pending_updates
-            )
+            unbuffered_updates = pending_updates
+            if self._write_buffer is not None:
+                unbuffered_updates = self._write_buffer.add(pending_updates)
+
+            if unbuffered_updates:
+                self._client.set_many(
+                    self.user.username,
+                    unbuffered_updates
+                )
         except DatabaseError:
             log.exception("Saving user state failed for %s", self.user.username)
             raise KeyValueMultiSaveError([])
@@ -460,6 +525,8 @@ class UserStateCache(object):
         if kvs_key.field_name not in field_state:
             raise KeyError(kvs_key.field_name)
 
+        if self._write_buffer is not None:
+            self._write_buffer.discard(cache_key, [kvs_key.field_name])
         self._client.delete(self.user.username, cache_key, fields=[kvs_key.field_name])
         del field_state[kvs_key.field_name]
 
@@ -776,6 +843,51 @@ class FieldDataCache(object):
 
         self.add_descriptors_to_cache(descriptors)
 
+    def add_block_structure_descendents(self, block_structure, usage_key=None, depth=None):
+        """
+        Add all descendants of the block with `usage_key` in `block_structure`
+        to this FieldDataCache.
+
+        Unlike add_descriptor_descendents, this doesn't load the descriptors of
+        the blocks from the modulestore: which fields to prefetch is determined
+        from the block types in their usage keys.  The only exception is blocks
+        that depend on blocks other than their children, such as conditional
+        blocks: their descriptors are loaded to find the blocks they require,
+        which are then added with add_descriptor_descendents.
+
+        Arguments:
+            block_structure (BlockStructure): A block structure of the course,
+                e.g. the collected one returned by get_course_in_cache.
+            usage_key (UsageKey): The block to start from.  Defaults to the root
+                of the block structure.
+            depth (int): The number of levels of descendants to add, in addition
+                to the block itself, or None to add all descendants.
+        """
+        usage_key = usage_key or block_structure.root_block_usage_key
+        # The number of levels of descendants to add below each block found
+        remaining_depths = {usage_key: depth} if usage_key in block_structure else {}
+        level = list(remaining_depths)
+        while level and (depth is None or depth > 0):
+            depth = depth - 1 if depth is not None else depth
+            next_level = []
+            for parent_key in level:
+                for child_key in block_structure.get_children(parent_key):
+                    if child_key not in remaining_depths:
+                        remaining_depths[child_key] = depth
+                        next_level.append(child_key)
+            level = next_level
+
+        blocks = [_PrefetchBlock.create(self.user.id, block_key) for block_key in remaining_depths]
+        blocks = [block for block in blocks if block is not None]
+        self.add_descriptors_to_cache(blocks)
+
+        for block in blocks:
+            block_depth = remaining_depths[block.location]
+            if block.has_required_blocks and (block_depth is None or block_depth > 0):
+                required_depth = block_depth - 1 if block_depth is not None else block_depth
+                for required_descriptor in modulestore().get_item(block.location).get_required_module_descriptors():
+                    self.add_descriptor_descendents(required_descriptor, required_depth)
+
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
@@ -988,6 +1100,30 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create ScoresClients, keyed by user id, with pre-fetched data for
+        the given users and locations, using a single query.
+        """
+        # pylint: disable=protected-access
+        clients = {user_id: cls(course_id, user_id) for user_id in user_ids}
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=clients.keys(),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        for student_id, location, correct, total, created in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade', 'created'
+        ):
+            # See fetch_scores for why the course key is mapped back in.
+            clients[student_id]._locations_to_scores[location.map_into_course(course_id)] = cls.Score(
+                correct, total, created
+            )
+        for client in clients.itervalues():
+            client._has_fetched = True
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
@@ -1025,9 +1161,12 @@ def get_score(user_id, usage_key):
     """
     Get the score and max_score for the specified user and xblock usage.
     Returns None if not found.
+
+    The state of the returned StudentModule is not loaded, as it can be large
+    and isn't needed for scores.
     """
     try:
-        student_module = StudentModule.objects.get(
+        student_module = StudentModule.objects.defer('state').get(
             student_id=user_id,
             module_state_key=usage_key,
             course_id=usage_key.course_key,
@@ -38,6 +38,36 @@ def chunks(items, chunk_size):
     return (items[i:i + chunk_size] for i in xrange(0, len(items), chunk_size))
 
 
+def iterate_by_pk(queryset, chunk_size=500):
+    """
+    Yields the objects of queryset in primary key order, fetching at most
+    chunk_size of them per query.
+
+    Each chunk is selected with a ``pk > last seen pk`` condition rather than an
+    OFFSET or a list of values, so that scans of large tables, such as all the
+    StudentModules of a course, use bounded memory and short-lived queries, and
+    stay correct while already visited rows are updated or deleted.
+
+    Arguments:
+        queryset (QuerySet): The objects to iterate over.  Any ordering of the
+            queryset is replaced by primary key ordering.
+        chunk_size (int): The maximum number of objects to fetch per query.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(chunk_queryset[:chunk_size])
+        if not chunk:
+            return
+        # Read before yielding, since deleting an object resets its pk.
+        last_pk = chunk[-1].pk
+        for item in chunk:
+            yield item
+        if len(chunk) < chunk_size:
+            return
+
+
 class ChunkingManager(models.Manager):
     """
     :class:`~Manager` that adds an additional method :meth:`chunked_filter` to provide
@@ -188,6 +218,44 @@ class BaseStudentModuleHistory(models.Model):
         """
         return StudentModule.objects.get(pk=self.student_module_id)
 
+    @staticmethod
+    def saves_history(student_module):
+        """
+        Returns whether history entries are saved for the given StudentModule.
+        """
+        return student_module.module_type in BaseStudentModuleHistory.HISTORY_SAVING_TYPES
+
+    @staticmethod
+    def bulk_save_history(student_modules):
+        """
+        Creates the history entries of the given StudentModules, which were
+        written without sending post_save (e.g. by a bulk update), with a
+        single INSERT into the history store that their post_save handlers
+        would have written to.
+        """
+        student_modules = [
+            student_module for student_module in student_modules
+            if BaseStudentModuleHistory.saves_history(student_module)
+        ]
+        if not student_modules:
+            return
+
+        if settings.FEATURES.get('ENABLE_CSMH_EXTENDED'):
+            history_model = coursewarehistoryextended.models.StudentModuleHistoryExtended
+        else:
+            history_model = StudentModuleHistory
+        history_model.objects.bulk_create([
+            history_model(
+                student_module=student_module,
+                version=None,
+                created=student_module.modified,
+                state=student_module.state,
+                grade=student_module.grade,
+                max_grade=student_module.max_grade,
+            )
+            for student_module in student_modules
+        ])
+
     @staticmethod
     def get_history(student_modules):
         """
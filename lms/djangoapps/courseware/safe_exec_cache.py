@@ -0,0 +1,32 @@
+"""
+The cache of the results of the sandboxed code of capa problems.
+"""
+from capa.safe_exec import SafeExecResultCache
+from django.conf import settings
+from django.core.cache import cache, caches
+
+_RESULT_CACHE = None
+
+
+def get_safe_exec_cache():
+    """
+    Returns the cache that capa problems store the results of their
+    sandboxed code in.
+
+    When the ENABLE_SAFE_EXEC_RESULT_CACHE feature is enabled, this is a
+    SafeExecResultCache shared by all the problems of this process, configured
+    by SAFE_EXEC_RESULT_CACHE_SETTINGS.  Otherwise, it is the default cache.
+    """
+    global _RESULT_CACHE  # pylint: disable=global-statement
+    if not settings.FEATURES.get('ENABLE_SAFE_EXEC_RESULT_CACHE', False):
+        return cache
+
+    if _RESULT_CACHE is None:
+        options = settings.SAFE_EXEC_RESULT_CACHE_SETTINGS
+        _RESULT_CACHE = SafeExecResultCache(
+            backend=caches[options['BACKEND']] if options['BACKEND'] else None,
+            max_size=options['MAX_SIZE'],
+            max_entry_size=options['MAX_ENTRY_SIZE'],
+            timeout=options['TIMEOUT'],
+        )
+    return _RESULT_CACHE
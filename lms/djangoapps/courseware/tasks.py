@@ -0,0 +1,19 @@
+"""
+Asynchronous tasks for the courseware app.
+"""
+from celery import task
+from django.contrib.auth.models import User
+
+from .user_state_buffer import UserStateWriteBuffer
+
+
+@task()
+def flush_user_state_buffer(user_id):
+    """
+    Writes the buffered user state updates of the given user to the database.
+    """
+    try:
+        user = User.objects.get(id=user_id)
+    except User.DoesNotExist:
+        return
+    UserStateWriteBuffer(user).flush()
@@ -2,10 +2,13 @@
 Test for lms courseware app, module data (runtime data storage for XBlocks)
 """
 import json
+import time
 from functools import partial
 
+from django.contrib.auth.signals import user_logged_out
 from django.db import DatabaseError
 from django.test import TestCase
+from django.test.utils import override_settings
 from mock import Mock, patch
 from nose.plugins.attrib import attr
 from xblock.core import XBlock
@@ -27,6 +30,9 @@ from courseware.tests.factories import (
     course_id,
     location
 )
+from courseware.user_state_buffer import UserStateWriteBuffer
+from openedx.core.djangoapps.content.block_structure.block_structure import BlockStructureBlockData
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 from student.tests.factories import UserFactory
 
 
@@ -235,6 +241,128 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
         self.assertEquals(exception_context.exception.saved_field_names, [])
 
 
+@attr(shard=1)
+@override_settings(USER_STATE_WRITE_BEHIND_SETTINGS={'FIELDS': {'problem': ['a_field']}, 'FLUSH_INTERVAL': 60})
+class TestUserStateWriteBehind(CacheIsolationTestCase):
+    """Tests for buffering the updates of whitelisted user_state fields"""
+    ENABLED_CACHES = ['default']
+    # Tell Django to clean out all databases, not just default
+    multi_db = True
+
+    def setUp(self):
+        super(TestUserStateWriteBehind, self).setUp()
+        patcher = patch.dict('django.conf.settings.FEATURES', {'ENABLE_USER_STATE_WRITE_BEHIND': True})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('courseware.tasks.flush_user_state_buffer.apply_async')
+        self.mock_schedule_flush = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value', 'b_field': 'b_value'}))
+        self.user = student_module.student
+        self.kvs = self._create_kvs()
+
+    def _create_kvs(self):
+        """Returns a DjangoKeyValueStore backed by a new FieldDataCache"""
+        field_data_cache = FieldDataCache(
+            [mock_descriptor([mock_field(Scope.user_state, 'a_field')])], course_id, self.user
+        )
+        return DjangoKeyValueStore(field_data_cache)
+
+    def assert_stored_state(self, expected_state):
+        """Asserts that the StudentModule of the user holds the expected state"""
+        self.assertEquals(expected_state, json.loads(StudentModule.objects.get(student=self.user).state))
+
+    def test_buffered_field(self):
+        with self.assertNumQueries(0):
+            self.kvs.set(user_state_key('a_field'), 'new_value')
+        self.assert_stored_state({'a_field': 'a_value', 'b_field': 'b_value'})
+        self.assertEquals(self.mock_schedule_flush.call_count, 1)
+
+        self.kvs.set(user_state_key('a_field'), 'newer_value')
+        self.assertEquals(self.mock_schedule_flush.call_count, 1)
+        self.assertEquals('newer_value', self._create_kvs().get(user_state_key('a_field')))
+
+    def test_unbuffered_field(self):
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        self.kvs.set(user_state_key('b_field'), 'new_value')
+        self.assert_stored_state({'a_field': 'new_value', 'b_field': 'new_value'})
+        self.assertEquals(UserStateWriteBuffer(self.user).get_many([location('usage_id')]), {})
+
+    def test_flush_after_interval(self):
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        with patch('courseware.user_state_buffer.time.time', return_value=time.time() + 60):
+            self.kvs.set(user_state_key('a_field'), 'newer_value')
+        self.assert_stored_state({'a_field': 'newer_value', 'b_field': 'b_value'})
+
+    def test_flush_on_logout(self):
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        user_logged_out.send(sender=self.user.__class__, request=None, user=self.user)
+        self.assert_stored_state({'a_field': 'new_value', 'b_field': 'b_value'})
+        self.assertEquals(UserStateWriteBuffer(self.user).get_many([location('usage_id')]), {})
+
+    def test_delete_buffered_field(self):
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        self.kvs.delete(user_state_key('a_field'))
+        UserStateWriteBuffer(self.user).flush()
+        self.assert_stored_state({'b_field': 'b_value'})
+
+
+@attr(shard=1)
+class TestBlockStructurePrefetch(TestCase):
+    """Tests for prefetching user_state for the blocks of a BlockStructure"""
+    # Tell Django to clean out all databases, not just default
+    multi_db = True
+
+    def setUp(self):
+        super(TestBlockStructurePrefetch, self).setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+
+        self.vertical_key = course_id.make_usage_key('vertical', 'vertical')
+        self.block_structure = BlockStructureBlockData(course_id.make_usage_key('sequential', 'sequential'))
+        self.block_structure._add_relation(  # pylint: disable=protected-access
+            self.block_structure.root_block_usage_key, self.vertical_key,
+        )
+        self.block_structure._add_relation(self.vertical_key, location('usage_id'))  # pylint: disable=protected-access
+
+    def _cache_for_block_structure(self, **kwargs):
+        """
+        Returns a FieldDataCache with the blocks of self.block_structure added.
+        """
+        field_data_cache = FieldDataCache([], course_id, self.user)
+        field_data_cache.add_block_structure_descendents(self.block_structure, **kwargs)
+        return field_data_cache
+
+    def test_prefetch_descendants(self):
+        kvs = DjangoKeyValueStore(self._cache_for_block_structure())
+        with self.assertNumQueries(0):
+            self.assertEquals('a_value', kvs.get(user_state_key('a_field')))
+
+    def test_prefetch_depth(self):
+        field_data_cache = self._cache_for_block_structure(depth=1)
+        self.assertRaises(KeyError, DjangoKeyValueStore(field_data_cache).get, user_state_key('a_field'))
+
+    def test_prefetch_from_block(self):
+        field_data_cache = self._cache_for_block_structure(usage_key=self.vertical_key, depth=1)
+        self.assertEquals('a_value', DjangoKeyValueStore(field_data_cache).get(user_state_key('a_field')))
+
+    @patch('courseware.model_data.FieldDataCache.add_descriptor_descendents')
+    @patch('courseware.model_data.modulestore')
+    def test_prefetch_conditional_sources(self, mock_modulestore, mock_add_descriptor_descendents):
+        conditional_key = course_id.make_usage_key('conditional', 'conditional')
+        self.block_structure._add_relation(self.vertical_key, conditional_key)  # pylint: disable=protected-access
+        source_descriptor = Mock()
+        mock_modulestore.return_value.get_item.return_value.get_required_module_descriptors.return_value = [
+            source_descriptor,
+        ]
+
+        self._cache_for_block_structure(depth=3)
+
+        mock_modulestore.return_value.get_item.assert_called_once_with(conditional_key)
+        mock_add_descriptor_descendents.assert_called_once_with(source_descriptor, 0)
+
+
 @attr(shard=1)
 class TestMissingStudentModule(TestCase):
     # Tell Django to clean out all databases, not just default
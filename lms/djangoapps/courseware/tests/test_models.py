@@ -0,0 +1,39 @@
+"""
+Tests for courseware.models
+"""
+import ddt
+from django.test import TestCase
+from nose.plugins.attrib import attr
+
+from courseware.models import StudentModule, iterate_by_pk
+from courseware.tests.factories import StudentModuleFactory, course_id, location
+
+
+@attr(shard=1)
+@ddt.ddt
+class TestIterateByPk(TestCase):
+    """
+    Tests for iterate_by_pk.
+    """
+    def setUp(self):
+        super(TestIterateByPk, self).setUp()
+        self.student_modules = [
+            StudentModuleFactory(course_id=course_id, module_state_key=location(u'problem_{}'.format(index)))
+            for index in range(5)
+        ]
+
+    @ddt.data(1, 2, 5, 10)
+    def test_iterate(self, chunk_size):
+        queryset = StudentModule.objects.filter(course_id=course_id).order_by('-student')
+        num_queries = len(self.student_modules) // chunk_size + 1
+        with self.assertNumQueries(num_queries):
+            self.assertEqual(list(iterate_by_pk(queryset, chunk_size)), self.student_modules)
+
+    def test_delete_while_iterating(self):
+        queryset = StudentModule.objects.filter(course_id=course_id)
+        visited = []
+        for student_module in iterate_by_pk(queryset, chunk_size=2):
+            visited.append(student_module)
+            student_module.delete()
+        self.assertEqual(len(visited), len(self.student_modules))
+        self.assertFalse(queryset.exists())
@@ -6,10 +6,15 @@ defined in edx_user_state_client.
 from collections import defaultdict
 from unittest import skip
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from edx_user_state_client.tests import UserStateClientTestBase
+from mock import patch
+from opaque_keys.edx.locator import CourseLocator
 
 from courseware.tests.factories import UserFactory
+from courseware import user_state_client
 from courseware.user_state_client import DjangoXBlockUserStateClient
 
 
@@ -34,6 +39,80 @@ class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
         self.client = DjangoXBlockUserStateClient()
         self.users = defaultdict(UserFactory.create)
 
+    def test_bulk_set_many(self):
+        """
+        Test that setting the state of several blocks at once, some of which
+        have stored state, merges their states and records their history.
+        """
+        username = self._user(0)
+        course_key = CourseLocator('org', 'course', 'run')
+        block_keys = [course_key.make_usage_key('problem', 'block_{}'.format(index)) for index in range(3)]
+
+        self.client.set_many(username, {block_keys[0]: {'a_field': 1}})
+        self.client.set_many(username, {block_key: {'b_field': 2} for block_key in block_keys})
+
+        self.assertEqual(
+            {block_state.block_key: block_state.state for block_state in self.client.get_many(username, block_keys)},
+            {
+                block_keys[0]: {'a_field': 1, 'b_field': 2},
+                block_keys[1]: {'b_field': 2},
+                block_keys[2]: {'b_field': 2},
+            },
+        )
+        self.assertEqual(
+            [len(list(self.client.get_history(username, block_key))) for block_key in block_keys],
+            [2, 1, 1],
+        )
+
+    def test_bulk_set_many_queries(self):
+        """
+        Test that setting the state of several blocks at once takes the same
+        number of queries whatever the number of blocks.
+        """
+        username = self._user(0)
+        course_key = CourseLocator('org', 'course', 'run')
+
+        def new_states(num_blocks):
+            """
+            Returns new states for num_blocks blocks, of which the first has stored state.
+            """
+            block_keys = [
+                course_key.make_usage_key('problem', 'block_{}_{}'.format(num_blocks, index))
+                for index in range(num_blocks)
+            ]
+            self.client.set_many(username, {block_keys[0]: {'a_field': 1}})
+            return {block_key: {'b_field': 2} for block_key in block_keys}
+
+        block_states = new_states(2)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.set_many(username, block_states)
+
+        block_states = new_states(10)
+        with self.assertNumQueries(len(queries)):
+            self.client.set_many(username, block_states)
+
+    def test_get_many_projected_fields(self):
+        """
+        Test that the states that don't hold any of the requested fields are
+        not decoded.
+        """
+        username = self._user(0)
+        course_key = CourseLocator('org', 'course', 'run')
+        block_keys = [course_key.make_usage_key('problem', 'block_{}'.format(index)) for index in range(3)]
+
+        self.client.set_many(username, {block_keys[0]: {'a_field': 1, 'b_field': 2}})
+        self.client.set_many(username, {block_keys[1]: {'b_field': 3}})
+        self.client.set_many(username, {block_keys[2]: {'a_field': 4}})
+        self.client.delete(username, block_keys[2])
+
+        with patch.object(user_state_client.json, 'loads', wraps=user_state_client.json.loads) as mock_loads:
+            states = {
+                block_state.block_key: block_state.state
+                for block_state in self.client.get_many(username, block_keys, fields=['a_field'])
+            }
+        self.assertEqual(states, {block_keys[0]: {'a_field': 1}, block_keys[1]: {}})
+        self.assertEqual(mock_loads.call_count, 1)
+
     # We're skipping these tests because the iter_all_by_block and iter_all_by_course
     # are not implemented in the DjangoXBlockUserStateClient
     @skip("Not supported by DjangoXBlockUserStateClient")
@@ -2480,6 +2480,16 @@ class TestRenderXBlock(RenderXBlockTestMixin, ModuleStoreTestCase):
         self.assertEqual(response.status_code, 404)
         self.assertIn('Page not found', response.content)
 
+    def test_render_xblock_of_split_course(self):
+        """
+        Test rendering an XBlock of a split course, whose definitions are
+        prefetched with the branchless course key of the request.
+        """
+        self.setup_course(ModuleStoreEnum.Type.split)
+        self.setup_user(admin=True, enroll=True, login=True)
+        self.assertIsNone(self.course.id.branch)
+        self.verify_response()
+
     def get_response(self, usage_key, url_encoded_params=None):
         """
         Overridable method to get the response from the endpoint that is being tested.
@@ -0,0 +1,245 @@
+"""
+A write-behind buffer for high-frequency, low-value Scope.user_state fields.
+
+Some XBlock fields, such as the position of a learner in a sequence or in a
+video, are updated on almost every handler call, and each update costs a write
+to the courseware_studentmodule table. When the ENABLE_USER_STATE_WRITE_BEHIND
+feature is enabled, updates that only touch the fields whitelisted in
+USER_STATE_WRITE_BEHIND_SETTINGS['FIELDS'] are coalesced in the django cache
+instead, and written to the database in a single batch when:
+
+    * the oldest buffered update is older than the flush interval,
+    * the flush task scheduled when the buffer was started runs, or
+    * the user logs out.
+
+Buffered updates are lost if the cache entry is evicted before it is flushed,
+and concurrent requests of the same user may overwrite each other's buffered
+updates, so only fields that are cheap to lose should be whitelisted.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.dispatch import receiver
+from opaque_keys.edx.keys import CourseKey, UsageKey
+
+from courseware.user_state_client import DjangoXBlockUserStateClient
+
+log = logging.getLogger(__name__)
+
+
+def is_write_behind_enabled():
+    """
+    Returns whether updates of whitelisted user state fields are buffered.
+    """
+    return settings.FEATURES.get('ENABLE_USER_STATE_WRITE_BEHIND', False)
+
+
+class UserStateWriteBuffer(object):
+    """
+    Buffers the updates of whitelisted Scope.user_state fields of a single
+    user in the django cache.
+
+    The buffer is stored in a single cache entry per user, as a dict of:
+        created (float): The time the oldest buffered update was made.
+        blocks (dict): Mapping of serialized usage keys, see _serialize_key,
+            to dicts of buffered field names and values.
+    """
+    CACHE_KEY_FORMAT = u'courseware.user_state_buffer.{}'
+
+    # Buffered updates are kept in the cache well after their flush
+    # interval, so that they aren't lost when a scheduled flush is delayed.
+    CACHE_TIMEOUT = 24 * 60 * 60
+
+    def __init__(self, user):
+        self.user = user
+        self._cache_key = self.CACHE_KEY_FORMAT.format(user.id)
+
+    @staticmethod
+    def is_buffered(block_key, field_names):
+        """
+        Returns whether updates to the given fields of the given block are
+        buffered.
+
+        Arguments:
+            block_key (UsageKey): The block the fields belong to.
+            field_names (iterable of str): The names of the updated fields.
+        """
+        if getattr(block_key, 'aside_type', None):
+            return False
+        buffered_fields = settings.USER_STATE_WRITE_BEHIND_SETTINGS['FIELDS'].get(block_key.block_type)
+        return bool(buffered_fields) and set(field_names).issubset(buffered_fields)
+
+    def get_many(self, block_keys):
+        """
+        Returns the buffered state of the given blocks.
+
+        Arguments:
+            block_keys (list of UsageKey): The blocks to return buffered state for.
+
+        Returns:
+            dict mapping each block key with buffered updates to a dict of its
+            buffered field names and values.
+        """
+        buffered_blocks = self._read()['blocks']
+        if not buffered_blocks:
+            return {}
+        return {
+            block_key: buffered_blocks[_serialize_key(block_key)]
+            for block_key in block_keys
+            if _serialize_key(block_key) in buffered_blocks
+        }
+
+    def add(self, block_keys_to_state):
+        """
+        Buffers the updates of the given blocks that only touch whitelisted
+        fields.
+
+        Arguments:
+            block_keys_to_state (dict): Mapping of UsageKeys to dicts of
+                updated field names and values.
+
+        Returns:
+            dict mapping block keys to the state that must still be written to
+            the database.  This includes the updates that can't be buffered,
+            merged with any updates of the same blocks that were buffered
+            previously, and all the buffered updates once the buffer has
+            expired.
+        """
+        buffer_data = self._read()
+        buffered_blocks = buffer_data['blocks']
+        was_empty = not buffered_blocks
+
+        unbuffered = {}
+        for block_key, state in block_keys_to_state.iteritems():
+            serialized_key = _serialize_key(block_key)
+            if self.is_buffered(block_key, state):
+                buffered_blocks.setdefault(serialized_key, {}).update(state)
+            else:
+                unbuffered[block_key] = dict(buffered_blocks.pop(serialized_key, {}), **state)
+
+        if buffered_blocks and self._has_expired(buffer_data):
+            for serialized_key, state in buffered_blocks.iteritems():
+                block_key = _deserialize_key(serialized_key)
+                unbuffered[block_key] = dict(state, **unbuffered.get(block_key, {}))
+            buffered_blocks = {}
+
+        if buffered_blocks:
+            if was_empty:
+                buffer_data['created'] = time.time()
+            self._write(buffer_data)
+            if was_empty:
+                self._schedule_flush()
+        elif not was_empty:
+            cache.delete(self._cache_key)
+
+        return unbuffered
+
+    def discard(self, block_key, field_names):
+        """
+        Drops the buffered updates of the given fields of the given block,
+        e.g. because the fields are being deleted.
+
+        Arguments:
+            block_key (UsageKey): The block the fields belong to.
+            field_names (iterable of str): The names of the fields to drop.
+        """
+        buffer_data = self._read()
+        block_state = buffer_data['blocks'].get(_serialize_key(block_key))
+        if not block_state:
+            return
+        for field_name in field_names:
+            block_state.pop(field_name, None)
+        if not block_state:
+            del buffer_data['blocks'][_serialize_key(block_key)]
+        self._write(buffer_data)
+
+    def flush(self):
+        """
+        Writes all buffered updates to the database and empties the buffer.
+        """
+        buffered_blocks = self._read()['blocks']
+        if not buffered_blocks:
+            return
+        cache.delete(self._cache_key)
+
+        try:
+            DjangoXBlockUserStateClient(self.user).set_many(
+                self.user.username,
+                {
+                    _deserialize_key(serialized_key): state
+                    for serialized_key, state in buffered_blocks.iteritems()
+                },
+            )
+        except DatabaseError:
+            log.exception(
+                u'Flushing %d buffered user state updates failed for user %s',
+                len(buffered_blocks),
+                self.user.id,
+            )
+
+    def _read(self):
+        """
+        Returns the buffer of this user, or a new one if it is empty.
+        """
+        return cache.get(self._cache_key) or {'created': None, 'blocks': {}}
+
+    def _write(self, buffer_data):
+        """
+        Stores the given buffer of this user, or removes it if it is empty.
+        """
+        if buffer_data['blocks']:
+            cache.set(self._cache_key, buffer_data, self.CACHE_TIMEOUT)
+        else:
+            cache.delete(self._cache_key)
+
+    def _schedule_flush(self):
+        """
+        Schedules a task that flushes this buffer once its flush interval ends,
+        in case the user makes no further updates.
+        """
+        # Imported here to avoid a circular import with courseware.tasks.
+        from courseware.tasks import flush_user_state_buffer
+        flush_user_state_buffer.apply_async(
+            (self.user.id,),
+            countdown=settings.USER_STATE_WRITE_BEHIND_SETTINGS['FLUSH_INTERVAL'],
+        )
+
+    @staticmethod
+    def _has_expired(buffer_data):
+        """
+        Returns whether the oldest update in the given buffer is older than
+        the flush interval.
+        """
+        created = buffer_data['created']
+        flush_interval = settings.USER_STATE_WRITE_BEHIND_SETTINGS['FLUSH_INTERVAL']
+        return created is not None and time.time() - created >= flush_interval
+
+
+def _serialize_key(block_key):
+    """
+    Returns a cacheable representation of the given usage key.  The course key
+    is kept separately, since deprecated usage keys don't serialize the course
+    run.
+    """
+    return (unicode(block_key.course_key), unicode(block_key))
+
+
+def _deserialize_key(serialized_key):
+    """
+    Returns the usage key of the given _serialize_key representation.
+    """
+    course_key, block_key = serialized_key
+    return UsageKey.from_string(block_key).map_into_course(CourseKey.from_string(course_key))
+
+
+@receiver(user_logged_out)
+def flush_user_state_buffer_on_logout(sender, request, user, **kwargs):  # pylint: disable=unused-argument
+    """
+    Writes the buffered user state updates of users that log out.
+    """
+    if user is not None and is_write_behind_enabled():
+        UserStateWriteBuffer(user).flush()
@@ -10,7 +10,9 @@ from time import time
 
 from django.contrib.auth.models import User
 from django.db import transaction
+from django.db.models import Case, TextField, Value, When
 from django.db.utils import IntegrityError
+from django.utils import timezone
 from edx_user_state_client.interface import XBlockUserState, XBlockUserStateClient
 from xblock.fields import Scope
 
@@ -196,36 +198,51 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         self._ddog_histogram(evt_time, 'get_many.blks_requested', len(block_keys))
         self._nr_stat_accumulate('get_many', 'blocks_requested', len(block_keys))
 
+        if fields is not None:
+            # The serialized names of the requested fields, used to skip decoding
+            # states that can't contain any of them.
+            serialized_fields = [json.dumps(field) for field in fields]
+
         modules = self._get_student_modules(username, block_keys)
         for module, usage_key in modules:
             if module.state is None:
                 self._ddog_increment(evt_time, 'get_many.empty_state')
                 continue
 
-            state = json.loads(module.state)
             state_length = len(module.state)
 
             # record this metric before the check for empty state, so that we
             # have some visibility into empty blocks.
             self._ddog_histogram(evt_time, 'get_many.block_size', state_length)
 
-            # If the state is the empty dict, then it has been deleted, and so
-            # conformant UserStateClients should treat it as if it doesn't exist.
-            if state == {}:
-                continue
+            if fields is not None and not any(field in module.state for field in serialized_fields):
+                # None of the requested fields can be in this state, so skip
+                # decoding it, since states can be large.  Deleted states are
+                # still stored as the serialized empty dict.
+                if module.state == '{}':
+                    continue
+                state = {}
+            else:
+                state = json.loads(module.state)
+
+                # If the state is the empty dict, then it has been deleted, and so
+                # conformant UserStateClients should treat it as if it doesn't exist.
+                if state == {}:
+                    continue
+
+                # filter state on fields
+                if fields is not None:
+                    state = {
+                        field: state[field]
+                        for field in fields
+                        if field in state
+                    }
 
             # collect statistics for metric reporting
             self._nr_block_stat_increment('get_many', usage_key.block_type, 'blocks_out')
             self._nr_block_stat_accumulate('get_many', usage_key.block_type, 'size', state_length)
             total_block_count += 1
 
-            # filter state on fields
-            if fields is not None:
-                state = {
-                    field: state[field]
-                    for field in fields
-                    if field in state
-                }
             yield XBlockUserState(username, usage_key, state, module.modified, scope)
 
         # The rest of this method exists only to report metrics.
@@ -270,6 +287,55 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         evt_time = time()
 
+        # Blocks are written in bulk when there are several of them, as when a
+        # vertical of problems is submitted, since there are then a few queries
+        # in all rather than a few per block.
+        if len(block_keys_to_state) > 1:
+            set_results = self._bulk_set_student_modules(user, block_keys_to_state)
+        else:
+            set_results = self._set_student_modules(user, block_keys_to_state)
+
+        for usage_key, state, student_module, created, num_fields_before, num_fields_after in set_results:
+            # DataDog and New Relic reporting
+
+            # record the size of state modifications
+            self._nr_block_stat_accumulate('set_many', usage_key.block_type, 'size', len(student_module.state))
+
+            # Record whether a state row has been created or updated.
+            if created:
+                self._ddog_increment(evt_time, 'set_many.state_created')
+                self._nr_block_stat_increment('set_many', usage_key.block_type, 'blocks_created')
+            else:
+                self._ddog_increment(evt_time, 'set_many.state_updated')
+                self._nr_block_stat_increment('set_many', usage_key.block_type, 'blocks_updated')
+
+            # Event to record number of fields sent in to set/set_many.
+            self._ddog_histogram(evt_time, 'set_many.fields_in', len(state))
+
+            # Event to record number of new fields set in set/set_many.
+            num_new_fields_set = num_fields_after - num_fields_before
+            self._ddog_histogram(evt_time, 'set_many.fields_set', num_new_fields_set)
+
+            # Event to record number of existing fields updated in set/set_many.
+            num_fields_updated = max(0, len(state) - num_new_fields_set)
+            self._ddog_histogram(evt_time, 'set_many.fields_updated', num_fields_updated)
+
+        # Events for the entire set_many call.
+        finish_time = time()
+        duration = (finish_time - evt_time) * 1000  # milliseconds
+        self._ddog_histogram(evt_time, 'set_many.blks_updated', len(block_keys_to_state))
+        self._ddog_histogram(evt_time, 'set_many.response_time', duration)
+        self._nr_stat_accumulate('set_many', 'duration', duration)
+
+    def _set_student_modules(self, user, block_keys_to_state):
+        """
+        Overlays the given states over the stored states of the user's
+        StudentModules for the given blocks, one block at a time.
+
+        Returns a list of (usage_key, state, student_module, created,
+        num_fields_before, num_fields_after) tuples, one per block.
+        """
+        set_results = []
         for usage_key, state in block_keys_to_state.items():
             student_module, created = StudentModule.objects.get_or_create(
                 student=user,
@@ -281,8 +347,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 },
             )
 
-            num_fields_before = num_fields_after = num_new_fields_set = len(state)
-            num_fields_updated = 0
+            num_fields_before = num_fields_after = len(state)
             if not created:
                 if student_module.state is None:
                     current_state = {}
@@ -306,36 +371,86 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                         len(block_keys_to_state), block_keys_to_state.keys()
                     ))
 
-            # DataDog and New Relic reporting
+            set_results.append((usage_key, state, student_module, created, num_fields_before, num_fields_after))
+        return set_results
 
-            # record the size of state modifications
-            self._nr_block_stat_accumulate('set_many', usage_key.block_type, 'size', len(student_module.state))
+    def _bulk_set_student_modules(self, user, block_keys_to_state):
+        """
+        Overlays the given states over the stored states of the user's
+        StudentModules for the given blocks, as _set_student_modules does,
+        but reads the existing StudentModules with a single query and
+        writes them with a single UPDATE, a single INSERT and a bulk INSERT
+        of their history entries.
 
-            # Record whether a state row has been created or updated.
+        Returns a list of (usage_key, state, student_module, created,
+        num_fields_before, num_fields_after) tuples, one per block.
+        """
+        existing_modules = {
+            usage_key: student_module
+            for student_module, usage_key in self._get_student_modules(user.username, block_keys_to_state.keys())
+        }
+        modified = timezone.now()
+
+        set_results, updated_modules, new_modules = [], [], []
+        for usage_key, state in block_keys_to_state.items():
+            student_module = existing_modules.get(usage_key)
+            created = student_module is None
             if created:
-                self._ddog_increment(evt_time, 'set_many.state_created')
-                self._nr_block_stat_increment('set_many', usage_key.block_type, 'blocks_created')
+                student_module = StudentModule(
+                    student=user,
+                    course_id=usage_key.course_key,
+                    module_state_key=usage_key,
+                    state=json.dumps(state),
+                    module_type=usage_key.block_type,
+                )
+                new_modules.append(student_module)
+                num_fields_before = num_fields_after = len(state)
             else:
-                self._ddog_increment(evt_time, 'set_many.state_updated')
-                self._nr_block_stat_increment('set_many', usage_key.block_type, 'blocks_updated')
-
-            # Event to record number of fields sent in to set/set_many.
-            self._ddog_histogram(evt_time, 'set_many.fields_in', len(state))
-
-            # Event to record number of new fields set in set/set_many.
-            num_new_fields_set = num_fields_after - num_fields_before
-            self._ddog_histogram(evt_time, 'set_many.fields_set', num_new_fields_set)
-
-            # Event to record number of existing fields updated in set/set_many.
-            num_fields_updated = max(0, len(state) - num_new_fields_set)
-            self._ddog_histogram(evt_time, 'set_many.fields_updated', num_fields_updated)
+                current_state = {} if student_module.state is None else json.loads(student_module.state)
+                num_fields_before = len(current_state)
+                current_state.update(state)
+                num_fields_after = len(current_state)
+                student_module.state = json.dumps(current_state)
+                student_module.modified = modified
+                updated_modules.append(student_module)
+            set_results.append((usage_key, state, student_module, created, num_fields_before, num_fields_after))
+
+        if updated_modules:
+            # Only the state is updated, so that a score set concurrently by
+            # some other piece of the code isn't overwritten.
+            updated_states = [
+                When(id=student_module.id, then=Value(student_module.state)) for student_module in updated_modules
+            ]
+            StudentModule.objects.filter(id__in=[student_module.id for student_module in updated_modules]).update(
+                state=Case(*updated_states, output_field=TextField()),
+                modified=modified,
+            )
 
-        # Events for the entire set_many call.
-        finish_time = time()
-        duration = (finish_time - evt_time) * 1000  # milliseconds
-        self._ddog_histogram(evt_time, 'set_many.blks_updated', len(block_keys_to_state))
-        self._ddog_histogram(evt_time, 'set_many.response_time', duration)
-        self._nr_stat_accumulate('set_many', 'duration', duration)
+        if new_modules:
+            try:
+                with transaction.atomic():
+                    StudentModule.objects.bulk_create(new_modules)
+            except IntegrityError:
+                # Some of the blocks' StudentModules were created concurrently,
+                # so fall back to setting the new blocks one at a time.
+                new_block_keys_to_state = {
+                    student_module.module_state_key: block_keys_to_state[student_module.module_state_key]
+                    for student_module in new_modules
+                }
+                set_results = [result for result in set_results if result[0] not in new_block_keys_to_state]
+                set_results.extend(self._set_student_modules(user, new_block_keys_to_state))
+                new_modules = []
+            else:
+                # The INSERT doesn't return the ids of the StudentModules,
+                # which their history entries need.
+                if any(BaseStudentModuleHistory.saves_history(student_module) for student_module in new_modules):
+                    new_modules = [
+                        student_module for student_module, _ in
+                        self._get_student_modules(user.username, [module.module_state_key for module in new_modules])
+                    ]
+
+        BaseStudentModuleHistory.bulk_save_history(updated_modules + new_modules)
+        return set_results
 
     def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
         """
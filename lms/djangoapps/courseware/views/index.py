@@ -27,6 +27,7 @@ from lms.djangoapps.courseware.exceptions import CourseAccessRedirect
 from lms.djangoapps.experiments.utils import get_experiment_user_metadata_context
 from lms.djangoapps.gating.api import get_entrance_exam_score_ratio, get_entrance_exam_usage_key
 from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
 from openedx.core.djangoapps.crawlers.models import CrawlersConfig
 from openedx.core.djangoapps.lang_pref import LANGUAGE_KEY
 from openedx.core.djangoapps.monitoring_utils import set_custom_metrics_for_course_key
@@ -334,8 +335,18 @@ class CoursewareIndex(View):
         sets up the runtime, which binds the request user to the section.
         """
         # Pre-fetch all descendant data
-        self.section = modulestore().get_item(self.section.location, depth=None, lazy=False)
-        self.field_data_cache.add_descriptor_descendents(self.section, depth=None)
+        if settings.FEATURES.get('ENABLE_BLOCK_STRUCTURE_FIELD_DATA_PREFETCH'):
+            # The user data is found from the collected course structure, so
+            # the descriptors are only loaded as the section is rendered.
+            self.field_data_cache.add_block_structure_descendents(
+                get_course_in_cache(self.course_key),
+                self.section.location,
+            )
+            modulestore().prefetch_definitions(self.course_key, [self.section.location], depth=None)
+            self.section = modulestore().get_item(self.section.location, depth=None)
+        else:
+            self.section = modulestore().get_item(self.section.location, depth=None, lazy=False)
+            self.field_data_cache.add_descriptor_descendents(self.section, depth=None)
 
         # Bind section to user
         self.section = get_module_for_descriptor(
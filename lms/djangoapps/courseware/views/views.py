@@ -1434,6 +1434,10 @@ def render_xblock(request, usage_key_string, check_if_enrolled=True):
         except CourseAccessRedirect:
             raise Http404("Course not found.")
 
+        # load the definitions of the block and its descendants with one query,
+        # rather than one per block as they're rendered.
+        modulestore().prefetch_definitions(course_key, [usage_key], depth=None)
+
         # get the block, which verifies whether the user has access to the block.
         block, _ = get_module_by_usage_id(
             request, text_type(course_key), text_type(usage_key), disable_staff_debug_info=True, course=course
@@ -21,3 +21,11 @@ def should_persist_grades(course_key):
     Returns whether grades should be persisted.
     """
     return PersistentGradesEnabledFlag.feature_enabled(course_key)
+
+
+def should_batch_grade_iteration():
+    """
+    Returns whether the data for grading learners is to be fetched in
+    batches when iterating over the course grades of many learners.
+    """
+    return settings.FEATURES.get('ENABLE_BATCHED_GRADE_ITERATION', False)
@@ -13,8 +13,20 @@ class CourseData(object):
 
     This is an in-memory object that maintains its own internal
     cache during its lifecycle.
+
+    transformed_structures is passed to get_course_blocks when the
+    structure is transformed, so that the CourseData of users with the
+    same access can share a single transform.
     """
-    def __init__(self, user, course=None, collected_block_structure=None, structure=None, course_key=None):
+    def __init__(
+            self,
+            user,
+            course=None,
+            collected_block_structure=None,
+            structure=None,
+            course_key=None,
+            transformed_structures=None,
+    ):
         if not any([course, collected_block_structure, structure, course_key]):
             raise ValueError(
                 "You must specify one of course, collected_block_structure, structure, or course_key to this method."
@@ -25,6 +37,7 @@ class CourseData(object):
         self._course = course
         self._course_key = course_key
         self._location = None
+        self._transformed_structures = transformed_structures
 
     @property
     def course_key(self):
@@ -55,6 +68,7 @@ class CourseData(object):
                 self.user,
                 self.location,
                 collected_block_structure=self._collected_block_structure,
+                transformed_structures=self._transformed_structures,
             )
         return self._structure
 
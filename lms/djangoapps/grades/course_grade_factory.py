@@ -2,6 +2,7 @@
 Course Grade Factory Class
 """
 from collections import namedtuple
+from itertools import islice
 from logging import getLogger
 
 import dogstats_wrapper as dog_stats_api
@@ -9,10 +10,11 @@ from six import text_type
 
 from openedx.core.djangoapps.signals.signals import COURSE_GRADE_CHANGED, COURSE_GRADE_NOW_PASSED
 
-from .config import assume_zero_if_absent, should_persist_grades
+from .config import assume_zero_if_absent, should_batch_grade_iteration, should_persist_grades
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
-from .models import PersistentCourseGrade, prefetch
+from .models import PersistentCourseGrade, PersistentSubsectionGrade, prefetch
+from .subsection_grade_factory import SubsectionGradeFactory
 
 log = getLogger(__name__)
 
@@ -23,6 +25,10 @@ class CourseGradeFactory(object):
     """
     GradeResult = namedtuple('GradeResult', ['student', 'course_grade', 'error'])
 
+    # Number of students whose grading data is queried at once by iter,
+    # when batched grade iteration is enabled.
+    ITER_BATCH_SIZE = 100
+
     def read(
             self,
             user,
@@ -43,15 +49,7 @@ class CourseGradeFactory(object):
         or course_key should be provided.
         """
         course_data = CourseData(user, course, collected_block_structure, course_structure, course_key)
-        try:
-            return self._read(user, course_data)
-        except PersistentCourseGrade.DoesNotExist:
-            if assume_zero_if_absent(course_data.course_key):
-                return self._create_zero(user, course_data)
-            elif create_if_needed:
-                return self._update(user, course_data)
-            else:
-                return None
+        return self._read_or_create(user, course_data, create_if_needed)
 
     def update(
             self,
@@ -102,23 +100,62 @@ class CourseGradeFactory(object):
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
-        for user in users:
-            with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
-                yield self._iter_grade_result(user, course_data, force_update)
+        if not should_batch_grade_iteration():
+            for user in users:
+                with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
+                    yield self._iter_grade_result(user, course_data, force_update)
+            return
+
+        users = iter(users)
+        while True:
+            batch = list(islice(users, self.ITER_BATCH_SIZE))
+            if not batch:
+                break
+            with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter.prefetch', tags=stats_tags):
+                self._prefetch_batch(batch, course_data)
+            # Course structures are only transformed for the students whose
+            # grades are computed, and those with the same access to the
+            # course share a single transform.
+            transformed_structures = {}
+            try:
+                for user in batch:
+                    with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
+                        yield self._iter_grade_result(user, course_data, force_update, transformed_structures)
+            finally:
+                self._clear_prefetched_batch(course_data)
+
+    @staticmethod
+    def _prefetch_batch(users, course_data):
+        """
+        Queries, with a few queries for all the given users, the data
+        needed to grade each of them, in place of queries for each user.
+        """
+        if should_persist_grades(course_data.course_key):
+            PersistentSubsectionGrade.prefetch(course_data.course_key, users)
+        SubsectionGradeFactory.prefetch_scores(users, course_data)
+
+    @staticmethod
+    def _clear_prefetched_batch(course_data):
+        """
+        Clears the data prefetched by _prefetch_batch, so that it is
+        neither held in memory nor read once it may be stale.
+        """
+        PersistentSubsectionGrade.clear_prefetched_data(course_data.course_key)
+        SubsectionGradeFactory.clear_prefetched_scores()
 
-    def _iter_grade_result(self, user, course_data, force_update):
+    def _iter_grade_result(self, user, course_data, force_update, transformed_structures=None):
         try:
-            kwargs = {
-                'user': user,
-                'course': course_data.course,
-                'collected_block_structure': course_data.collected_structure,
-                'course_key': course_data.course_key
-            }
+            user_course_data = CourseData(
+                user,
+                course_data.course,
+                course_data.collected_structure,
+                course_key=course_data.course_key,
+                transformed_structures=transformed_structures,
+            )
             if force_update:
-                kwargs['force_update_subsections'] = True
-
-            method = CourseGradeFactory().update if force_update else CourseGradeFactory().read
-            course_grade = method(**kwargs)
+                course_grade = self._update(user, user_course_data, force_update_subsections=True)
+            else:
+                course_grade = self._read_or_create(user, user_course_data)
             return self.GradeResult(user, course_grade, None)
         except Exception as exc:  # pylint: disable=broad-except
             # Keep marching on even if this student couldn't be graded for
@@ -131,6 +168,23 @@ class CourseGradeFactory(object):
             )
             return self.GradeResult(user, None, exc)
 
+    def _read_or_create(self, user, course_data, create_if_needed=True):
+        """
+        Returns the stored CourseGrade for the given user and course.
+        If it isn't stored, returns a ZeroCourseGrade if
+        ASSUME_ZERO_GRADE_IF_ABSENT, else if create_if_needed, computes
+        and returns a new CourseGrade, else returns None.
+        """
+        try:
+            return self._read(user, course_data)
+        except PersistentCourseGrade.DoesNotExist:
+            if assume_zero_if_absent(course_data.course_key):
+                return self._create_zero(user, course_data)
+            elif create_if_needed:
+                return self._update(user, course_data)
+            else:
+                return None
+
     @staticmethod
     def _create_zero(user, course_data):
         """
@@ -61,7 +61,7 @@ class Command(BaseCommand):
         event_transaction_id = create_new_event_transaction_id()
         set_event_transaction_type(PROBLEM_SUBMITTED_EVENT_TYPE)
         kwargs = {'modified__range': (modified_start, modified_end), 'module_type': 'problem'}
-        for record in StudentModule.objects.filter(**kwargs):
+        for record in StudentModule.objects.filter(**kwargs).defer('state'):
             task_args = {
                 "user_id": record.student_id,
                 "course_id": unicode(record.course_id),
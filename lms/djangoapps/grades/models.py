@@ -296,6 +296,8 @@ class PersistentSubsectionGrade(TimeStampedModel):
     # track which blocks were visible at the time of grade calculation
     visible_blocks = models.ForeignKey(VisibleBlocks, db_column='visible_blocks_hash', to_field='hashed')
 
+    _CACHE_NAMESPACE = u"grades.models.PersistentSubsectionGrade"
+
     @property
     def full_usage_key(self):
         """
@@ -351,11 +353,39 @@ class PersistentSubsectionGrade(TimeStampedModel):
             user_id: The user associated with the desired grades
             course_key: The course identifier for the desired grades
         """
+        prefetched_grades = get_cache(cls._CACHE_NAMESPACE).get(cls._cache_key(course_key), {})
+        if user_id in prefetched_grades:
+            return prefetched_grades[user_id]
         return cls.objects.select_related('visible_blocks', 'override').filter(
             user_id=user_id,
             course_id=course_key,
         )
 
+    @classmethod
+    def prefetch(cls, course_key, users):
+        """
+        Prefetches all grades, along with their overrides, for the given
+        users in the given course, for use by bulk_read_grades.
+        """
+        prefetched_grades = {user.id: [] for user in users}
+        for grade in cls.objects.select_related('visible_blocks', 'override').filter(
+                user_id__in=prefetched_grades.keys(),
+                course_id=course_key,
+        ):
+            prefetched_grades[grade.user_id].append(grade)
+        get_cache(cls._CACHE_NAMESPACE)[cls._cache_key(course_key)] = prefetched_grades
+
+    @classmethod
+    def clear_prefetched_data(cls, course_key):
+        """
+        Clears grades prefetched for the given course.
+        """
+        get_cache(cls._CACHE_NAMESPACE).pop(cls._cache_key(course_key), None)
+
+    @classmethod
+    def _cache_key(cls, course_key):
+        return u"subsection_grades_cache.{}".format(course_key)
+
     @classmethod
     def update_or_create_grade(cls, **params):
         """
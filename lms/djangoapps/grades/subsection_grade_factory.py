@@ -7,9 +7,12 @@ from courseware.model_data import ScoresClient
 from lms.djangoapps.grades.config import assume_zero_if_absent, should_persist_grades
 from lms.djangoapps.grades.models import PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import possibly_scored
+from openedx.core.djangoapps.request_cache import clear_cache, get_cache
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
-from student.models import anonymous_id_for_user
+from student.models import anonymous_id_digest, anonymous_id_for_user
 from submissions import api as submissions_api
+from submissions.models import ScoreSummary
+from submissions.serializers import UnannotatedScoreSerializer
 
 from .course_data import CourseData
 from .subsection_grade import CreateSubsectionGrade, ReadSubsectionGrade, ZeroSubsectionGrade
@@ -21,6 +24,8 @@ class SubsectionGradeFactory(object):
     """
     Factory for Subsection Grades.
     """
+    _CACHE_NAMESPACE = u"grades.subsection_grade_factory.SubsectionGradeFactory"
+
     def __init__(self, student, course=None, course_structure=None, course_data=None):
         self.student = student
         self.course_data = course_data or CourseData(student, course=course, structure=course_structure)
@@ -98,12 +103,53 @@ class SubsectionGradeFactory(object):
 
         return calculated_grade
 
+    @classmethod
+    def prefetch_scores(cls, users, course_data):
+        """
+        Queries, in bulk, the scores stored in the user state (in CSM) and
+        by the Submissions API for the given users in the course, for use
+        by the factories of those users instead of a query for each user.
+
+        Arguments:
+            users (list[User])
+            course_data (CourseData): The course's data, from which the
+                collected structure is used to determine the scorable
+                blocks for all the users.
+        """
+        course_key = course_data.course_key
+        scorable_locations = [
+            block_key for block_key in course_data.collected_structure if possibly_scored(block_key)
+        ]
+        anonymous_user_ids = {anonymous_id_digest(user, course_key): user.id for user in users}
+        scores_by_anonymous_user_id = _get_submissions_scores_for_students(course_key, anonymous_user_ids.keys())
+        submissions_scores = {
+            user_id: scores_by_anonymous_user_id.get(anonymous_user_id, {})
+            for anonymous_user_id, user_id in anonymous_user_ids.iteritems()
+        }
+
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        cache[cls._cache_key(u'csm_scores', course_key)] = ScoresClient.create_for_users(
+            course_key, [user.id for user in users], scorable_locations,
+        )
+        cache[cls._cache_key(u'submissions_scores', course_key)] = submissions_scores
+
+    @classmethod
+    def clear_prefetched_scores(cls):
+        """
+        Clears all scores prefetched by prefetch_scores.
+        """
+        clear_cache(cls._CACHE_NAMESPACE)
+
     @lazy
     def _csm_scores(self):
         """
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        prefetched_scores = self._get_prefetched_scores(u'csm_scores')
+        if prefetched_scores is not None:
+            return prefetched_scores
+
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
@@ -113,9 +159,25 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        prefetched_scores = self._get_prefetched_scores(u'submissions_scores')
+        if prefetched_scores is not None:
+            return prefetched_scores
+
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
+    def _get_prefetched_scores(self, name):
+        """
+        Returns the student's scores of the given name if they were
+        prefetched by prefetch_scores, else None.
+        """
+        cache_key = self._cache_key(name, self.course_data.course_key)
+        return get_cache(self._CACHE_NAMESPACE).get(cache_key, {}).get(self.student.id)
+
+    @staticmethod
+    def _cache_key(name, course_key):
+        return u"{}.{}".format(name, course_key)
+
     def _get_bulk_cached_grade(self, subsection):
         """
         Returns the student's SubsectionGrade for the subsection,
@@ -161,3 +223,25 @@ class SubsectionGradeFactory(object):
             getattr(subsection, 'subtree_edited_on', None),
             self.student.id,
         ))
+
+
+def _get_submissions_scores_for_students(course_key, anonymous_user_ids):
+    """
+    Returns a dict of the given anonymous user ids to their scores in the
+    course, as returned by submissions_api.get_scores, with a single query
+    for all the students.
+
+    The Submissions API only gets the scores of one student at a time, so
+    this mirrors the query of submissions_api.get_scores; it is the only
+    code of the grades app that depends on the Submissions models.
+    """
+    scores = {anonymous_user_id: {} for anonymous_user_id in anonymous_user_ids}
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=str(course_key),
+        student_item__student_id__in=list(anonymous_user_ids),
+    ).select_related('latest', 'latest__submission', 'student_item')
+    for summary in score_summaries:
+        if not summary.latest.is_hidden():
+            student_item = summary.student_item
+            scores[student_item.student_id][student_item.item_id] = UnannotatedScoreSerializer(summary.latest).data
+    return scores
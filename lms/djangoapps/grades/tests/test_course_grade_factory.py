@@ -8,6 +8,7 @@ from django.conf import settings
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
 from mock import patch
 from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.core.djangoapps.content.block_structure.manager import BlockStructureManager
 from six import text_type
 
 from student.tests.factories import UserFactory
@@ -18,6 +19,7 @@ from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle
 from ..course_grade import CourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
+from ..subsection_grade_factory import SubsectionGradeFactory
 from .base import GradeTestBase
 from .utils import mock_get_score
 
@@ -363,6 +365,45 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         self.assertIsNotNone(all_course_grades[student2])
         self.assertIsNotNone(all_course_grades[student5])
 
+    @patch.dict(settings.FEATURES, {'ENABLE_BATCHED_GRADE_ITERATION': True})
+    @patch.object(CourseGradeFactory, 'ITER_BATCH_SIZE', 2)
+    def test_batched_iteration(self):
+        with patch.dict(settings.FEATURES, {'ENABLE_BATCHED_GRADE_ITERATION': False}):
+            unbatched_grades, _ = self._course_grades_and_errors_for(self.course, self.students)
+
+        with patch.object(
+            SubsectionGradeFactory,
+            'prefetch_scores',
+            wraps=SubsectionGradeFactory.prefetch_scores,
+        ) as mock_prefetch_scores, patch.object(
+            BlockStructureManager,
+            'get_transformed',
+            autospec=True,
+            side_effect=BlockStructureManager.get_transformed,
+        ) as mock_get_transformed:
+            batched_grades, batched_errors = self._course_grades_and_errors_for(self.course, self.students)
+            self.assertEquals(mock_prefetch_scores.call_count, 3)
+            # The students have the same access to the course, so they
+            # share a single transform in each batch.
+            self.assertEquals(mock_get_transformed.call_count, 3)
+
+        self.assertEqual(batched_errors, {})
+        self.assertEqual(
+            {student: course_grade.percent for student, course_grade in batched_grades.iteritems()},
+            {student: course_grade.percent for student, course_grade in unbatched_grades.iteritems()},
+        )
+
+    @patch.dict(settings.FEATURES, {'ENABLE_BATCHED_GRADE_ITERATION': True})
+    def test_batched_iteration_without_computing_grades(self):
+        with persistent_grades_feature_flags(global_flag=True, enabled_for_all_courses=True):
+            with waffle().override(ASSUME_ZERO_GRADE_IF_ABSENT, active=True):
+                with patch.object(BlockStructureManager, 'get_transformed') as mock_get_transformed:
+                    course_grades, errors = self._course_grades_and_errors_for(self.course, self.students)
+        self.assertEqual(errors, {})
+        self.assertTrue(all(isinstance(grade, ZeroCourseGrade) for grade in course_grades.itervalues()))
+        # Course structures are only transformed to compute grades.
+        self.assertFalse(mock_get_transformed.called)
+
     def _course_grades_and_errors_for(self, course, students):
         """
         Simple helper method to iterate through student grades and give us
@@ -18,7 +18,7 @@ from six import text_type
 
 import xmodule.graders as xmgraders
 from lms.djangoapps.certificates.models import CertificateStatuses, GeneratedCertificate
-from courseware.models import StudentModule
+from courseware.models import StudentModule, iterate_by_pk
 from lms.djangoapps.grades.context import grading_context_for_course
 from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
@@ -30,6 +30,7 @@ from shoppingcart.models import (
     RegistrationCodeRedemption
 )
 from student.models import CourseEnrollment, CourseEnrollmentAllowed
+from util.query import use_read_replica_if_available
 
 STUDENT_FEATURES = ('id', 'username', 'first_name', 'last_name', 'is_staff', 'email')
 PROFILE_FEATURES = ('name', 'language', 'location', 'year_of_birth', 'gender',
@@ -434,11 +435,11 @@ def list_problem_responses(course_key, problem_location):
         course_id=course_key,
         module_state_key=problem_key
     )
-    smdat = smdat.order_by('student')
+    smdat = use_read_replica_if_available(smdat.select_related('student'))
 
     return [
         {'username': response.student.username, 'state': response.state}
-        for response in smdat
+        for response in iterate_by_pk(smdat)
     ]
 
 
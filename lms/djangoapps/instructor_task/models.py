@@ -17,12 +17,13 @@ import hashlib
 import json
 import logging
 import os.path
+from tempfile import TemporaryFile
 from uuid import uuid4
 
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.db import models, transaction
 from opaque_keys.edx.django.models import CourseKeyField
 from six import text_type
@@ -216,7 +217,8 @@ class ReportStore(object):
             )
         return DjangoStorageReportStore.from_config(config_name)
 
-    def _get_utf8_encoded_rows(self, rows):
+    @staticmethod
+    def get_utf8_encoded_rows(rows):
         """
         Given a list of `rows` containing unicode strings, return a
         new list of rows with those strings encoded as utf-8 for CSV
@@ -268,12 +270,31 @@ class DjangoStorageReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+
+        The rows are written to a temporary file as they are iterated, so
+        that `rows` can be a generator whose rows are never all in memory.
+        """
+        with TemporaryFile() as output_file:
+            csvwriter = csv.writer(output_file)
+            csvwriter.writerows(self.get_utf8_encoded_rows(rows))
+            output_file.seek(0)
+            self.store(course_id, filename, File(output_file))
+
+    def read_rows(self, course_id, filename):
+        """
+        Given a course_id and filename of a CSV file in the storage backend,
+        yield its rows, with each row's strings decoded from utf-8.
+        """
+        with self.storage.open(self.path_to(course_id, filename)) as csv_file:
+            for row in csv.reader(csv_file):
+                yield [item.decode('utf-8') for item in row]
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file for the given course_id and filename from the
+        storage backend.
         """
-        output_buffer = ContentFile('')
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        self.storage.delete(self.path_to(course_id, filename))
 
     def links_for(self, course_id):
         """
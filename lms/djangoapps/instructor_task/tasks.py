@@ -19,14 +19,20 @@ a problem URL and optionally a student.  These are used to set up the initial va
 of the query for traversing StudentModule objects.
 
 """
+import json
 import logging
 from functools import partial
 
 from celery import task
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.utils.translation import ugettext_noop
 
 from bulk_email.tasks import perform_delegate_email_batches
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting
+from lms.djangoapps.instructor_task.exceptions import DuplicateTaskException
+from lms.djangoapps.instructor_task.models import InstructorTask
+from lms.djangoapps.instructor_task.subtasks import SubtaskStatus, check_subtask_is_valid, update_subtask_status
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
@@ -183,10 +189,69 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
+    if GradeReportSetting.is_enabled():
+        task_fn = partial(CourseGradeReport.generate_shards, xmodule_instance_args, _create_grades_csv_shard_subtask)
+    else:
+        task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+def _create_grades_csv_shard_subtask(xmodule_instance_args, entry_id, shard_index, user_id_range, subtask_status):
+    """
+    Creates the subtask to grade the given shard of a grade report.
+    """
+    return calculate_grades_csv_shard.subtask(
+        (entry_id, xmodule_instance_args, shard_index, user_id_range, subtask_status.to_dict()),
+        task_id=subtask_status.task_id,
+        routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+    )
+
+
+@task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_shard(entry_id, xmodule_instance_args, shard_index, user_id_range, subtask_status_dict):
+    """
+    Grade the users within a range of user ids in a course, as one shard
+    of a grade report, and store their partial report.  The last shard to
+    complete, whether or not it or any other shard failed, finalizes the
+    report: it merges the partial reports of all the shards and pushes the
+    result to an S3 bucket for download, or else marks the task as failed.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('graded')
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    try:
+        check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+    except DuplicateTaskException:
+        # The shard was already graded, or is being graded by another worker.
+        return subtask_status.to_dict()
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    try:
+        task_progress = CourseGradeReport.generate_shard(
+            xmodule_instance_args,
+            entry_id,
+            entry.course_id,
+            json.loads(entry.task_input),
+            action_name,
+            shard_index,
+            user_id_range,
+        )
+    except Exception:  # pylint: disable=broad-except
+        # The failure is recorded in the shard's status rather than raised,
+        # which would fail the parent task while other shards still run.
+        TASK_LOG.exception(u'Task %s, grade report shard %s failed', current_task_id, shard_index)
+        subtask_status.increment(state=FAILURE)
+    else:
+        subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+
+    # The parent task is completed by finalize_shards rather than by the last
+    # shard's status update, since its report isn't ready until then.
+    if update_subtask_status(entry_id, current_task_id, subtask_status, complete_parent=False):
+        CourseGradeReport.finalize_shards(entry_id, entry.course_id)
+    return subtask_status.to_dict()
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
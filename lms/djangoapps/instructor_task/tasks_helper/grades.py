@@ -1,13 +1,16 @@
 """
 Functionality for generating grade reports.
 """
+import json
 import logging
 import re
+import traceback
 from collections import OrderedDict
 from datetime import datetime
-from itertools import chain, izip, izip_longest
+from itertools import chain, count, izip_longest
 from time import time
 
+from celery.states import FAILURE, SUCCESS
 from lazy import lazy
 from pytz import UTC
 from six import text_type
@@ -19,6 +22,9 @@ from lms.djangoapps.certificates.models import CertificateWhitelist, GeneratedCe
 from lms.djangoapps.grades.context import grading_context, grading_context_for_course
 from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore
+from lms.djangoapps.instructor_task.subtasks import queue_subtasks_for_query
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
 from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
@@ -31,7 +37,7 @@ from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import CSVReportWriter, upload_csv_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -193,6 +199,9 @@ class CourseGradeReport(object):
     # Batch size for chunking the list of enrollees in the course.
     USER_BATCH_SIZE = 100
 
+    # Directory of the report store in which shards store their partial reports.
+    SHARDS_DIRECTORY = u'grade_report_shards'
+
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
@@ -202,6 +211,173 @@ class CourseGradeReport(object):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
             return CourseGradeReport()._generate(context)
 
+    @classmethod
+    def generate_shards(cls, _xmodule_instance_args, create_shard_subtask, _entry_id, course_id, _task_input,
+                        action_name):
+        """
+        Public method to generate a grade report in shards, each of which
+        grades the enrolled users within a range of user ids in its own
+        subtask.  Each shard stores a partial report, which the last shard
+        to complete merges into the complete report (see finalize_shards).
+
+        Courses with no more enrolled users than fit in a single shard are
+        graded in the current task instead.
+
+        Arguments:
+            create_shard_subtask: A function of the xmodule_instance_args,
+                the task's entry id, a shard's index, its (first_user_id,
+                last_user_id) range and its initial SubtaskStatus, that
+                returns the shard's subtask.
+        """
+        entry = InstructorTask.objects.get(pk=_entry_id)
+
+        # If this task is re-queued after its shards were queued, as can
+        # happen when celery loses its connection to its broker, don't queue
+        # another set of shards.
+        if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+            TASK_LOG.warning(u'Task %s has already queued its grade report shards', entry.task_id)
+            return json.loads(entry.task_output)
+
+        users_per_shard = GradeReportSetting.current().batch_size
+        users = CourseEnrollment.objects.users_enrolled_in(course_id, include_inactive=True).order_by('id')
+        total_num_users = users.count()
+        if total_num_users <= users_per_shard:
+            return cls.generate(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+
+        shard_indices = count()
+
+        def _create_subtask(user_items, initial_subtask_status):
+            """
+            Creates a shard's subtask for the given ordered user items.
+            """
+            user_id_range = (user_items[0]['pk'], user_items[-1]['pk'])
+            return create_shard_subtask(
+                _xmodule_instance_args, _entry_id, next(shard_indices), user_id_range, initial_subtask_status,
+            )
+
+        return queue_subtasks_for_query(
+            entry,
+            action_name,
+            _create_subtask,
+            [users],
+            [],
+            users_per_shard,
+            total_num_users,
+        )
+
+    @classmethod
+    def generate_shard(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name,
+                       shard_index, user_id_range):
+        """
+        Public method to generate the partial grade report of the given
+        shard, for the enrolled users whose ids are within the given
+        (first_user_id, last_user_id) range.
+        """
+        with modulestore().bulk_operations(course_id):
+            context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+            report = CourseGradeReport()
+            TASK_LOG.info(
+                u'%s, Starting grades shard %s for users %s', context.task_info_string, shard_index, user_id_range,
+            )
+            batched_rows = report._batched_rows(context, user_id_range)
+            with CSVReportWriter(report._success_headers(context)) as success_writer:
+                with CSVReportWriter(report._error_headers()) as error_writer:
+                    report._compile(context, batched_rows, success_writer, error_writer)
+                    success_writer.store(course_id, cls._shard_filename(_entry_id, shard_index, u'grade_report'))
+                    error_writer.store(course_id, cls._shard_filename(_entry_id, shard_index, u'grade_report_err'))
+            return context.task_progress
+
+    @classmethod
+    def finalize_shards(cls, _entry_id, course_id):
+        """
+        Public method to finalize a grade report once all its shards have
+        completed.  If all the shards succeeded, their partial reports are
+        merged, in order, into the complete grade report.  The partial
+        reports are then deleted, whether or not the merge succeeded, and
+        the task is marked as succeeded or failed.
+        """
+        entry = InstructorTask.objects.get(pk=_entry_id)
+        subtask_dict = json.loads(entry.subtasks)
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        shard_indices = range(subtask_dict['total'])
+        try:
+            cls._merge_shards(entry, course_id, subtask_dict, report_store, shard_indices)
+        except Exception as exc:  # pylint: disable=broad-except
+            TASK_LOG.exception(u'Task %s, failed to merge grade report shards', entry.task_id)
+            entry.task_output = InstructorTask.create_output_for_failure(exc, traceback.format_exc())
+            entry.task_state = FAILURE
+        else:
+            TASK_LOG.info(u'Task %s, merged %s grade report shards', entry.task_id, len(shard_indices))
+            entry.task_state = SUCCESS
+        finally:
+            for shard_index in shard_indices:
+                for csv_name in (u'grade_report', u'grade_report_err'):
+                    filename = cls._shard_filename(_entry_id, shard_index, csv_name)
+                    cls._delete_shard_file(report_store, course_id, filename)
+        entry.save_now()
+        return json.loads(entry.task_output)
+
+    @classmethod
+    def _merge_shards(cls, entry, course_id, subtask_dict, report_store, shard_indices):
+        """
+        Merges the partial reports of the given shards of the task of the
+        given entry into the complete grade report.
+        """
+        if subtask_dict['failed'] > 0:
+            raise ValueError(
+                u'{} of the {} grade report shards of task {} failed'.format(
+                    subtask_dict['failed'], subtask_dict['total'], entry.task_id,
+                )
+            )
+
+        def _merged_rows(csv_name):
+            """
+            Yields the header and then the rows of the partial reports with
+            the given name, checking that all their headers match.
+            """
+            header = None
+            for shard_index in shard_indices:
+                rows = report_store.read_rows(course_id, cls._shard_filename(entry.id, shard_index, csv_name))
+                shard_header = next(rows)
+                if header is None:
+                    header = shard_header
+                    yield header
+                elif shard_header != header:
+                    # The course's grading structure changed while the shards ran.
+                    raise ValueError(u'Grade report shard {} has mismatched headers'.format(shard_index))
+                for row in rows:
+                    yield row
+
+        task_progress = json.loads(entry.task_output)
+        date = datetime.now(UTC)
+        upload_csv_to_report_store(_merged_rows(u'grade_report'), 'grade_report', course_id, date)
+        if task_progress['failed'] > 0:
+            upload_csv_to_report_store(_merged_rows(u'grade_report_err'), 'grade_report_err', course_id, date)
+
+    @staticmethod
+    def _delete_shard_file(report_store, course_id, filename):
+        """
+        Deletes a shard's partial CSV from the report store, logging rather
+        than raising any error, so that the other partial CSVs are deleted.
+        A shard that failed may not have stored its partial CSVs.
+        """
+        try:
+            report_store.delete(course_id, filename)
+        except Exception:  # pylint: disable=broad-except
+            TASK_LOG.warning(u'Could not delete grade report shard file %s', filename, exc_info=True)
+
+    @classmethod
+    def _shard_filename(cls, entry_id, shard_index, csv_name):
+        """
+        Returns the report store filename of the given shard's partial CSV.
+        """
+        return u'{directory}/{entry_id}/{shard_index:05d}_{csv_name}.csv'.format(
+            directory=cls.SHARDS_DIRECTORY,
+            entry_id=entry_id,
+            shard_index=shard_index,
+            csv_name=csv_name,
+        )
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
@@ -211,11 +387,12 @@ class CourseGradeReport(object):
         error_headers = self._error_headers()
         batched_rows = self._batched_rows(context)
 
-        context.update_status(u'Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
+        with CSVReportWriter(success_headers) as success_writer, CSVReportWriter(error_headers) as error_writer:
+            context.update_status(u'Compiling grades')
+            self._compile(context, batched_rows, success_writer, error_writer)
 
-        context.update_status(u'Uploading grades')
-        self._upload(context, success_headers, success_rows, error_headers, error_rows)
+            context.update_status(u'Uploading grades')
+            self._upload(context, success_writer, error_writer)
 
         return context.update_status(u'Completed grades')
 
@@ -240,40 +417,38 @@ class CourseGradeReport(object):
         """
         return ["Student ID", "Username", "Error"]
 
-    def _batched_rows(self, context):
+    def _batched_rows(self, context, user_id_range=None):
         """
         A generator of batches of (success_rows, error_rows) for this report.
         """
-        for users in self._batch_users(context):
+        for users in self._batch_users(context, user_id_range):
             users = filter(lambda u: u is not None, users)
             yield self._rows_for_users(context, users)
 
-    def _compile(self, context, batched_rows):
+    def _compile(self, context, batched_rows, success_writer, error_writer):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        Compiles the given batched_rows, as they are computed, into the given
+        CSVReportWriters of success and error rows, for the given context.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = izip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
+        # partition successes and errors
+        for batch_success_rows, batch_error_rows in batched_rows:
+            success_writer.writerows(batch_success_rows)
+            error_writer.writerows(batch_error_rows)
 
         # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
-        context.task_progress.failed = len(error_rows)
+        context.task_progress.succeeded = success_writer.num_rows
+        context.task_progress.failed = error_writer.num_rows
         context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
         context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
 
-    def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
+    def _upload(self, context, success_writer, error_writer):
         """
-        Creates and uploads a CSV for the given headers and rows.
+        Uploads the CSVs of the given CSVReportWriters.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store([success_headers] + success_rows, 'grade_report', context.course_id, date)
-        if len(error_rows) > 0:
-            error_rows = [error_headers] + error_rows
-            upload_csv_to_report_store(error_rows, 'grade_report_err', context.course_id, date)
+        success_writer.upload('grade_report', context.course_id, date)
+        if error_writer.num_rows > 0:
+            error_writer.upload('grade_report_err', context.course_id, date)
 
     def _grades_header(self, context):
         """
@@ -287,15 +462,18 @@ class CourseGradeReport(object):
             grades_header.append(assignment_info['average_header'])
         return grades_header
 
-    def _batch_users(self, context):
+    def _batch_users(self, context, user_id_range=None):
         """
-        Returns a generator of batches of users.
+        Returns a generator of batches of users, optionally limited to the
+        users whose ids are within the given (first, last) range.
         """
         def grouper(iterable, chunk_size=self.USER_BATCH_SIZE, fillvalue=None):
             args = [iter(iterable)] * chunk_size
             return izip_longest(*args, fillvalue=fillvalue)
 
         users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True)
+        if user_id_range is not None:
+            users = users.filter(id__range=user_id_range).order_by('id')
         users = users.select_related('profile')
         return grouper(users)
 
@@ -473,53 +651,55 @@ class ProblemGradeReport(object):
         graded_scorable_blocks = cls._graded_scorable_blocks_to_header(course)
 
         # Just generate the static fields for now.
-        rows = [list(header_row.values()) + ['Enrollment Status', 'Grade'] + _flatten(graded_scorable_blocks.values())]
-        error_rows = [list(header_row.values()) + ['error_msg']]
+        header = list(header_row.values()) + ['Enrollment Status', 'Grade'] + _flatten(graded_scorable_blocks.values())
+        error_header = list(header_row.values()) + ['error_msg']
         current_step = {'step': 'Calculating Grades'}
 
         # Bulk fetch and cache enrollment states so we can efficiently determine
         # whether each user is currently enrolled in the course.
         CourseEnrollment.bulk_fetch_enrollment_states(enrolled_students, course_id)
 
-        for student, course_grade, error in CourseGradeFactory().iter(enrolled_students, course):
-            student_fields = [getattr(student, field_name) for field_name in header_row]
-            task_progress.attempted += 1
-
-            if not course_grade:
-                err_msg = text_type(error)
-                # There was an error grading this student.
-                if not err_msg:
-                    err_msg = u'Unknown error'
-                error_rows.append(student_fields + [err_msg])
-                task_progress.failed += 1
-                continue
-
-            enrollment_status = _user_enrollment_status(student, course_id)
-
-            earned_possible_values = []
-            for block_location in graded_scorable_blocks:
-                try:
-                    problem_score = course_grade.problem_scores[block_location]
-                except KeyError:
-                    earned_possible_values.append([u'Not Available', u'Not Available'])
-                else:
-                    if problem_score.first_attempted:
+        # Rows are written out as students are graded, rather than kept in memory.
+        with CSVReportWriter(header) as writer, CSVReportWriter(error_header) as error_writer:
+            for student, course_grade, error in CourseGradeFactory().iter(enrolled_students, course):
+                student_fields = [getattr(student, field_name) for field_name in header_row]
+                task_progress.attempted += 1
+
+                if not course_grade:
+                    err_msg = text_type(error)
+                    # There was an error grading this student.
+                    if not err_msg:
+                        err_msg = u'Unknown error'
+                    error_writer.writerows([student_fields + [err_msg]])
+                    task_progress.failed += 1
+                    continue
+
+                enrollment_status = _user_enrollment_status(student, course_id)
+
+                earned_possible_values = []
+                for block_location in graded_scorable_blocks:
+                    problem_score = course_grade.problem_scores.get(block_location)
+                    if problem_score is None:
+                        earned_possible_values.append([u'Not Available', u'Not Available'])
+                    elif problem_score.first_attempted:
                         earned_possible_values.append([problem_score.earned, problem_score.possible])
                     else:
                         earned_possible_values.append([u'Not Attempted', problem_score.possible])
 
-            rows.append(student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values))
+                writer.writerows([
+                    student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values)
+                ])
 
-            task_progress.succeeded += 1
-            if task_progress.attempted % status_interval == 0:
-                task_progress.update_task_state(extra_meta=current_step)
+                task_progress.succeeded += 1
+                if task_progress.attempted % status_interval == 0:
+                    task_progress.update_task_state(extra_meta=current_step)
 
-        # Perform the upload if any students have been successfully graded
-        if len(rows) > 1:
-            upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
-        # If there are any error rows, write them out as well
-        if len(error_rows) > 1:
-            upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+            # Perform the upload if any students have been successfully graded
+            if writer.num_rows > 0:
+                writer.upload('problem_grade_report', course_id, start_date)
+            # If there are any error rows, write them out as well
+            if error_writer.num_rows > 0:
+                error_writer.upload('problem_grade_report_err', course_id, start_date)
 
         return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
 
@@ -568,17 +748,17 @@ class ProblemResponses(object):
         features = ['username', 'state']
         header, rows = format_dictlist(student_data, features)
 
-        task_progress.attempted = task_progress.succeeded = len(rows)
+        task_progress.attempted = task_progress.succeeded = len(student_data)
         task_progress.skipped = task_progress.total - task_progress.attempted
 
-        rows.insert(0, header)
-
         current_step = {'step': 'Uploading CSV'}
         task_progress.update_task_state(extra_meta=current_step)
 
         # Perform the upload
         problem_location = re.sub(r'[:/]', '_', problem_location)
         csv_name = 'student_state_from_{}'.format(problem_location)
-        upload_csv_to_report_store(rows, csv_name, course_id, start_date)
+        with CSVReportWriter(header) as writer:
+            writer.writerows(rows)
+            writer.upload(csv_name, course_id, start_date)
 
         return task_progress.update_task_state(extra_meta=current_step)
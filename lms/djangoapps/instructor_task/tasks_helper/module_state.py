@@ -13,7 +13,7 @@ import dogstats_wrapper as dog_stats_api
 from capa.responsetypes import LoncapaProblemError, ResponseError, StudentInputError
 from courseware.courses import get_course_by_id, get_problems_in_section
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
-from courseware.models import StudentModule
+from courseware.models import StudentModule, iterate_by_pk
 from courseware.module_render import get_module_for_descriptor_internal
 from lms.djangoapps.grades.events import GRADES_OVERRIDE_EVENT_TYPE, GRADES_RESCORE_EVENT_TYPE
 from track.event_transaction_utils import create_new_event_transaction_id, set_event_transaction_type
@@ -29,6 +29,9 @@ from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED,
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# Number of StudentModules read per query when visiting all the modules to update.
+MODULE_STATE_CHUNK_SIZE = 500
+
 
 def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
     """
@@ -80,11 +83,11 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
         problems = get_problems_in_section(entrance_exam_url)
         usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
 
-    modules_to_update = _get_modules_to_update(
+    num_modules_to_update, modules_to_update = _get_modules_to_update(
         course_id, usage_keys, student_identifier, filter_fcn, override_score_task
     )
 
-    task_progress = TaskProgress(action_name, len(modules_to_update), start_time)
+    task_progress = TaskProgress(action_name, num_modules_to_update, start_time)
     task_progress.update_task_state()
 
     for module_to_update in modules_to_update:
@@ -400,6 +403,9 @@ def _get_modules_to_update(course_id, usage_keys, student_identifier, filter_fcn
     If `override_score_task` is True and we there were not matching instances of StudentModule, try to create
     those instances. This is only for override scores and the use case is for learners that have missed the deadline.
 
+    Returns a tuple of the number of matched instances and an iterator over them, which reads the
+    instances from the database in chunks of MODULE_STATE_CHUNK_SIZE.
+
     Arguments:
         course_id(str): The unique identifier for the course.
         usage_keys(list): List of UsageKey objects
@@ -424,14 +430,16 @@ def _get_modules_to_update(course_id, usage_keys, student_identifier, filter_fcn
     if student:
         module_query_params['student_id'] = student.id
 
-    student_modules = StudentModule.get_state_by_params(**module_query_params)
+    student_modules = StudentModule.get_state_by_params(**module_query_params).select_related('student')
     if filter_fcn is not None:
         student_modules = filter_fcn(student_modules)
 
-    can_create_student_modules = (override_score_task and (student_modules.count() == 0) and student is not None)
+    num_student_modules = student_modules.count()
+    can_create_student_modules = (override_score_task and (num_student_modules == 0) and student is not None)
     if can_create_student_modules:
         student_modules = [
             StudentModule.objects.get_or_create(course_id=course_id, student=student, module_state_key=key)[0]
             for key in usage_keys
         ]
-    return student_modules
+        return len(student_modules), iter(student_modules)
+    return num_student_modules, iterate_by_pk(student_modules, chunk_size=MODULE_STATE_CHUNK_SIZE)
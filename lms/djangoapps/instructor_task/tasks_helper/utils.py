@@ -1,4 +1,9 @@
+import csv
+from tempfile import TemporaryFile
+
+from django.core.files.base import File
 from eventtracking import tracker
+
 from lms.djangoapps.instructor_task.models import ReportStore
 from util.file import course_filename_prefix_generator
 
@@ -28,18 +33,73 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
         course_id: ID of the course
     """
     report_store = ReportStore.from_config(config_name)
-    report_store.store_rows(
-        course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
-        rows
-    )
+    report_store.store_rows(course_id, _report_filename(csv_name, course_id, timestamp), rows)
     tracker_emit(csv_name)
 
 
+def _report_filename(csv_name, course_id, timestamp):
+    """
+    Returns the filename of the CSV report of the given name.
+    """
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+    )
+
+
+class CSVReportWriter(object):
+    """
+    Writes the rows of a CSV report to a temporary file as they are
+    computed, so that large reports need not be held in memory, and
+    stores the file using ReportStore once the report is complete.
+
+    Usage:
+        with CSVReportWriter(header) as writer:
+            writer.writerows(rows)
+            writer.upload('grade_report', course_id, timestamp)
+    """
+    def __init__(self, header):
+        self.num_rows = 0
+        self._file = TemporaryFile()
+        self._csv_writer = csv.writer(self._file)
+        self._csv_writer.writerows(ReportStore.get_utf8_encoded_rows([header]))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def writerows(self, rows):
+        """
+        Writes the given rows, each an iterable of strings, to the report.
+        """
+        for row in ReportStore.get_utf8_encoded_rows(rows):
+            self._csv_writer.writerow(row)
+            self.num_rows += 1
+
+    def upload(self, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
+        """
+        Stores the report like upload_csv_to_report_store does.
+        """
+        self.store(course_id, _report_filename(csv_name, course_id, timestamp), config_name)
+        tracker_emit(csv_name)
+
+    def store(self, course_id, filename, config_name='GRADES_DOWNLOAD'):
+        """
+        Stores the report in the ReportStore, with the given filename.
+        """
+        self._file.seek(0)
+        ReportStore.from_config(config_name).store(course_id, filename, File(self._file))
+
+    def close(self):
+        """
+        Closes, and so deletes, the report's temporary file.
+        """
+        self._file.close()
+
+
 def tracker_emit(report_name):
     """
     Emits a 'report.requested' event for the given report.
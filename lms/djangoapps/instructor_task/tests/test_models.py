@@ -49,6 +49,19 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_store_rows(self):
+        """
+        Test that rows given by a generator are stored, and can be read
+        back, with their unicode strings intact.
+        """
+        report_store = self.create_report_store()
+        rows = [[u'Username', u'Grade'], [u'ni\xf1o', u'0.5'], [u'student', u'1.0']]
+        report_store.store_rows(self.course_id, 'report.csv', (row for row in rows))
+
+        self.assertEqual(list(report_store.read_rows(self.course_id, 'report.csv')), rows)
+        report_store.delete(self.course_id, 'report.csv')
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
@@ -16,6 +16,7 @@ from datetime import datetime
 
 import ddt
 import unicodecsv
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
@@ -35,6 +36,9 @@ from courseware.tests.factories import InstructorFactory
 from instructor_analytics.basic import UNAVAILABLE
 from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting
+from lms.djangoapps.instructor_task.subtasks import update_subtask_status
+from lms.djangoapps.instructor_task.tasks import calculate_grades_csv_shard
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
     upload_enrollment_report,
@@ -54,6 +58,7 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_course_survey_report,
     upload_ora2_data
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -84,7 +89,7 @@ from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
 from xmodule.partitions.partitions import Group, UserPartition
 
-from ..models import ReportStore
+from ..models import InstructorTask, ReportStore
 from ..tasks_helper.utils import UPDATE_STATUS_FAILED, UPDATE_STATUS_SUCCEEDED
 
 
@@ -151,6 +156,94 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_sharded_report(self, _mock_current_task):
+        """
+        Test that the partial reports of the shards of a grade report are
+        merged, in order, into the complete report.
+        """
+        GradeReportSetting.objects.create(enabled=True, batch_size=2)
+        students = [
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+            for index in range(5)
+        ]
+        entry = InstructorTaskFactory.create(task_type='grade_course', course_id=self.course.id, task_id='task')
+
+        shards = []
+
+        def create_shard_subtask(_xmodule_instance_args, _entry_id, shard_index, user_id_range, subtask_status):
+            """
+            Records the shard instead of creating its subtask.
+            """
+            shards.append((shard_index, user_id_range, subtask_status))
+            return Mock()
+
+        CourseGradeReport.generate_shards(None, create_shard_subtask, entry.id, self.course.id, {}, 'graded')
+        self.assertEqual([shard_index for shard_index, _, _ in shards], [0, 1, 2])
+
+        # Complete the shards out of order.
+        for shard_index, user_id_range, subtask_status in reversed(shards):
+            task_progress = CourseGradeReport.generate_shard(
+                None, entry.id, self.course.id, {}, 'graded', shard_index, user_id_range,
+            )
+            subtask_status.increment(succeeded=task_progress.succeeded, state=SUCCESS)
+            update_subtask_status(entry.id, subtask_status.task_id, subtask_status, complete_parent=False)
+        self.assertNotEqual(InstructorTask.objects.get(pk=entry.id).task_state, SUCCESS)
+
+        result = CourseGradeReport.finalize_shards(entry.id, self.course.id)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, result)
+        self.assertEqual(InstructorTask.objects.get(pk=entry.id).task_state, SUCCESS)
+        self.verify_rows_in_csv(
+            [{'Student ID': unicode(student.id), 'Username': student.username} for student in students],
+            ignore_other_columns=True,
+        )
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_sharded_report_with_failed_shard(self, _mock_current_task):
+        """
+        Test that when a shard fails, the last shard to complete fails the
+        task and deletes the partial reports of all the shards.
+        """
+        GradeReportSetting.objects.create(enabled=True, batch_size=2)
+        for index in range(5):
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+        entry = InstructorTaskFactory.create(task_type='grade_course', course_id=self.course.id, task_id='task')
+
+        shards = []
+
+        def create_shard_subtask(_xmodule_instance_args, _entry_id, shard_index, user_id_range, subtask_status):
+            """
+            Records the shard instead of creating its subtask.
+            """
+            shards.append((shard_index, user_id_range, subtask_status))
+            return Mock()
+
+        CourseGradeReport.generate_shards(None, create_shard_subtask, entry.id, self.course.id, {}, 'graded')
+        generate_shard = CourseGradeReport.generate_shard
+
+        def generate_shard_or_fail(*args):
+            """
+            Fails the second shard, and generates the others.
+            """
+            if args[5] == 1:
+                raise Exception('Shard failed')
+            return generate_shard(*args)
+
+        with patch.object(CourseGradeReport, 'generate_shard', side_effect=generate_shard_or_fail):
+            for shard_index, user_id_range, subtask_status in shards:
+                self.assertNotIn(InstructorTask.objects.get(pk=entry.id).task_state, [SUCCESS, FAILURE])
+                calculate_grades_csv_shard(entry.id, None, shard_index, user_id_range, subtask_status.to_dict())
+
+        self.assertEqual(InstructorTask.objects.get(pk=entry.id).task_state, FAILURE)
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        for shard_index, _, _ in shards:
+            for csv_name in (u'grade_report', u'grade_report_err'):
+                filename = CourseGradeReport._shard_filename(  # pylint: disable=protected-access
+                    entry.id, shard_index, csv_name,
+                )
+                self.assertFalse(report_store.storage.exists(report_store.path_to(self.course.id, filename)))
+        self.assertEqual(report_store.links_for(self.course.id), [])
+
     def test_cohort_data_in_grading(self):
         """
         Test that cohort data is included in grades csv if cohort configuration is enabled for course.
@@ -909,6 +1002,47 @@ class TestProblemReportSplitTestContent(TestReportMixin, TestConditionalContent,
             ))
         ])
 
+    def test_problem_grade_report_unattempted(self):
+        """
+        Test that the problems a student can't access are reported as Not
+        Available, and the ones they haven't attempted as Not Attempted.
+        """
+        self.submit_student_answer(self.student_a.username, self.problem_a_url, [self.OPTION_1, self.OPTION_1])
+
+        with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
+            result = ProblemGradeReport.generate(None, None, self.course.id, None, 'graded')
+            self.assertDictContainsSubset(
+                {'action_name': 'graded', 'attempted': 2, 'succeeded': 2, 'failed': 0}, result
+            )
+
+        problem_names = [u'Homework 1: Subsection - problem_a_url', u'Homework 1: Subsection - problem_b_url']
+        header_row = [u'Student ID', u'Email', u'Username', u'Enrollment Status', u'Grade']
+        for problem in problem_names:
+            header_row += [problem + ' (Earned)', problem + ' (Possible)']
+
+        self.verify_rows_in_csv([
+            dict(zip(
+                header_row,
+                [
+                    unicode(self.student_a.id),
+                    self.student_a.email,
+                    self.student_a.username,
+                    ENROLLED_IN_COURSE,
+                    u'1.0', u'2.0', u'2.0', u'Not Available', u'Not Available'
+                ]
+            )),
+            dict(zip(
+                header_row,
+                [
+                    unicode(self.student_b.id),
+                    self.student_b.email,
+                    self.student_b.username,
+                    ENROLLED_IN_COURSE,
+                    u'0.0', u'Not Available', u'Not Available', u'Not Attempted', u'2.0'
+                ]
+            ))
+        ])
+
     def test_problem_grade_report_valid_columns_order(self):
         """
         Test that in the CSV grade report columns are placed in the proper order
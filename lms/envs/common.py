@@ -208,6 +208,26 @@ FEATURES = {
     # CSV files to the configured storage backend and give links for downloads.
     'ENABLE_GRADE_DOWNLOADS': False,
 
+    # Fetch the scores and persisted subsection grades of learners in
+    # batches, with a few queries per batch, when iterating over the
+    # course grades of many learners (e.g., for grade reports).
+    'ENABLE_BATCHED_GRADE_ITERATION': False,
+
+    # Buffer the updates of the high-frequency user state fields listed in
+    # USER_STATE_WRITE_BEHIND_SETTINGS in the cache, and write them to
+    # courseware_studentmodule in batches rather than on every update.
+    'ENABLE_USER_STATE_WRITE_BEHIND': False,
+
+    # Determine which user data to prefetch for the blocks of a subsection on
+    # the courseware page from the cached course block structure, instead of
+    # walking the descriptors of the blocks.
+    'ENABLE_BLOCK_STRUCTURE_FIELD_DATA_PREFETCH': False,
+
+    # Cache the results of the sandboxed code of capa problems in a bounded
+    # in-process tier in front of the SAFE_EXEC_RESULT_CACHE_SETTINGS
+    # backend, rather than only in the default cache.
+    'ENABLE_SAFE_EXEC_RESULT_CACHE': False,
+
     # whether to use password policy enforcement or not
     'ENFORCE_PASSWORD_POLICY': True,
 
@@ -897,6 +917,11 @@ MODULESTORE = {
     }
 }
 
+# The maximum size, in bytes, of the course structures and block definitions
+# from the 'course_structure_cache' that each process also keeps in memory.  0
+# disables the in-process cache.
+COURSE_STRUCTURE_LOCAL_CACHE_SIZE = 0
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -910,6 +935,26 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Options of the pool of long-lived sandboxes that capa problems run
+    # their code in, see capa.safe_exec.worker_pool.configure.  A size of 0
+    # starts a new sandbox for each execution.
+    #
+    # A sandbox only runs the code of one course, but the modules it preloads
+    # are shared by all the problems of that course it runs, so only enable
+    # the pool where course authors are trusted not to tamper with each
+    # other's problems.  The CPU limit above then applies to all the
+    # executions of a sandbox together, CPU * max_executions seconds, so each
+    # execution is only bounded by the REALTIME limit: a pool is refused when
+    # REALTIME is not set.
+    'worker_pool': {
+        'size': 0,
+        # How many executions does a sandbox run before it is replaced?
+        'max_executions': 100,
+        # How much resident memory (in bytes) can a sandbox grow to before it
+        # is replaced?
+        'max_memory': 256 * 1024 * 1024,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1312,6 +1357,7 @@ MIDDLEWARE_CLASSES = [
 
     'django_comment_client.utils.ViewNameMiddleware',
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'courseware.middleware.ConfigureCodeJailWorkerPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -1973,12 +2019,51 @@ BLOCK_STRUCTURES_SETTINGS = dict(
     # Maximum number of retries per task.
     TASK_MAX_RETRIES=5,
 
+    # Maximum total number of blocks of the block structures kept in
+    # the in-process cache of each worker, when the
+    # block_structure.in_process_cache waffle switch is enabled.
+    PROCESS_CACHE_MAX_BLOCKS=50000,
+
     # Backend storage
     # STORAGE_CLASS='storages.backends.s3boto.S3BotoStorage',
     # STORAGE_KWARGS=dict(bucket='nim-beryl-test'),
     # DIRECTORY_PREFIX='/modeltest/',
 )
 
+########################## User State Write-Behind ##############################
+
+USER_STATE_WRITE_BEHIND_SETTINGS = dict(
+    # Mapping of block types to the names of the Scope.user_state fields
+    # whose updates are buffered when the ENABLE_USER_STATE_WRITE_BEHIND
+    # feature is enabled.  Updates that touch any other field of a block
+    # are written immediately, along with its buffered updates.
+    FIELDS={
+        'sequential': ['position'],
+        'video': ['saved_video_position'],
+    },
+
+    # Maximum time, in seconds, that updates are kept in the buffer
+    # before they are written to the database.
+    FLUSH_INTERVAL=60,
+)
+
+########################## Safe Exec Result Cache ##############################
+
+SAFE_EXEC_RESULT_CACHE_SETTINGS = dict(
+    # Name of the cache shared by all workers, or None to only cache results
+    # in each process.
+    BACKEND='default',
+
+    # Total size, in bytes once pickled, of the results kept in each process.
+    MAX_SIZE=64 * 1024 * 1024,
+
+    # Size, in bytes once pickled, of the largest result that is cached.
+    MAX_ENTRY_SIZE=512 * 1024,
+
+    # Time, in seconds, that results are cached for.
+    TIMEOUT=24 * 60 * 60,
+)
+
 ################################ Bulk Email ###################################
 
 # Suffix used to construct 'from' email address for bulk emails.
@@ -3,12 +3,12 @@ Module with family of classes for block structures.
     BlockStructure - responsible for block existence and relations.
     BlockStructureBlockData - responsible for block & transformer data.
     BlockStructureModulestoreData - responsible for xBlock data.
+    BlockIndex - responsible for representing sets of blocks as bitsets.
 
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
     _BlockData - Data structure for a single block's data.
 """
-from copy import deepcopy
 from functools import partial
 from logging import getLogger
 
@@ -39,6 +39,16 @@ class _BlockRelations(object):
         # list [UsageKey]
         self.children = []
 
+    def copy(self):
+        """
+        Returns a copy of these relations that can be modified
+        without affecting this instance.
+        """
+        block_relations = _BlockRelations()
+        block_relations.parents = list(self.parents)
+        block_relations.children = list(self.children)
+        return block_relations
+
 
 class BlockStructure(object):
     """
@@ -62,6 +72,14 @@ class BlockStructure(object):
         # dict {UsageKey: _BlockRelations}
         self._block_relations = {}
 
+        # Set of usage keys of the blocks whose relations are owned by
+        # this block structure, or None if all relations are owned.
+        # Relations that are not owned are shared with other block
+        # structures (see BlockStructureBlockData.copy) and are copied
+        # before they are modified.
+        # set(UsageKey) or None
+        self._owned_relations = None
+
         # Add the root block.
         self._add_block(self._block_relations, root_block_usage_key)
 
@@ -120,7 +138,7 @@ class BlockStructure(object):
                 new root of the block structure.
         """
         self.root_block_usage_key = usage_key
-        self._block_relations[usage_key].parents = []
+        self._get_writable_relations(usage_key).parents = []
 
     def __contains__(self, usage_key):
         """
@@ -228,6 +246,7 @@ class BlockStructure(object):
 
         # Replace this structure's relations with the newly pruned one.
         self._block_relations = pruned_block_relations
+        self._owned_relations = None
 
     def _add_relation(self, parent_key, child_key):
         """
@@ -237,8 +256,27 @@ class BlockStructure(object):
             parent_key (UsageKey) - Usage key of the parent block.
             child_key (UsageKey) - Usage key of the child block.
         """
+        if self._owned_relations is not None:
+            for usage_key in (parent_key, child_key):
+                if usage_key in self._block_relations:
+                    self._get_writable_relations(usage_key)
+                else:
+                    self._owned_relations.add(usage_key)
         self._add_to_relations(self._block_relations, parent_key, child_key)
 
+    def _get_writable_relations(self, usage_key):
+        """
+        Returns the relations of the block identified by the given
+        usage_key, first copying them if they are shared with other
+        block structures.
+        """
+        block_relations = self._block_relations[usage_key]
+        if self._owned_relations is not None and usage_key not in self._owned_relations:
+            block_relations = block_relations.copy()
+            self._block_relations[usage_key] = block_relations
+            self._owned_relations.add(usage_key)
+        return block_relations
+
     @staticmethod
     def _add_to_relations(block_relations, parent_key, child_key):
         """
@@ -326,7 +364,15 @@ class TransformerData(FieldData):
     """
     Data structure to encapsulate collected data for a transformer.
     """
-    pass
+    def copy(self):
+        """
+        Returns a copy of this TransformerData whose fields can be
+        modified without affecting this instance.  The field values
+        themselves are not copied.
+        """
+        transformer_data = TransformerData()
+        transformer_data.fields = dict(self.fields)
+        return transformer_data
 
 
 class TransformerDataMap(dict):
@@ -369,10 +415,7 @@ class TransformerDataMap(dict):
             map[TransformerClass] or
             map['transformer_name']
         """
-        try:
-            return key.name()
-        except AttributeError:
-            return key
+        return _transformer_name(key)
 
 
 class BlockData(FieldData):
@@ -391,6 +434,64 @@ class BlockData(FieldData):
         # Map of transformer name to its block-specific data.
         self.transformer_data = TransformerDataMap()
 
+    def copy(self):
+        """
+        Returns a copy of this BlockData whose fields and transformer
+        data can be modified without affecting this instance.  The
+        field values themselves are not copied.
+        """
+        block_data = BlockData(self.location)
+        block_data.fields = dict(self.fields)
+        for transformer_name, transformer_data in self.transformer_data.iteritems():
+            block_data.transformer_data[transformer_name] = transformer_data.copy()
+        return block_data
+
+
+class BlockIndex(object):
+    """
+    An immutable assignment of consecutive integer indices to the blocks
+    of a collected block structure.
+
+    The index allows sets of blocks to be represented as bitsets:
+    integers whose bit at a block's index is set if and only if the
+    block is in the set.  Bitsets that are computed at collect time can
+    then be combined at transform time with a few integer operations,
+    rather than with a function call for each block.
+    """
+    def __init__(self, block_keys):
+        """
+        Arguments:
+            block_keys (iterable(UsageKey)) - The usage keys of the
+                blocks to index, in the order of their indices.
+        """
+        self.block_keys = tuple(block_keys)
+        self._indices = {block_key: index for index, block_key in enumerate(self.block_keys)}
+
+    def __len__(self):
+        return len(self.block_keys)
+
+    def bitset(self, block_keys):
+        """
+        Returns the bitset of the given block keys.  Keys that are not
+        in the index are ignored.
+        """
+        bitset = 0
+        for block_key in block_keys:
+            index = self._indices.get(block_key)
+            if index is not None:
+                bitset |= 1 << index
+        return bitset
+
+    def iter_block_keys(self, bitset):
+        """
+        Yields the usage keys of the blocks in the given bitset, in the
+        order of their indices.
+        """
+        while bitset:
+            lowest_bit = bitset & -bitset
+            yield self.block_keys[lowest_bit.bit_length() - 1]
+            bitset ^= lowest_bit
+
 
 class BlockStructureBlockData(BlockStructure):
     """
@@ -401,7 +502,7 @@ class BlockStructureBlockData(BlockStructure):
     # update this value whenever the data structure changes. Dependent storage
     # layers can then use this value when serializing/deserializing block
     # structures, and invalidating any previously cached/stored data.
-    VERSION = 2
+    VERSION = 3
 
     def __init__(self, root_block_usage_key):
         super(BlockStructureBlockData, self).__init__(root_block_usage_key)
@@ -414,24 +515,67 @@ class BlockStructureBlockData(BlockStructure):
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+        # Map of a transformer's name to a function that loads the
+        # transformer's block-specific data into a given block data map.
+        # Entries exist only for transformers whose block-specific data
+        # has not been loaded yet, which allows the data of each
+        # transformer to be loaded lazily from storage.
+        # dict {string: function(dict {UsageKey: BlockData})}
+        self._transformer_block_data_loaders = {}
+
+        # Index of the blocks that were in the block structure when its
+        # data was collected, or None if the blocks were not indexed.
+        # Transformers may collect bitsets of blocks over this index.
+        # BlockIndex or None
+        self.block_index = None
+
+        # Sets of usage keys of the blocks whose BlockData, and of names
+        # of the transformers whose non-block-specific TransformerData,
+        # are owned by this block structure, or None if all are owned.
+        # As with _owned_relations, data that is not owned is shared
+        # with other block structures and is copied before it is
+        # modified.
+        # set(UsageKey) or None
+        self._owned_block_data = None
+        # set(string) or None
+        self._owned_transformer_data = None
+
     def copy(self):
         """
         Returns a new instance of BlockStructureBlockData with a
-        deep-copy of this instance's contents.
+        copy-on-write view of this instance's contents.
+
+        The new instance shares the relations and data of all blocks
+        with this instance.  Either instance copies a block's relations
+        or data only when it first modifies them, so the cost of a copy
+        is proportional to the number of blocks that are modified rather
+        than to the size of the block structure.
+
+        Note: Values of xBlock fields and of transformer data are not
+        copied, so they must not be mutated in place once collected.
         """
         from .factory import BlockStructureFactory
-        return BlockStructureFactory.create_new(
+
+        # Data that is not loaded yet stays lazily loaded in both
+        # instances; each loads it into its own copies of the blocks.
+        block_structure = BlockStructureFactory.create_new(
             self.root_block_usage_key,
-            deepcopy(self._block_relations),
-            deepcopy(self.transformer_data),
-            deepcopy(self._block_data_map),
+            dict(self._block_relations),
+            TransformerDataMap(self.transformer_data),
+            dict(self._block_data_map),
+            transformer_block_data_loaders=dict(self._transformer_block_data_loaders),
+            block_index=self.block_index,
         )
+        self._share_all()
+        block_structure._share_all()  # pylint: disable=protected-access
+        return block_structure
 
     def iteritems(self):
         """
         Returns iterator of (UsageKey, BlockData) pairs for all
         blocks in the BlockStructure.
         """
+        self._load_all_transformer_block_data()
         return self._block_data_map.iteritems()
 
     def itervalues(self):
@@ -439,12 +583,19 @@ class BlockStructureBlockData(BlockStructure):
         Returns iterator of BlockData for all blocks in the
         BlockStructure.
         """
+        self._load_all_transformer_block_data()
         return self._block_data_map.itervalues()
 
     def __getitem__(self, usage_key):
         """
         Returns the BlockData associated with the given key.
+
+        Note: Since the returned BlockData gives direct access to the
+        data of all transformers, any lazily loaded transformer data is
+        loaded first.  Use get_xblock_field and get_transformer_block_field
+        to access only the data that is needed.
         """
+        self._load_all_transformer_block_data()
         return self._block_data_map[usage_key]
 
     def get_xblock_field(self, usage_key, field_name, default=None):
@@ -497,7 +648,7 @@ class BlockStructureBlockData(BlockStructure):
             value (any picklable type) - The value to associate with the
                 given key for the given transformer's data.
         """
-        setattr(self.transformer_data.get_or_create(transformer), key, value)
+        setattr(self._get_writable_transformer_data(transformer), key, value)
 
     def get_transformer_block_data(self, usage_key, transformer):
         """
@@ -513,6 +664,7 @@ class BlockStructureBlockData(BlockStructure):
             transformer (BlockStructureTransformer) - The transformer
                 whose dictionary data is requested.
         """
+        self._load_transformer_block_data(transformer)
         return self._block_data_map[usage_key].transformer_data[transformer]
 
     def get_transformer_block_field(self, usage_key, transformer, key, default=None):
@@ -558,6 +710,7 @@ class BlockStructureBlockData(BlockStructure):
                 given key for the given transformer's data for the
                 requested block.
         """
+        self._load_transformer_block_data(transformer)
         setattr(
             self._get_or_create_block(usage_key).transformer_data.get_or_create(transformer),
             key,
@@ -576,8 +729,9 @@ class BlockStructureBlockData(BlockStructure):
             transformer (BlockStructureTransformer) - The transformer
                 whose data entry is to be deleted.
         """
+        self._load_transformer_block_data(transformer)
         try:
-            transformer_block_data = self.get_transformer_block_data(usage_key, transformer)
+            transformer_block_data = self._get_writable_block(usage_key).transformer_data[transformer]
             delattr(transformer_block_data, key)
         except (AttributeError, KeyError):
             pass
@@ -607,11 +761,11 @@ class BlockStructureBlockData(BlockStructure):
 
         # Remove block from its children.
         for child in children:
-            self._block_relations[child].parents.remove(usage_key)
+            self._get_writable_relations(child).parents.remove(usage_key)
 
         # Remove block from its parents.
         for parent in parents:
-            self._block_relations[parent].children.remove(usage_key)
+            self._get_writable_relations(parent).children.remove(usage_key)
 
         # Remove block.
         self._block_relations.pop(usage_key, None)
@@ -623,6 +777,29 @@ class BlockStructureBlockData(BlockStructure):
                 for parent in parents:
                     self._add_relation(parent, child)
 
+    def remove_blocks_in_bitset(self, bitset, keep_descendants):
+        """
+        Removes the blocks in the given bitset over the block structure's
+        block_index.  See remove_block for a description of the removal
+        of each block.
+
+        Since blocks are indexed in topological order, when descendants
+        are not kept, blocks that were left without any parents by the
+        removal of their ancestors are skipped; they are unreachable and
+        are removed by _prune_unreachable.
+
+        Arguments:
+            bitset (int) - Bitset of the blocks that are to be removed.
+
+            keep_descendants (bool) - See the description in
+                remove_block.
+        """
+        for block_key in self.block_index.iter_block_keys(bitset):
+            if block_key not in self:
+                continue
+            if keep_descendants or self.get_parents(block_key) or block_key == self.root_block_usage_key:
+                self.remove_block(block_key, keep_descendants)
+
     def create_universal_filter(self):
         """
         Returns a filter function that always returns True for all blocks.
@@ -734,19 +911,126 @@ class BlockStructureBlockData(BlockStructure):
             raise TransformerException('Version attributes are not set on transformer {0}.', transformer.name())
         self.set_transformer_data(transformer, TRANSFORMER_VERSION_KEY, transformer.WRITE_VERSION)
 
+    def _index_blocks(self):
+        """
+        Assigns the block_index of the block structure to its current
+        blocks, in topological order.
+        """
+        self.block_index = BlockIndex(self.topological_traversal())
+
+    def _load_transformer_block_data(self, transformer):
+        """
+        Loads the block-specific data of the given transformer, if it
+        has not been loaded yet.
+        """
+        if self._transformer_block_data_loaders:
+            loader = self._transformer_block_data_loaders.pop(_transformer_name(transformer), None)
+            if loader:
+                loader(self._get_loadable_block_data_map())
+
+    def _load_all_transformer_block_data(self):
+        """
+        Loads the block-specific data of all transformers that have not
+        been loaded yet.
+        """
+        while self._transformer_block_data_loaders:
+            _, loader = self._transformer_block_data_loaders.popitem()
+            loader(self._get_loadable_block_data_map())
+
+    def _get_loadable_block_data_map(self):
+        """
+        Returns the block data map that lazily loaded transformer data
+        is loaded into: the map itself if this block structure owns all
+        its BlockData, or else a view of it that copies shared BlockData
+        before the data is loaded into them.
+        """
+        if self._owned_block_data is None:
+            return self._block_data_map
+        return _WritableBlockDataMap(self)
+
     def _get_or_create_block(self, usage_key):
         """
-        Returns the BlockData associated with the given usage_key.
-        If not found, creates and returns a new BlockData and
-        maps it to the given key.
+        Returns the BlockData associated with the given usage_key,
+        for modification.  If not found, creates and returns a new
+        BlockData and maps it to the given key.
         """
         try:
-            return self._block_data_map[usage_key]
+            return self._get_writable_block(usage_key)
         except KeyError:
             block_data = BlockData(usage_key)
             self._block_data_map[usage_key] = block_data
+            if self._owned_block_data is not None:
+                self._owned_block_data.add(usage_key)
             return block_data
 
+    def _get_writable_block(self, usage_key):
+        """
+        Returns the BlockData associated with the given usage_key,
+        first copying it if it is shared with other block structures.
+
+        Raises KeyError if not found.
+        """
+        block_data = self._block_data_map[usage_key]
+        if self._owned_block_data is not None and usage_key not in self._owned_block_data:
+            block_data = block_data.copy()
+            self._block_data_map[usage_key] = block_data
+            self._owned_block_data.add(usage_key)
+        return block_data
+
+    def _get_writable_transformer_data(self, transformer):
+        """
+        Returns the non-block-specific TransformerData of the given
+        transformer, first copying it if it is shared with other block
+        structures.  If not found, creates and returns a new
+        TransformerData.
+        """
+        transformer_name = _transformer_name(transformer)
+        if self._owned_transformer_data is not None and transformer_name not in self._owned_transformer_data:
+            if transformer_name in self.transformer_data:
+                self.transformer_data[transformer_name] = self.transformer_data[transformer_name].copy()
+            self._owned_transformer_data.add(transformer_name)
+        return self.transformer_data.get_or_create(transformer_name)
+
+    def _share_all(self):
+        """
+        Marks all relations and data of this block structure as shared
+        with other block structures, so they are copied before they are
+        modified.
+        """
+        self._owned_relations = set()
+        self._owned_block_data = set()
+        self._owned_transformer_data = set()
+
+
+class _WritableBlockDataMap(object):
+    """
+    The view of the block data map of a BlockStructureBlockData whose
+    get method returns BlockData that the block structure owns.
+    """
+    def __init__(self, block_structure):
+        self._block_structure = block_structure
+
+    def get(self, usage_key, default=None):
+        """
+        Returns the writable BlockData of the given usage_key; returns
+        default if not found.
+        """
+        try:
+            return self._block_structure._get_writable_block(usage_key)  # pylint: disable=protected-access
+        except KeyError:
+            return default
+
+
+def _transformer_name(transformer):
+    """
+    Returns the name of the given transformer, which can be either the
+    transformer's class or its name.
+    """
+    try:
+        return transformer.name()
+    except AttributeError:
+        return transformer
+
 
 class BlockStructureModulestoreData(BlockStructureBlockData):
     """
@@ -86,12 +86,33 @@ class BlockStructureFactory(object):
         return block_structure_store.get(root_block_usage_key)
 
     @classmethod
-    def create_new(cls, root_block_usage_key, block_relations, transformer_data, block_data_map):
+    def create_new(
+            cls,
+            root_block_usage_key,
+            block_relations,
+            transformer_data,
+            block_data_map,
+            transformer_block_data_loaders=None,
+            block_index=None,
+    ):
         """
         Returns a new block structure for given the arguments.
+
+        Arguments:
+            transformer_block_data_loaders (dict {string: function}) -
+                Optional map of a transformer's name to a function that
+                loads the transformer's block-specific data into a given
+                block data map, for transformers whose data is not yet in
+                block_data_map and is to be loaded lazily.
+
+            block_index (BlockIndex) - Optional index of the blocks
+                that were collected.
         """
+        # pylint: disable=protected-access
         block_structure = BlockStructureBlockData(root_block_usage_key)
-        block_structure._block_relations = block_relations  # pylint: disable=protected-access
+        block_structure._block_relations = block_relations
         block_structure.transformer_data = transformer_data
-        block_structure._block_data_map = block_data_map  # pylint: disable=protected-access
+        block_structure._block_data_map = block_data_map
+        block_structure._transformer_block_data_loaders = transformer_block_data_loaders or {}
+        block_structure.block_index = block_index
         return block_structure
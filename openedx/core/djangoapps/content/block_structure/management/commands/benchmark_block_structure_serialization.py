@@ -0,0 +1,112 @@
+"""
+Command to compare the serialization formats of course blocks.
+"""
+import gc
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+import openedx.core.djangoapps.content.block_structure.api as api
+from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.core.djangoapps.content.block_structure.serializer import BlockStructureSerializer
+from openedx.core.djangoapps.content.block_structure.transformer_registry import TransformerRegistry
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+from openedx.core.lib.command_utils import parse_course_keys
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_block_structure_serialization 'edX/DemoX/Demo_Course' --settings=devstack
+        $ ./manage.py lms benchmark_block_structure_serialization 'edX/DemoX/Demo_Course' --iterations 50
+            --transformers blocks_api course_blocks_api --settings=devstack
+    """
+    args = u'<course_id course_id ...>'
+    help = (
+        u'Compares load time, size and memory of the pickle and compact serialization '
+        u'formats of the collected course blocks for one or more courses.'
+    )
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            'courses',
+            nargs='+',
+            help=u'Course keys of the courses to benchmark.',
+        )
+        parser.add_argument(
+            '--iterations',
+            help=u'Number of times to deserialize each course.',
+            default=20,
+            type=int,
+        )
+        parser.add_argument(
+            '--transformers',
+            nargs='+',
+            help=(
+                u'Names of the transformers whose data the compact format should load; defaults to all '
+                u'registered transformers.  The data of any other transformer is loaded lazily, on access.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        transformer_names = options.get('transformers') or [
+            transformer.name() for transformer in TransformerRegistry.get_registered_transformers()
+        ]
+
+        for course_key in parse_course_keys(options['courses']):
+            block_structure = api.get_course_in_cache(course_key)
+            block_structure._load_all_transformer_block_data()  # pylint: disable=protected-access
+            root_key = block_structure.root_block_usage_key
+
+            formats = [
+                (
+                    u'pickle',
+                    zpickle((
+                        block_structure._block_relations,  # pylint: disable=protected-access
+                        block_structure.transformer_data,
+                        block_structure._block_data_map,  # pylint: disable=protected-access
+                    )),
+                    lambda data: BlockStructureFactory.create_new(root_key, *zunpickle(data)),
+                ),
+                (
+                    u'compact',
+                    BlockStructureSerializer.serialize(block_structure),
+                    lambda data: BlockStructureSerializer.deserialize(data, root_key, transformer_names),
+                ),
+            ]
+
+            self.stdout.write(u'{}: {} blocks'.format(course_key, len(block_structure)))
+            for format_name, serialized_data, deserialize in formats:
+                load_time, num_objects = self._measure(deserialize, serialized_data, iterations)
+                self.stdout.write(
+                    u'  {:<8} size: {:>10} bytes  load: {:>8.2f} ms  objects: {:>8}'.format(
+                        format_name, len(serialized_data), load_time * 1000, num_objects,
+                    )
+                )
+
+    @staticmethod
+    def _measure(deserialize, serialized_data, iterations):
+        """
+        Returns the average time taken by the given deserialize function
+        and the number of objects allocated and retained by its result.
+        """
+        gc.collect()
+        start = time.time()
+        for _ in range(iterations):
+            deserialize(serialized_data)
+        load_time = (time.time() - start) / iterations
+
+        gc.collect()
+        num_objects_before = len(gc.get_objects())
+        result = deserialize(serialized_data)  # pylint: disable=unused-variable
+        gc.collect()
+        num_objects = len(gc.get_objects()) - num_objects_before
+        return load_time, num_objects
@@ -41,7 +41,10 @@ class BlockStructureManager(object):
         and modulestore, as needed.
 
         Details: Similar to the get_collected method, except the transformers'
-        transform methods are also called.
+        transform methods are also called.  The collected block-specific
+        data of each transformer is loaded from the store only when it is
+        first accessed, so data of transformers that are not used by the
+        given transformers is never deserialized.
 
         Arguments:
             transformers (BlockStructureTransformers) - Collection of
@@ -0,0 +1,401 @@
+"""
+Module for the compact, versioned serialization format of block structures.
+
+Rather than pickling the whole object graph of a BlockStructureBlockData,
+the serialized format is columnar and split into separately compressed
+segments:
+
+    keys - The usage keys of all blocks, interned once.  Keys that belong
+        to the structure's course are stored as (block_type, block_id)
+        tuples; any other key is stored as is.  All other segments refer
+        to blocks by their integer index in this table.
+
+    relations - The children of each block, stored as integer adjacency
+        arrays (an offsets array and a flattened children array).  Parents
+        are derived from the children at load time.
+
+    fields - The collected xBlock fields, stored as one column per field
+        name, mapping block indices to values.
+
+    transformers - The non-block-specific data of all transformers.
+
+    transformer_blocks.<transformer name> - The block-specific data of a
+        single transformer, stored as one column per key.  Each
+        transformer has its own segment so it can be decoded lazily,
+        only when the transformer's data is first accessed.
+
+    block_index - The indices, in the keys table, of the blocks in the
+        block structure's BlockIndex, stored as an integer array.  The
+        segment is absent if the blocks were not indexed.
+
+The serialized data starts with a magic prefix and a format version so
+that readers can detect and reject (or fall back for) data that was
+written in any other format.
+"""
+from array import array
+import cPickle as pickle
+from functools import partial
+import struct
+import zlib
+
+from .block_structure import BlockData, BlockIndex, TransformerDataMap, _BlockRelations
+
+
+# Prefix for identifying data serialized in this format.
+MAGIC = 'BSX'
+
+# The latest version of the serialized format.  Incrementally update this
+# value whenever the format changes.
+FORMAT_VERSION = 1
+
+# Header following the magic prefix: format version and length of the
+# segment index.
+_HEADER = struct.Struct('!BI')
+
+# Type code of the integer arrays used for relations.
+_ARRAY_TYPECODE = 'I'
+
+KEYS_SEGMENT = 'keys'
+RELATIONS_SEGMENT = 'relations'
+FIELDS_SEGMENT = 'fields'
+TRANSFORMERS_SEGMENT = 'transformers'
+TRANSFORMER_BLOCKS_SEGMENT_PREFIX = 'transformer_blocks.'
+BLOCK_INDEX_SEGMENT = 'block_index'
+
+
+class BlockStructureSerializationError(ValueError):
+    """
+    Exception for when serialized data is not in the expected format.
+    """
+    pass
+
+
+def is_serialized(serialized_data):
+    """
+    Returns whether the given data was serialized in this module's format.
+    """
+    return serialized_data[:len(MAGIC)] == MAGIC
+
+
+def transformer_blocks_segment_name(transformer_name):
+    """
+    Returns the name of the segment containing the block-specific
+    data of the transformer with the given name.
+    """
+    return TRANSFORMER_BLOCKS_SEGMENT_PREFIX + transformer_name
+
+
+class SerializedSegments(object):
+    """
+    Read-only access to the segments of serialized block structure
+    data.  Each segment is decompressed and unpickled only when it is
+    first loaded.
+    """
+    def __init__(self, serialized_data):
+        if not is_serialized(serialized_data):
+            raise BlockStructureSerializationError('Unknown block structure serialization format.')
+
+        header_start = len(MAGIC)
+        index_start = header_start + _HEADER.size
+        version, index_length = _HEADER.unpack_from(serialized_data, header_start)
+        if version != FORMAT_VERSION:
+            raise BlockStructureSerializationError(
+                'Unsupported block structure serialization version: {}.'.format(version)
+            )
+
+        self._data = serialized_data
+        self._segments_start = index_start + index_length
+
+        # Map of segment name to its (offset, length) in the data.
+        # dict {string: (int, int)}
+        self._index = pickle.loads(serialized_data[index_start:self._segments_start])
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def names(self):
+        """
+        Returns the names of all segments in the data.
+        """
+        return self._index.keys()
+
+    def transformer_names(self):
+        """
+        Returns the names of all transformers with block-specific data.
+        """
+        prefix_length = len(TRANSFORMER_BLOCKS_SEGMENT_PREFIX)
+        return [
+            name[prefix_length:]
+            for name in self._index
+            if name.startswith(TRANSFORMER_BLOCKS_SEGMENT_PREFIX)
+        ]
+
+    def load(self, name, default=None):
+        """
+        Decodes and returns the segment with the given name; returns
+        default if the segment is not in the data.
+        """
+        try:
+            offset, length = self._index[name]
+        except KeyError:
+            return default
+        start = self._segments_start + offset
+        return pickle.loads(zlib.decompress(self._data[start:start + length]))
+
+
+class BlockStructureSerializer(object):
+    """
+    Serializes and deserializes BlockStructureBlockData objects to and
+    from the compact segmented format.
+    """
+    @classmethod
+    def serialize(cls, block_structure):
+        """
+        Returns the serialization of the given block structure.
+
+        Arguments:
+            block_structure (BlockStructureBlockData) - The block
+                structure that is to be serialized.
+        """
+        # pylint: disable=protected-access
+        block_structure._load_all_transformer_block_data()
+        block_relations = block_structure._block_relations
+        block_data_map = block_structure._block_data_map
+        course_key = _course_key_of(block_structure.root_block_usage_key)
+
+        # Intern block keys, including any that only have block data or
+        # are only in the block index.
+        block_keys = list(block_relations)
+        block_keys.extend(key for key in block_data_map if key not in block_relations)
+        key_indices = {block_key: index for index, block_key in enumerate(block_keys)}
+        if block_structure.block_index is not None:
+            for block_key in block_structure.block_index.block_keys:
+                if block_key not in key_indices:
+                    key_indices[block_key] = len(block_keys)
+                    block_keys.append(block_key)
+
+        segments = {
+            KEYS_SEGMENT: (
+                [cls._pack_key(block_key, course_key) for block_key in block_keys],
+                len(block_relations),
+                sorted(key_indices[block_key] for block_key in block_data_map),
+            ),
+            RELATIONS_SEGMENT: cls._pack_relations(block_keys, block_relations, key_indices),
+            TRANSFORMERS_SEGMENT: {
+                transformer_name: transformer_data.fields
+                for transformer_name, transformer_data in block_structure.transformer_data.iteritems()
+            },
+        }
+
+        fields = {}
+        transformer_blocks = {}
+        for block_key, block_data in block_data_map.iteritems():
+            index = key_indices[block_key]
+            for field_name, value in block_data.fields.iteritems():
+                fields.setdefault(field_name, {})[index] = value
+            for transformer_name, transformer_data in block_data.transformer_data.iteritems():
+                columns = transformer_blocks.setdefault(transformer_name, {})
+                for key, value in transformer_data.fields.iteritems():
+                    columns.setdefault(key, {})[index] = value
+                if not transformer_data.fields:
+                    # Retain the existence of empty transformer data.
+                    columns.setdefault(None, {})[index] = None
+
+        segments[FIELDS_SEGMENT] = fields
+        if block_structure.block_index is not None:
+            segments[BLOCK_INDEX_SEGMENT] = array(
+                _ARRAY_TYPECODE,
+                [key_indices[block_key] for block_key in block_structure.block_index.block_keys],
+            ).tostring()
+        for transformer_name, columns in transformer_blocks.iteritems():
+            segments[transformer_blocks_segment_name(transformer_name)] = columns
+
+        return cls._pack_segments(segments)
+
+    @classmethod
+    def deserialize(cls, serialized_data, root_block_usage_key, transformer_names=None):
+        """
+        Deserializes the given data and returns the parsed block structure.
+
+        Arguments:
+            serialized_data (str) - Data previously returned by serialize.
+
+            root_block_usage_key (UsageKey) - The usage key of the root
+                of the serialized block structure.
+
+            transformer_names (iterable(string)) - Names of the transformers
+                whose block-specific data is to be decoded right away.  The
+                data of all other transformers is decoded lazily, when it
+                is first accessed through the returned block structure.
+
+        Returns:
+            BlockStructureBlockData - The deserialized block structure.
+        """
+        from .factory import BlockStructureFactory
+
+        segments = SerializedSegments(serialized_data)
+        block_keys, block_relations, block_data_map = cls.load_blocks(segments, root_block_usage_key)
+
+        transformer_block_data_loaders = {
+            transformer_name: partial(cls.load_transformer_blocks, segments, transformer_name, block_keys)
+            for transformer_name in segments.transformer_names()
+        }
+        for transformer_name in transformer_names or []:
+            loader = transformer_block_data_loaders.pop(transformer_name, None)
+            if loader:
+                loader(block_data_map)
+
+        return BlockStructureFactory.create_new(
+            root_block_usage_key,
+            block_relations,
+            cls.load_transformer_data(segments),
+            block_data_map,
+            transformer_block_data_loaders=transformer_block_data_loaders,
+            block_index=cls.load_block_index(segments, block_keys),
+        )
+
+    @classmethod
+    def load_blocks(cls, segments, root_block_usage_key):
+        """
+        Decodes the keys, relations and xBlock fields segments.
+
+        Returns:
+            ([UsageKey], {UsageKey: _BlockRelations}, {UsageKey: BlockData}) -
+                The interned block keys, the block relations map and the
+                block data map without any transformer data.
+        """
+        course_key = _course_key_of(root_block_usage_key)
+        packed_keys, num_related_blocks, data_indices = segments.load(KEYS_SEGMENT)
+        block_keys = [cls._unpack_key(packed_key, course_key) for packed_key in packed_keys]
+        block_relations = cls._unpack_relations(
+            block_keys[:num_related_blocks],
+            segments.load(RELATIONS_SEGMENT),
+        )
+
+        block_data_map = {}
+        for index in data_indices:
+            block_key = block_keys[index]
+            block_data_map[block_key] = BlockData(block_key)
+
+        for field_name, column in segments.load(FIELDS_SEGMENT, {}).iteritems():
+            for index, value in column.iteritems():
+                block_data_map[block_keys[index]].fields[field_name] = value
+
+        return block_keys, block_relations, block_data_map
+
+    @classmethod
+    def load_transformer_data(cls, segments):
+        """
+        Decodes and returns the non-block-specific transformer data.
+        """
+        transformer_data = TransformerDataMap()
+        for transformer_name, fields in segments.load(TRANSFORMERS_SEGMENT, {}).iteritems():
+            transformer_data.get_or_create(transformer_name).fields = fields
+        return transformer_data
+
+    @classmethod
+    def load_block_index(cls, segments, block_keys):
+        """
+        Decodes and returns the BlockIndex, or None if the blocks were
+        not indexed.
+        """
+        packed_block_index = segments.load(BLOCK_INDEX_SEGMENT)
+        if packed_block_index is None:
+            return None
+        key_indices = array(_ARRAY_TYPECODE)
+        key_indices.fromstring(packed_block_index)
+        return BlockIndex(block_keys[index] for index in key_indices)
+
+    @classmethod
+    def load_transformer_blocks(cls, segments, transformer_name, block_keys, block_data_map):
+        """
+        Decodes the block-specific data of the given transformer into
+        the given block data map.  Data of blocks that are no longer in
+        the block data map is skipped.
+        """
+        columns = segments.load(transformer_blocks_segment_name(transformer_name), {})
+        for key, column in columns.iteritems():
+            for index, value in column.iteritems():
+                block_data = block_data_map.get(block_keys[index])
+                if block_data is None:
+                    continue
+                transformer_data = block_data.transformer_data.get_or_create(transformer_name)
+                if key is not None:
+                    transformer_data.fields[key] = value
+
+    @staticmethod
+    def _pack_key(block_key, course_key):
+        """
+        Returns a compact representation of the given block key.
+        """
+        if course_key is not None and getattr(block_key, 'course_key', None) == course_key:
+            return block_key.block_type, block_key.block_id
+        return None, block_key
+
+    @staticmethod
+    def _unpack_key(packed_key, course_key):
+        """
+        Returns the block key for the given compact representation.
+        """
+        block_type, block_id = packed_key
+        if block_type is None:
+            return block_id
+        return course_key.make_usage_key(block_type, block_id)
+
+    @staticmethod
+    def _pack_relations(block_keys, block_relations, key_indices):
+        """
+        Returns the children of the related blocks as integer adjacency
+        arrays: offsets into a flattened array of children indices.
+        """
+        offsets = array(_ARRAY_TYPECODE, [0])
+        children = array(_ARRAY_TYPECODE)
+        for block_key in block_keys[:len(block_relations)]:
+            children.extend(key_indices[child] for child in block_relations[block_key].children)
+            offsets.append(len(children))
+        return offsets.tostring(), children.tostring()
+
+    @staticmethod
+    def _unpack_relations(block_keys, packed_relations):
+        """
+        Returns the block relations map for the given integer
+        adjacency arrays.
+        """
+        offsets, children = array(_ARRAY_TYPECODE), array(_ARRAY_TYPECODE)
+        offsets.fromstring(packed_relations[0])
+        children.fromstring(packed_relations[1])
+
+        relations = [_BlockRelations() for _ in block_keys]
+        for parent_index, parent_relations in enumerate(relations):
+            parent_key = block_keys[parent_index]
+            for child_index in children[offsets[parent_index]:offsets[parent_index + 1]]:
+                parent_relations.children.append(block_keys[child_index])
+                relations[child_index].parents.append(parent_key)
+        return dict(zip(block_keys, relations))
+
+    @staticmethod
+    def _pack_segments(segments):
+        """
+        Compresses the given segments and returns them along with the
+        header and segment index.
+        """
+        index = {}
+        packed_segments = []
+        offset = 0
+        for name, segment in segments.iteritems():
+            packed_segment = zlib.compress(pickle.dumps(segment, pickle.HIGHEST_PROTOCOL))
+            index[name] = (offset, len(packed_segment))
+            packed_segments.append(packed_segment)
+            offset += len(packed_segment)
+
+        packed_index = pickle.dumps(index, pickle.HIGHEST_PROTOCOL)
+        return ''.join(
+            [MAGIC, _HEADER.pack(FORMAT_VERSION, len(packed_index)), packed_index] + packed_segments
+        )
+
+
+def _course_key_of(usage_key):
+    """
+    Returns the course key of the given usage key, if any.
+    """
+    return getattr(usage_key, 'course_key', None)
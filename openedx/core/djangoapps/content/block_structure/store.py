@@ -4,18 +4,47 @@ Module for the Storage of BlockStructure objects.
 # pylint: disable=protected-access
 from logging import getLogger
 
-from openedx.core.lib.cache_utils import zpickle, zunpickle
+from django.conf import settings
+
+from openedx.core.djangoapps import monitoring_utils
+from openedx.core.lib.cache_utils import LRUCache, zunpickle
 
 from . import config
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
 from .models import BlockStructureModel
+from .serializer import BlockStructureSerializer, is_serialized
 from .transformer_registry import TransformerRegistry
 
 
 logger = getLogger(__name__)  # pylint: disable=C0103
 
+# Default maximum total number of blocks of the block structures kept in
+# the in-process cache.
+DEFAULT_PROCESS_CACHE_MAX_BLOCKS = 50000
+
+# The in-process cache of deserialized block structures, shared by all
+# BlockStructureStore instances in this process.
+_process_cache = None  # pylint: disable=invalid-name
+
+
+def get_process_cache():
+    """
+    Returns the in-process cache of block structures, creating it
+    on first use.  The cache is bounded by the total number of blocks
+    of its block structures.
+    """
+    global _process_cache  # pylint: disable=global-statement, invalid-name
+    if _process_cache is None:
+        _process_cache = LRUCache(
+            max_size=settings.BLOCK_STRUCTURES_SETTINGS.get(
+                'PROCESS_CACHE_MAX_BLOCKS', DEFAULT_PROCESS_CACHE_MAX_BLOCKS,
+            ),
+            get_size=len,
+        )
+    return _process_cache
+
 
 class StubModel(object):
     """
@@ -51,8 +80,8 @@ class BlockStructureStore(object):
 
     def add(self, block_structure):
         """
-        Stores and caches a compressed and pickled serialization of
-        the given block structure.
+        Stores and caches a compact serialization of the given block
+        structure.
 
         The data stored includes the structure's
         block relations, transformer data, and block data.
@@ -71,6 +100,11 @@ class BlockStructureStore(object):
         Deserializes and returns the block structure starting at
         root_block_usage_key, if found in the cache or storage.
 
+        When the in-process cache is enabled, the deserialized block
+        structure is kept in the process and callers are given their
+        own copy of it, so later calls for the same version of the
+        block structure need not access the cache or deserialize again.
+
         The given root_block_usage_key must equate the
         root_block_usage_key previously passed to the `add` method.
 
@@ -89,13 +123,23 @@ class BlockStructureStore(object):
         """
         bs_model = self._get_model(root_block_usage_key)
 
+        use_process_cache = _is_process_cache_enabled()
+        if use_process_cache:
+            block_structure = self._get_from_process_cache(bs_model)
+            if block_structure is not None:
+                return block_structure.copy()
+
         try:
             serialized_data = self._get_from_cache(bs_model)
         except BlockStructureNotFound:
             serialized_data = self._get_from_store(bs_model)
             self._add_to_cache(serialized_data, bs_model)
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+        block_structure = self._deserialize(serialized_data, root_block_usage_key)
+        if use_process_cache:
+            self._add_to_process_cache(block_structure, bs_model)
+            return block_structure.copy()
+        return block_structure
 
     def delete(self, root_block_usage_key):
         """
@@ -108,6 +152,7 @@ class BlockStructureStore(object):
         """
         bs_model = self._get_model(root_block_usage_key)
         self._cache.delete(self._encode_root_cache_key(bs_model))
+        get_process_cache().delete(self._encode_root_cache_key(bs_model))
         bs_model.delete()
         logger.info("BlockStructure: Deleted from cache and store; %s.", bs_model)
 
@@ -177,6 +222,38 @@ class BlockStructureStore(object):
             logger.info("BlockStructure: Read from cache; %s, size: %d", bs_model, len(serialized_data))
         return serialized_data
 
+    def _add_to_process_cache(self, block_structure, bs_model):
+        """
+        Adds the given deserialized block_structure for the given
+        BlockStructureModel to the in-process cache.  The added
+        block_structure must not be mutated afterwards.
+
+        Its transformer data is left to be loaded lazily: it is only
+        read through copies, which load the data they need into their own
+        blocks, so the cached block structure itself is never changed.
+        """
+        process_cache = get_process_cache()
+        evictions_before = process_cache.evictions
+        process_cache.set(self._encode_root_cache_key(bs_model), block_structure)
+        monitoring_utils.accumulate(
+            'block_structure.process_cache.evictions',
+            process_cache.evictions - evictions_before,
+        )
+
+    def _get_from_process_cache(self, bs_model):
+        """
+        Returns the deserialized block structure for the given
+        BlockStructureModel from the in-process cache; returns None if
+        not found.
+        """
+        block_structure = get_process_cache().get(self._encode_root_cache_key(bs_model))
+        if block_structure is None:
+            monitoring_utils.increment('block_structure.process_cache.miss')
+        else:
+            monitoring_utils.increment('block_structure.process_cache.hit')
+            logger.info("BlockStructure: Read from process cache; %s.", bs_model)
+        return block_structure
+
     def _get_from_store(self, bs_model):
         """
         Returns the serialized data for the given BlockStructureModel
@@ -193,17 +270,16 @@ class BlockStructureStore(object):
         """
         Serializes the data for the given block_structure.
         """
-        data_to_cache = (
-            block_structure._block_relations,
-            block_structure.transformer_data,
-            block_structure._block_data_map,
-        )
-        return zpickle(data_to_cache)
+        return BlockStructureSerializer.serialize(block_structure)
 
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
         """
+        if is_serialized(serialized_data):
+            return BlockStructureSerializer.deserialize(serialized_data, root_block_usage_key)
+
+        # Data stored in the legacy format: a zlib-compressed pickle.
         block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         return BlockStructureFactory.create_new(
             root_block_usage_key,
@@ -256,3 +332,15 @@ def _is_storage_backing_enabled():
     Returns whether storage backing for Block Structures is enabled.
     """
     return config.waffle().is_enabled(config.STORAGE_BACKING_FOR_CACHE)
+
+
+def _is_process_cache_enabled():
+    """
+    Returns whether the in-process cache for Block Structures is enabled.
+
+    Since entries of the in-process cache are not invalidated across
+    processes, the cache is only used when storage backing is enabled:
+    the stored model then provides the versions of the block structure,
+    which are part of the cache key.
+    """
+    return _is_storage_backing_enabled() and config.waffle().is_enabled(config.IN_PROCESS_CACHE)
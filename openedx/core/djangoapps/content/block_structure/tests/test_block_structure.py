@@ -268,3 +268,63 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         _set_value(new_copy, 'edit2')
         self.assertEquals(_get_value(block_structure), 'edit1')
         self.assertEquals(_get_value(new_copy), 'edit2')
+
+    def test_copy_on_write(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        for block in block_structure:
+            block_structure.set_transformer_block_field(block, 'transformer', 'test_key', 'original_value')
+        block_structure.set_transformer_data('transformer', 'test_key', 'original_value')
+
+        # verify the copy shares the relations and data of all blocks
+        new_copy = block_structure.copy()
+        for block in block_structure:
+            self.assertIs(block_structure._block_relations[block], new_copy._block_relations[block])
+            self.assertIs(block_structure._block_data_map[block], new_copy._block_data_map[block])
+
+        # verify only the modified blocks are copied
+        new_copy.remove_block(3, keep_descendants=False)
+        new_copy.set_transformer_block_field(2, 'transformer', 'test_key', 'edit')
+        new_copy.set_transformer_data('transformer', 'test_key', 'edit')
+        self.assertIsNot(block_structure._block_relations[1], new_copy._block_relations[1])
+        self.assertIsNot(block_structure._block_data_map[2], new_copy._block_data_map[2])
+        for block in (0, 2, 4):
+            self.assertIs(block_structure._block_relations[block], new_copy._block_relations[block])
+        for block in (0, 1, 4):
+            self.assertIs(block_structure._block_data_map[block], new_copy._block_data_map[block])
+
+        self.assert_block_structure(block_structure, ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        self.assertEquals(block_structure.get_transformer_block_field(2, 'transformer', 'test_key'), 'original_value')
+        self.assertEquals(block_structure.get_transformer_data('transformer', 'test_key'), 'original_value')
+        self.assertEquals(new_copy.get_transformer_data('transformer', 'test_key'), 'edit')
+
+    def test_block_index(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        block_structure._index_blocks()
+        block_index = block_structure.block_index
+        self.assertEquals(len(block_index), len(ChildrenMapTestMixin.DAG_CHILDREN_MAP))
+        self.assertEquals(list(block_index.block_keys), list(block_structure.topological_traversal()))
+
+        bitset = block_index.bitset([5, 3, 'unindexed_block'])
+        self.assertEquals(list(block_index.iter_block_keys(bitset)), [3, 5])
+        self.assertEquals(list(block_index.iter_block_keys(0)), [])
+
+        # verify the index is shared with copies
+        self.assertIs(block_structure.copy().block_index, block_index)
+
+    @ddt.data(
+        ({2, 4}, False, [[1], [3], [], [5, 6], [], [], []], [2, 4]),
+        ({1, 2, 3, 4, 5, 6}, False, [[], [], [], [], [], [], []], [1, 2, 3, 4, 5, 6]),
+        ({0, 1, 2, 3, 4, 5, 6}, False, [[], [], [], [], [], [], []], [0, 1, 2, 3, 4, 5, 6]),
+        ({2}, True, [[1, 3, 4], [3], [], [5, 6], [], [], []], [2]),
+    )
+    @ddt.unpack
+    def test_remove_blocks_in_bitset(self, blocks_to_remove, keep_descendants, expected_children_map, missing_blocks):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        block_structure._index_blocks()
+
+        block_structure.remove_blocks_in_bitset(
+            block_structure.block_index.bitset(blocks_to_remove),
+            keep_descendants,
+        )
+        block_structure._prune_unreachable()
+        self.assert_block_structure(block_structure, expected_children_map, missing_blocks)
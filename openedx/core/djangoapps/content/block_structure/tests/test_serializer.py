@@ -0,0 +1,113 @@
+"""
+Tests for serializer.py
+"""
+# pylint: disable=protected-access
+import ddt
+from nose.plugins.attrib import attr
+from unittest import TestCase
+
+from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
+
+from openedx.core.lib.cache_utils import zpickle
+
+from ..serializer import BlockStructureSerializationError, BlockStructureSerializer, SerializedSegments
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestBlockStructureSerializer(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for BlockStructureSerializer
+    """
+    def create_collected_block_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map with
+        mock xBlock fields and transformer data.
+        """
+        block_structure = self.create_block_structure(children_map)
+        block_structure._add_transformer(MockTransformer)
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            block_structure._get_or_create_block(block_key).display_name = u'block {}'.format(block_id)
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'test', block_id)
+        return block_structure
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_round_trip(self, children_map):
+        block_structure = self.create_collected_block_structure(children_map)
+        serialized_data = BlockStructureSerializer.serialize(block_structure)
+        deserialized = BlockStructureSerializer.deserialize(serialized_data, self.block_key_factory(0))
+
+        self.assert_block_structure(deserialized, children_map)
+        self.assertEquals(deserialized._get_transformer_data_version(MockTransformer), MockTransformer.WRITE_VERSION)
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            self.assertEquals(deserialized.get_xblock_field(block_key, 'display_name'), u'block {}'.format(block_id))
+            self.assertEquals(deserialized.get_transformer_block_field(block_key, MockTransformer, 'test'), block_id)
+
+    def test_foreign_keys(self):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+        foreign_key = BlockUsageLocator(CourseLocator('org', 'other', 'run'), block_type='html', block_id='foreign')
+        block_structure._add_relation(self.block_key_factory(1), foreign_key)
+
+        serialized_data = BlockStructureSerializer.serialize(block_structure)
+        deserialized = BlockStructureSerializer.deserialize(serialized_data, self.block_key_factory(0))
+        self.assertEquals(set(deserialized), set(block_structure))
+        self.assertEquals(deserialized.get_parents(foreign_key), [self.block_key_factory(1)])
+
+    @ddt.data(True, False)
+    def test_lazy_transformer_data(self, load_eagerly):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+        serialized_data = BlockStructureSerializer.serialize(block_structure)
+        self.assertEquals(SerializedSegments(serialized_data).transformer_names(), [MockTransformer.name()])
+
+        deserialized = BlockStructureSerializer.deserialize(
+            serialized_data,
+            self.block_key_factory(0),
+            transformer_names=[MockTransformer.name()] if load_eagerly else None,
+        )
+        self.assertEquals(
+            MockTransformer.name() in deserialized._transformer_block_data_loaders,
+            not load_eagerly,
+        )
+
+        deserialized.remove_block(self.block_key_factory(2), keep_descendants=False)
+        self.assertEquals(deserialized.get_transformer_block_field(self.block_key_factory(1), MockTransformer, 'test'), 1)
+        self.assertEquals(deserialized._transformer_block_data_loaders, {})
+
+    def test_lazy_transformer_data_copy(self):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+        serialized_data = BlockStructureSerializer.serialize(block_structure)
+        deserialized = BlockStructureSerializer.deserialize(serialized_data, self.block_key_factory(0))
+
+        copied = deserialized.copy()
+        self.assertIn(MockTransformer.name(), copied._transformer_block_data_loaders)
+        self.assertEquals(copied.get_transformer_block_field(self.block_key_factory(2), MockTransformer, 'test'), 2)
+        self.assertIn(MockTransformer.name(), deserialized._transformer_block_data_loaders)
+        self.assertEquals(deserialized._block_data_map[self.block_key_factory(2)].transformer_data, {})
+
+        copied.set_transformer_block_field(self.block_key_factory(1), MockTransformer, 'test', 'updated')
+        self.assertEquals(copied.get_transformer_block_field(self.block_key_factory(1), MockTransformer, 'test'), 'updated')
+        self.assertEquals(deserialized.get_transformer_block_field(self.block_key_factory(1), MockTransformer, 'test'), 1)
+
+    def test_unknown_format(self):
+        with self.assertRaises(BlockStructureSerializationError):
+            SerializedSegments(zpickle('legacy data'))
+
+    @ddt.data(True, False)
+    def test_block_index(self, index_blocks):
+        block_structure = self.create_collected_block_structure(self.DAG_CHILDREN_MAP)
+        if index_blocks:
+            block_structure._index_blocks()
+
+        serialized_data = BlockStructureSerializer.serialize(block_structure)
+        deserialized = BlockStructureSerializer.deserialize(serialized_data, self.block_key_factory(0))
+        if index_blocks:
+            self.assertEquals(deserialized.block_index.block_keys, block_structure.block_index.block_keys)
+        else:
+            self.assertIsNone(deserialized.block_index)
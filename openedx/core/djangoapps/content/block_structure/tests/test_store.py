@@ -2,14 +2,16 @@
 Tests for block_structure/cache.py
 """
 import ddt
+from mock import patch
 from nose.plugins.attrib import attr
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle
+from ..block_structure import BlockStructureBlockData
+from ..config import IN_PROCESS_CACHE, STORAGE_BACKING_FOR_CACHE, waffle
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
-from ..store import BlockStructureStore
+from ..store import BlockStructureStore, get_process_cache
 from .helpers import ChildrenMapTestMixin, UsageKeyFactoryMixin, MockCache, MockTransformer
 
 
@@ -30,6 +32,7 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
 
         self.mock_cache = MockCache()
         self.store = BlockStructureStore(self.mock_cache)
+        get_process_cache().clear()
 
     def add_transformers(self):
         """
@@ -80,6 +83,58 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
             stored_value = self.store.get(self.block_structure.root_block_usage_key)
             self.assert_block_structure(stored_value, self.children_map)
 
+    @ddt.data(True, False)
+    def test_process_cache(self, with_storage_backing):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(IN_PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                first_value = self.store.get(self.block_structure.root_block_usage_key)
+                self.mock_cache.map.clear()
+
+                if with_storage_backing:
+                    second_value = self.store.get(self.block_structure.root_block_usage_key)
+                    self.assert_block_structure(second_value, self.children_map)
+                    self.assertIsNot(first_value, second_value)
+                    self.assertEquals(get_process_cache().stats()['hits'], 1)
+                else:
+                    # The in-process cache is not used without versioned storage.
+                    with self.assertRaises(BlockStructureNotFound):
+                        self.store.get(self.block_structure.root_block_usage_key)
+                    self.assertEquals(len(get_process_cache()), 0)
+
+    def test_process_cache_copy_on_read(self):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(IN_PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                first_value = self.store.get(self.block_structure.root_block_usage_key)
+                first_value.remove_block(self.block_key_factory(1), keep_descendants=False)
+
+                second_value = self.store.get(self.block_structure.root_block_usage_key)
+                self.assert_block_structure(second_value, self.children_map)
+
+    def test_process_cache_lazy_transformer_data(self):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(IN_PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                with patch.object(BlockStructureBlockData, '_load_all_transformer_block_data') as mock_load_all:
+                    first_value = self.store.get(self.block_structure.root_block_usage_key)
+                    second_value = self.store.get(self.block_structure.root_block_usage_key)
+                self.assertFalse(mock_load_all.called)
+
+                for value in (first_value, second_value):
+                    self.assertEquals(
+                        value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                        '{} val'.format(MockTransformer.name()),
+                    )
+
+    def test_process_cache_delete(self):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(IN_PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                self.store.get(self.block_structure.root_block_usage_key)
+                self.store.delete(self.block_structure.root_block_usage_key)
+                self.assertEquals(len(get_process_cache()), 0)
+
     @ddt.data(1, 5, None)
     def test_cache_timeout(self, timeout):
         if timeout is not None:
@@ -1,6 +1,7 @@
 """
 Tests for transformers.py
 """
+import ddt
 from mock import MagicMock, patch
 from nose.plugins.attrib import attr
 from unittest import TestCase
@@ -14,6 +15,7 @@ from .helpers import (
 
 
 @attr(shard=2)
+@ddt.ddt
 class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
     """
     Test class for testing BlockStructureTransformers
@@ -68,9 +70,33 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
         with patch(
             'openedx.core.djangoapps.content.block_structure.tests.helpers.MockTransformer.transform'
         ) as mock_transform_call:
-            self.transformers.transform(block_structure=MagicMock())
+            self.transformers.transform(block_structure=MagicMock(block_index=None))
             self.assertTrue(mock_transform_call.called)
 
+    @ddt.data(True, False)
+    def test_transform_with_bitsets(self, bitset_transforms_enabled):
+        block_structure = self.create_block_structure(self.DAG_CHILDREN_MAP)
+        block_structure._index_blocks()  # pylint: disable=protected-access
+        filtering_transformer = self.registered_transformers[1]
+        self.add_mock_transformer()
+
+        with patch(
+            'openedx.core.djangoapps.content.block_structure.transformers.config.waffle'
+        ) as mock_waffle, patch.object(
+            filtering_transformer,
+            'transform_block_bitsets',
+            return_value=[(block_structure.block_index.bitset([2]), False)],
+        ), patch.object(
+            filtering_transformer,
+            'transform_block_filters',
+            return_value=[block_structure.create_removal_filter(lambda block_key: block_key == 2)],
+        ) as mock_transform_block_filters:
+            mock_waffle.return_value.is_enabled.return_value = bitset_transforms_enabled
+            self.transformers.transform(block_structure)
+
+        self.assertEquals(mock_transform_block_filters.called, not bitset_transforms_enabled)
+        self.assert_block_structure(block_structure, [[1], [3], [], [5, 6], [], [], []], missing_blocks=[2, 4])
+
     def test_verify_versions(self):
         block_structure = self.create_block_structure(
             self.SIMPLE_CHILDREN_MAP,
@@ -82,3 +108,25 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
                 self.transformers.verify_versions(block_structure)
             self.transformers.collect(block_structure)
             self.assertTrue(self.transformers.verify_versions(block_structure))
+
+    def test_transform_signature(self):
+        self.add_mock_transformer()
+        block_structure = MagicMock()
+
+        # MockTransformer does not provide a signature.
+        self.assertIsNone(self.transformers.transform_signature(block_structure))
+
+        with patch(
+            'openedx.core.djangoapps.content.block_structure.tests.helpers.MockTransformer.transform_signature',
+            return_value='mock_signature',
+        ), patch(
+            'openedx.core.djangoapps.content.block_structure.tests.helpers.MockFilteringTransformer.transform_signature',
+            return_value='mock_filtering_signature',
+        ):
+            self.assertEquals(
+                self.transformers.transform_signature(block_structure),
+                (
+                    (MockFilteringTransformer.name(), 'mock_filtering_signature'),
+                    (MockTransformer.name(), 'mock_signature'),
+                ),
+            )
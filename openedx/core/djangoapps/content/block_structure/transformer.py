@@ -155,6 +155,34 @@ class BlockStructureTransformer(object):
         """
         raise NotImplementedError
 
+    def transform_signature(self, usage_info, block_structure):
+        """
+        Returns a hashable value that summarizes everything about the
+        given usage_info that this transformer's transform of the given
+        block_structure depends upon, or None if the transform cannot
+        be summarized this way.
+
+        If two usage_infos have equal (non-None) signatures for every
+        transformer in a collection of transformers, their transformed
+        block structures are identical.  This allows the transform to
+        be computed once and shared among many usage_infos (e.g., for
+        users with the same group memberships in a course).
+
+        By default, None is returned so the transform is computed for
+        each usage_info.  Transformers whose output depends upon the
+        usage_info only through a few properties should override this
+        method to return those properties.
+
+        Arguments:
+            usage_info (any negotiated type) - See the description in
+                the transform method.
+
+            block_structure (BlockStructureBlockData) - A block
+                structure, with already collected data for the
+                transformer, that is to be transformed.
+        """
+        return None
+
 
 class FilteringTransformerMixin(BlockStructureTransformer):
     """
@@ -207,3 +235,31 @@ class FilteringTransformerMixin(BlockStructureTransformer):
                 transformer, that is to be transformed in place.
         """
         raise NotImplementedError
+
+    def transform_block_bitsets(self, usage_info, block_structure):
+        """
+        This is an optional alternative to transform_block_filters, for
+        transformers that collect bitsets of blocks over the block
+        structure's block_index.
+
+        Returns a list of (bitset, keep_descendants) tuples of the
+        blocks that are to be removed from the given block_structure,
+        or None if the removals cannot be computed with bitsets for
+        the given usage_info (e.g., the bitsets were not collected),
+        in which case transform_block_filters is used instead.
+
+        Since the removals of all transformers are combined with bitwise
+        operations, the cost of this alternative is independent of the
+        number of blocks that are not removed.
+
+        By default, None is returned.
+
+        Arguments:
+            usage_info (any negotiated type) - See the description in
+                transform_block_filters.
+
+            block_structure (BlockStructureBlockData) - A mutable
+                block structure, with already collected data for the
+                transformer, that is to be transformed in place.
+        """
+        return None
@@ -4,6 +4,7 @@ Module for a collection of BlockStructureTransformers.
 import functools
 from logging import getLogger
 
+from . import config
 from .exceptions import TransformerException, TransformerDataIncompatible
 from .transformer import FilteringTransformerMixin
 from .transformer_registry import TransformerRegistry
@@ -75,6 +76,9 @@ class BlockStructureTransformers(object):
         """
         Collects data for each registered transformer.
         """
+        # Index the blocks so transformers can collect bitsets of them.
+        block_structure._index_blocks()  # pylint: disable=protected-access
+
         for transformer in TransformerRegistry.get_registered_transformers():
             block_structure._add_transformer(transformer)  # pylint: disable=protected-access
             transformer.collect(block_structure)
@@ -105,12 +109,36 @@ class BlockStructureTransformers(object):
             )
         return True
 
+    def transform_signature(self, block_structure):
+        """
+        Returns a hashable signature of the transform of the given
+        block structure for this collection's usage_info, combined
+        from the transform_signature of each transformer, or None if
+        any transformer does not provide a signature.
+
+        Usage infos with equal (non-None) signatures yield identical
+        transformed block structures.
+        """
+        signatures = []
+        for transformer in self._transformers['supports_filter'] + self._transformers['no_filter']:
+            signature = transformer.transform_signature(self.usage_info, block_structure)
+            if signature is None:
+                return None
+            signatures.append((transformer.name(), signature))
+        return tuple(signatures)
+
     def transform(self, block_structure):
         """
         The given block structure is transformed by each transformer in the
         collection. Tranformers with filters are combined and run first in a
         single course tree traversal, then remaining transformers are run in
         the order that they were added.
+
+        When the BITSET_TRANSFORMS switch is enabled, the removals of
+        transformers with filters that provide bitsets of the blocks to
+        remove are combined with bitwise operations and applied before
+        the traversal, which is run only for the remaining transformers
+        with filters.
         """
         self._transform_with_filters(block_structure)
         self._transform_without_filters(block_structure)
@@ -126,9 +154,32 @@ class BlockStructureTransformers(object):
         if not self._transformers['supports_filter']:
             return
 
+        use_bitsets = (
+            block_structure.block_index is not None and
+            config.waffle().is_enabled(config.BITSET_TRANSFORMS)
+        )
+
         filters = []
+        removal_bitset = 0
+        removal_bitset_keeping_descendants = 0
         for transformer in self._transformers['supports_filter']:
-            filters.extend(transformer.transform_block_filters(self.usage_info, block_structure))
+            block_bitsets = (
+                transformer.transform_block_bitsets(self.usage_info, block_structure) if use_bitsets else None
+            )
+            if block_bitsets is None:
+                filters.extend(transformer.transform_block_filters(self.usage_info, block_structure))
+                continue
+            for bitset, keep_descendants in block_bitsets:
+                if keep_descendants:
+                    removal_bitset_keeping_descendants |= bitset
+                else:
+                    removal_bitset |= bitset
+
+        if use_bitsets:
+            block_structure.remove_blocks_in_bitset(removal_bitset, keep_descendants=False)
+            block_structure.remove_blocks_in_bitset(removal_bitset_keeping_descendants, keep_descendants=True)
+            if not filters:
+                return
 
         combined_filters = functools.reduce(
             self._filter_chain,
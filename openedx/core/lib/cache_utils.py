@@ -4,6 +4,7 @@ Utilities related to caching.
 import collections
 import cPickle as pickle
 import functools
+import threading
 import zlib
 
 from xblock.core import XBlock
@@ -84,6 +85,101 @@ class memoized(object):  # pylint: disable=invalid-name
         return functools.partial(self.__call__, obj)
 
 
+class LRUCache(object):
+    """
+    A process-local, size-bounded cache that evicts its least recently
+    used entries once the total size of its entries exceeds max_size.
+
+    By default, each entry has a size of 1 so max_size bounds the number
+    of entries; provide get_size to bound the cache by any other measure
+    of its values (e.g., bytes or number of blocks).
+
+    The cache keeps hit, miss and eviction counters for monitoring.
+
+    WARNING: Values are shared across all requests served by the process,
+    so callers must never mutate them.  Also, the cache is not
+    invalidated across processes, so keys must include the versions of
+    the data that are cached.
+    """
+    def __init__(self, max_size, get_size=None):
+        self.max_size = max_size
+        self._get_size = get_size or (lambda value: 1)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.RLock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Returns the value associated with the given key, marking it as
+        most recently used; returns default if not found.
+        """
+        with self._lock:
+            try:
+                value, size = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries[key] = (value, size)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Associates the given key with the given value and evicts the
+        least recently used entries as needed.  Values larger than
+        max_size are not cached.
+        """
+        size = self._get_size(value)
+        with self._lock:
+            self.delete(key)
+            if size > self.max_size:
+                return
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key):
+        """
+        Deletes the given key from the cache, if found.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self.size -= entry[1]
+
+    def clear(self):
+        """
+        Deletes all entries from the cache and resets its counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns a dict of the cache's current size and counters.
+        """
+        return dict(
+            entries=len(self._entries),
+            size=self.size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+
 def hashvalue(arg):
     """
     If arg is an xblock, use its location. otherwise just turn it into a string
@@ -6,7 +6,7 @@ from unittest import TestCase
 import ddt
 from mock import MagicMock
 
-from openedx.core.lib.cache_utils import memoize_in_request_cache
+from openedx.core.lib.cache_utils import LRUCache, memoize_in_request_cache
 
 
 @ddt.ddt
@@ -63,3 +63,51 @@ class TestMemoizeInRequestCache(TestCase):
                 func_to_memoize(*arg_list2)
 
             self.assertEquals(self.func_to_count.call_count, 2)
+
+
+class TestLRUCache(TestCase):
+    """
+    Test the LRUCache class.
+    """
+    def test_get_and_set(self):
+        cache = LRUCache(max_size=2)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1)
+        self.assertEquals(cache.get('a'), 1)
+        self.assertIn('a', cache)
+        self.assertEquals(cache.stats(), dict(entries=1, size=1, hits=1, misses=1, evictions=0))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertIn('c', cache)
+        self.assertEquals(cache.evictions, 1)
+
+    def test_size_bound(self):
+        cache = LRUCache(max_size=5, get_size=len)
+        cache.set('a', [1, 2, 3])
+        cache.set('b', [1, 2])
+        self.assertEquals(cache.size, 5)
+        cache.set('c', [1])
+        self.assertNotIn('a', cache)
+        self.assertEquals(cache.size, 3)
+
+        # values larger than the cache are not cached
+        cache.set('d', range(6))
+        self.assertNotIn('d', cache)
+        self.assertEquals(cache.size, 3)
+
+    def test_delete_and_clear(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.delete('a')
+        cache.delete('missing')
+        self.assertEquals(len(cache), 0)
+        cache.set('b', 2)
+        cache.clear()
+        self.assertEquals(cache.stats(), dict(entries=0, size=0, hits=0, misses=0, evictions=0))